@@ -2,7 +2,7 @@ import os
 import time
 import logging
 from datetime import timedelta
-from flask import Flask, jsonify, send_from_directory, session, request
+from flask import Flask, jsonify, session, request
 from flask_cors import CORS
 from flask_session import Session
 from dotenv import load_dotenv
@@ -11,6 +11,13 @@ from prometheus_client import make_wsgi_app
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
 from monitoring.prometheus_metrics import REGISTRY, record_request_metrics
 from monitoring.middleware import MonitoringMiddleware
+from monitoring.request_timing import REQUEST_TIMING_ENABLED, RequestTimingMiddleware, init_request_timing
+from monitoring.fast_path import CORS_METHODS, CORS_REQUEST_HEADERS, FastPathMiddleware
+from monitoring.saturation import SaturationMiddleware
+from utils.assets import AssetManifest
+from utils.rate_limit import RateLimitMiddleware
+from utils.request_deadlines import DeadlineMiddleware, init_request_deadlines
+from utils.json_provider import FastJSONProvider
 from monitoring.health_routes import health_bp
 
 # Configure logging
@@ -23,6 +30,8 @@ load_dotenv()
 start_time = time.time()
 db_initialized = False
 FRONTEND_PATH = os.getenv("FRONTEND_PATH", "/app/frontend")
+REQUEST_DEADLINES_ENABLED = os.getenv("REQUEST_DEADLINES_ENABLED", "True").lower() == "true"
+SATURATION_METRICS_ENABLED = os.getenv("SATURATION_METRICS_ENABLED", "True").lower() == "true"
 
 def login_required(f):
     @wraps(f)
@@ -34,21 +43,104 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def start_background_services(app):
+    """
+    Start the per-process background work: DB pool warm-up, health sampling,
+    catalog snapshot publishing and, when OUTBOX_WORKER_ENABLED is set,
+    outbox dispatch.
+    Called from create_app(), or from gunicorn's post_fork hook when preloading.
+    """
+    # Initialize Database in the background so liveness/health answer immediately;
+    # readiness stays false until the pool is warm
+    try:
+        from database.db_config import start_pool_warmup
+
+        run_migrations = None
+        if os.getenv("RUN_MIGRATIONS_ON_STARTUP", "False").lower() == "true":
+            # Applied before the pool warms up, one process at a time behind a MySQL lock
+            from database.migrate import run_migrations
+
+        def on_pool_ready():
+            global db_initialized
+            db_initialized = True
+            app.healthy = True
+            logger.info(f"✅ Database ready {time.time() - start_time:.2f}s after start")
+
+        logger.info("🔄 Warming up Database Connection Pool in the background...")
+        start_pool_warmup(before=run_migrations, on_ready=on_pool_ready)
+
+    except Exception as e:
+        logger.error(f"🚨 Failed to start database warm-up: {str(e)}")
+        app.healthy = False
+
+    # Background health sampling for readiness probes
+    try:
+        from monitoring.health_sampler import start_health_sampler
+        start_health_sampler()
+    except Exception as e:
+        logger.error(f"🚨 Failed to start health sampler: {str(e)}")
+
+    # Catalog snapshot publishing; one process per pod wins the publisher lock
+    try:
+        from utils.catalog_snapshot import start_catalog_publisher
+        start_catalog_publisher()
+    except Exception as e:
+        logger.error(f"🚨 Failed to start catalog snapshot publisher: {str(e)}")
+
+    # Per-worker saturation counters, shared with the other workers in the pod
+    if SATURATION_METRICS_ENABLED:
+        try:
+            from monitoring.saturation import start_saturation_publisher
+            start_saturation_publisher()
+        except Exception as e:
+            logger.error(f"🚨 Failed to start saturation publisher: {e}")
+
+    # Outbox dispatch; alternatively run `python -m utils.outbox` as its own deployment
+    if os.getenv("OUTBOX_WORKER_ENABLED", "False").lower() == "true":
+        try:
+            from utils.outbox import start_outbox_workers
+            start_outbox_workers()
+        except Exception as e:
+            logger.error(f"🚨 Failed to start outbox workers: {str(e)}")
+
 def create_app():
-    app = Flask(__name__, static_folder=FRONTEND_PATH, static_url_path="")
+    # No built-in static route: it would shadow serve_static_files and skip the manifest
+    app = Flask(__name__, static_folder=None)
+    # Decimal and datetime are serialized natively, with orjson when installed
+    app.json = FastJSONProvider(app)
     app.healthy = False  # Initialize health status
 
     try:
         # Apply middleware stack with global registry
-        app.wsgi_app = MonitoringMiddleware(
-            DispatcherMiddleware(app.wsgi_app, {
-                '/api/metrics': make_wsgi_app(REGISTRY)
-            })
-        )
+        wsgi_app = DispatcherMiddleware(app.wsgi_app, {
+            '/api/metrics': make_wsgi_app(REGISTRY)
+        })
+        if REQUEST_TIMING_ENABLED:
+            # Per-phase timers and Server-Timing for requests that reach Flask
+            wsgi_app = RequestTimingMiddleware(wsgi_app)
+        if REQUEST_DEADLINES_ENABLED:
+            # The budget starts before the session loads
+            wsgi_app = DeadlineMiddleware(wsgi_app)
+        if os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true":
+            # Token buckets and load shedding run before Flask and the session store
+            wsgi_app = RateLimitMiddleware(wsgi_app)
+            logger.info("✅ Rate limiting configured successfully")
+        app.wsgi_app = MonitoringMiddleware(wsgi_app)
         logger.info("✅ Monitoring middleware configured successfully")
     except Exception as e:
         logger.error(f"🚨 Error configuring monitoring middleware: {e}")
 
+    # Probes, CORS preflights and frontend files are answered before monitoring,
+    # Flask routing and the session store
+    app.assets = AssetManifest(FRONTEND_PATH)
+    if os.getenv("FAST_PATH_ENABLED", "True").lower() == "true":
+        app.wsgi_app = FastPathMiddleware(app.wsgi_app, app.assets)
+        logger.info("✅ Fast path configured successfully")
+
+    # Outermost, so in-flight counts every request that holds a worker thread
+    if SATURATION_METRICS_ENABLED:
+        app.wsgi_app = SaturationMiddleware(app.wsgi_app)
+
     # Session Configuration
     app.secret_key = os.getenv('SECRET_KEY', 'default_secret_key')
     session_file_dir = os.getenv('SESSION_FILE_DIR', '/tmp/flask_sessions')
@@ -66,14 +158,16 @@ def create_app():
         FRONTEND_PATH=FRONTEND_PATH
     )
     Session(app)
+    if REQUEST_TIMING_ENABLED:
+        init_request_timing(app)
 
     # Updated CORS configuration
     CORS(app, 
          resources={r"/api/*": {"origins": "*"}},
          supports_credentials=True,
-         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-         allow_headers=["Content-Type", "Authorization", "Accept"],
-         expose_headers=["Content-Type", "Authorization"])
+         methods=CORS_METHODS,
+         allow_headers=CORS_REQUEST_HEADERS,
+         expose_headers=["Content-Type", "Authorization", "Idempotent-Replayed", "Retry-After"])
 
     @app.before_request
     def log_request():
@@ -81,36 +175,20 @@ def create_app():
         if request.path != '/api/metrics':
             logger.info(f"🔍 Incoming request: {request.method} {request.path}")
 
-    # Initialize Database
-    try:
-        from database.db_config import check_db_connection, initialize_pool
-
-        logger.info("🔄 Initializing Database Connection Pool...")
-        if not initialize_pool():
-            logger.error("❌ Database connection pool initialization failed!")
-            app.healthy = False
-        else:
-            logger.info("✅ Database Connection Pool Initialized Successfully!")
-            app.healthy = True
-
-        if check_db_connection():
-            logger.info("✅ Database connection successful")
-            global db_initialized
-            db_initialized = True
-            app.healthy = True
-        else:
-            logger.warning("⚠️ Database connection failed!")
-            app.healthy = False
-
-    except Exception as e:
-        logger.error(f"🚨 Failed to check database connection: {str(e)}")
-        app.healthy = False
+    # Background services own threads and sockets, so with a preloading gunicorn
+    # master they are started per worker from the post_fork hook instead
+    if os.getenv("DEFER_BACKGROUND_SERVICES", "False").lower() != "true":
+        start_background_services(app)
 
     @app.after_request
     def after_request(response):
         """Record metrics after each request"""
         return record_request_metrics(response)
 
+    # Registered last so it runs first: metrics and CORS see the 503/504
+    if REQUEST_DEADLINES_ENABLED:
+        init_request_deadlines(app)
+
     # Register Blueprints
     try:
         # Register health blueprint first
@@ -121,34 +199,36 @@ def create_app():
         from routes.product_routes import product_bp
         from routes.cart_routes import cart_bp
         from routes.order_routes import order_bp
+        from routes.bootstrap_routes import bootstrap_bp
 
         app.register_blueprint(auth_bp, url_prefix="/api/auth")
         app.register_blueprint(product_bp, url_prefix="/api")
         app.register_blueprint(cart_bp, url_prefix="/api")
         app.register_blueprint(order_bp, url_prefix="/api")
+        app.register_blueprint(bootstrap_bp, url_prefix="/api")
         logger.info("✅ All blueprints registered successfully!")
 
     except Exception as e:
         logger.error(f"🚨 Error registering blueprints: {e}")
         app.healthy = False
 
+    # Frontend files come from the startup asset manifest; these routes only run
+    # when the fast path is disabled
     @app.route("/")
     def serve_index():
-        logger.info(f"📢 Serving index.html from {FRONTEND_PATH}")
-        if os.path.exists(os.path.join(FRONTEND_PATH, "index.html")):
-            return send_from_directory(FRONTEND_PATH, "index.html")
-        else:
-            logger.error("❌ index.html not found in FRONTEND_PATH")
-            return jsonify({"message": "Frontend not found"}), 500
+        asset = app.assets.get("/index.html")
+        if asset:
+            return asset
+        logger.error("❌ index.html not found in FRONTEND_PATH")
+        return jsonify({"message": "Frontend not found"}), 500
 
     @app.route("/<path:filename>")
     def serve_static_files(filename):
-        full_path = os.path.join(FRONTEND_PATH, filename)
-        if os.path.exists(full_path):
-            return send_from_directory(FRONTEND_PATH, filename)
-        else:
-            logger.warning(f"⚠️ Requested file {filename} not found in {FRONTEND_PATH}")
-            return jsonify({"message": "Resource not found"}), 404
+        asset = app.assets.get(f"/{filename}")
+        if asset:
+            return asset
+        logger.warning(f"⚠️ Requested file {filename} not found in {FRONTEND_PATH}")
+        return jsonify({"message": "Resource not found"}), 404
 
     @app.errorhandler(404)
     def not_found(error):
@@ -0,0 +1,5 @@
+# backend/benchmarks/__init__.py
+
+# Benchmark and load-test tooling, run against a configured database:
+#   python -m benchmarks.datagen --scale small     # synthetic dataset
+#   python -m benchmarks.loadtest --target flask   # end-to-end load test
@@ -0,0 +1,157 @@
+"""
+Per-pod catalog memory and cold-start latency: private copies vs the shared snapshot.
+
+Publishes a snapshot of the local MySQL catalog into a scratch directory,
+then for each mode forks --workers processes that load the catalog the way
+a fresh worker would and stay alive together while their memory is read:
+  - copy:     query every product and keep a private dict per worker
+  - snapshot: map the published snapshot (utils/catalog_snapshot.py)
+Cold start is the time until the first product lookup can be answered;
+full read is the time to materialize every row once. Per-pod memory is the
+workers' summed PSS (shared snapshot pages are split between them):
+    python -m benchmarks.datagen --scale large
+    python -m benchmarks.catalog_snapshot --workers 4
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+import mysql.connector
+import psutil
+
+from database.db_config import DB_CONFIG
+from database import queries
+from utils.catalog_snapshot import SnapshotPublisher, SnapshotReader
+
+MB = 1024 * 1024
+
+
+def load_copy():
+    """Return (catalog dict, lookup) the way a worker-private cache would build it."""
+    connection = mysql.connector.connect(**DB_CONFIG)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(queries.PRODUCT_SNAPSHOT)
+        catalog = {
+            product_id: (name, Decimal(price), stock, description)
+            for product_id, name, price, stock, description, _ in cursor
+        }
+    finally:
+        connection.close()
+    return catalog, lambda product_id: catalog.get(product_id)
+
+
+def load_snapshot(directory):
+    snapshot = SnapshotReader(directory, enabled=True).current()
+    if snapshot is None:
+        raise SystemExit(f"No snapshot published in {directory}")
+
+    def lookup(product_id):
+        index = snapshot.find(product_id)
+        return snapshot.row(index) if index is not None else None
+    return snapshot, lookup
+
+
+def worker(mode, directory, probe_id, report, release):
+    """Child process: load, time, report memory, then wait to be released."""
+    start = time.perf_counter()
+    if mode == "copy":
+        catalog, lookup = load_copy()
+        rows = lambda: list(catalog.items())
+    else:
+        catalog, lookup = load_snapshot(directory)
+        rows = lambda: list(catalog.rows())
+    lookup(probe_id)
+    cold_start = time.perf_counter() - start
+
+    start = time.perf_counter()
+    count = len(rows())
+    full_read = time.perf_counter() - start
+
+    info = psutil.Process().memory_full_info()
+    os.write(report, (json.dumps({
+        "cold_start": cold_start, "full_read": full_read, "count": count,
+        "rss": info.rss, "uss": info.uss, "pss": getattr(info, "pss", 0),
+    }) + "\n").encode())
+    os.read(release, 1)
+
+
+def run_mode(mode, workers, directory, probe_id):
+    report_read, report_write = os.pipe()
+    release_read, release_write = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                worker(mode, directory, probe_id, report_write, release_read)
+            except BaseException as e:
+                print(f"{mode} worker failed: {e}", file=sys.stderr)
+                code = 1
+            os._exit(code)
+        pids.append(pid)
+
+    results = []
+    with os.fdopen(report_read) as reports:
+        os.close(report_write)
+        for line in reports:
+            results.append(json.loads(line))
+            if len(results) == workers:
+                break
+    os.write(release_write, b"x" * workers)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    os.close(release_write)
+    os.close(release_read)
+    if len(results) != workers:
+        raise SystemExit(f"Only {len(results)} of {workers} {mode} workers reported")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog snapshot memory and cold-start benchmark")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes per pod")
+    parser.add_argument("--dir", default=None, help="Snapshot directory (default: a scratch dir in /dev/shm)")
+    args = parser.parse_args()
+
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    directory = args.dir or tempfile.mkdtemp(prefix="catalog-bench-", dir=base)
+    try:
+        reader = SnapshotReader(directory, enabled=True)
+        publisher = SnapshotPublisher(reader)
+        start = time.perf_counter()
+        publisher.publish()
+        publish_seconds = time.perf_counter() - start
+        publisher._close()
+        snapshot = reader.current()
+        probe_id = snapshot.ids[snapshot.count // 2] if snapshot.count else 1
+        print(f"Published {snapshot.count} products, snapshot {snapshot.size / MB:.1f} MB "
+              f"in {publish_seconds:.2f}s")
+
+        print(f"{'mode':9} {'cold start ms':>13} {'full read ms':>12} {'RSS/worker MB':>13} "
+              f"{'USS/worker MB':>13} {'pod PSS MB':>10}")
+        for mode in ("copy", "snapshot"):
+            results = run_mode(mode, args.workers, directory, probe_id)
+            cold = sorted(r["cold_start"] for r in results)[len(results) // 2]
+            full = sorted(r["full_read"] for r in results)[len(results) // 2]
+            rss = sum(r["rss"] for r in results) / len(results)
+            uss = sum(r["uss"] for r in results) / len(results)
+            pss = sum(r["pss"] for r in results)
+            print(f"{mode:9} {cold * 1000:13.1f} {full * 1000:12.1f} {rss / MB:13.1f} "
+                  f"{uss / MB:13.1f} {pss / MB:10.1f}")
+        print("Snapshot pod memory is the summed PSS; the file itself lives once in "
+              f"{directory} ({snapshot.size / MB:.1f} MB).")
+    finally:
+        if not args.dir:
+            shutil.rmtree(directory, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Synthetic data generator for plan checks and benchmarks.
+
+Tops tables up to the requested sizes with batched multi-row INSERTs. Rows
+are generated lazily, so large datasets never sit in memory at once:
+    python -m benchmarks.datagen --scale large
+    python -m benchmarks.datagen --products 100000 --users 20000 --orders 200000
+"""
+import argparse
+import itertools
+import logging
+import random
+import time
+
+import bcrypt
+
+from database.db_config import get_db_connection, close_db_connection
+
+logger = logging.getLogger(__name__)
+
+INSERT_BATCH_SIZE = 5000
+
+# Generated users log in as bench_user_<id> with this password
+BENCH_PASSWORD = "benchmark"
+
+DEFAULT_SIZES = {
+    "products": 100000,
+    "users": 20000,
+    "orders": 200000,
+    "items_per_order": 3,
+    "cart_items_per_user": 3,
+}
+
+# Named dataset sizes; "large" gives ~10M order items
+SCALES = {
+    "small": {"products": 10000, "users": 2000, "orders": 20000},
+    "medium": {"products": 100000, "users": 20000, "orders": 200000},
+    "large": {"products": 1000000, "users": 500000, "orders": 3400000},
+}
+
+
+def _count(cursor, table):
+    cursor.execute(f"SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {table}")
+    return cursor.fetchone()
+
+
+def _id_range(cursor, table):
+    cursor.execute(f"SELECT MIN(id), MAX(id) FROM {table}")
+    return cursor.fetchone()
+
+
+def _insert_rows(connection, cursor, sql, rows):
+    """Insert rows from an iterable in batches. Returns the number of rows inserted."""
+    total = 0
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, INSERT_BATCH_SIZE))
+        if not batch:
+            return total
+        cursor.executemany(sql, batch)
+        connection.commit()
+        total += len(batch)
+
+
+def _seed_orders(connection, cursor, rng, count, items_per_order, user_range, product_range):
+    """Insert orders in batches, each followed by its order items."""
+    statuses = ("pending", "processing", "shipped", "completed", "cancelled")
+    orders_inserted = items_inserted = 0
+    while orders_inserted < count:
+        batch_size = min(INSERT_BATCH_SIZE, count - orders_inserted)
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM orders")
+        max_order = cursor.fetchone()[0]
+        cursor.executemany(
+            "INSERT INTO orders (user_id, total_amount, status) VALUES (%s, %s, %s)",
+            [(rng.randint(*user_range), round(rng.uniform(1, 5000), 2), rng.choice(statuses))
+             for _ in range(batch_size)]
+        )
+        cursor.execute("SELECT id FROM orders WHERE id > %s ORDER BY id", (max_order,))
+        order_ids = [row[0] for row in cursor.fetchall()]
+        cursor.executemany(
+            """INSERT INTO order_items (order_id, product_id, quantity, price_at_time)
+               VALUES (%s, %s, %s, %s)""",
+            [(order_id, rng.randint(*product_range), rng.randint(1, 3), round(rng.uniform(1, 2000), 2))
+             for order_id in order_ids
+             for _ in range(items_per_order)]
+        )
+        connection.commit()
+        orders_inserted += batch_size
+        items_inserted += len(order_ids) * items_per_order
+    return orders_inserted, items_inserted
+
+
+def seed_dataset(products=DEFAULT_SIZES["products"], users=DEFAULT_SIZES["users"],
+                 orders=DEFAULT_SIZES["orders"], items_per_order=DEFAULT_SIZES["items_per_order"],
+                 cart_items_per_user=DEFAULT_SIZES["cart_items_per_user"], seed=42):
+    """
+    Top the tables up to the requested sizes. Existing rows are kept.
+    Returns:
+        dict: Rows inserted per table.
+    """
+    rng = random.Random(seed)
+    inserted = {}
+    started = time.perf_counter()
+    connection = get_db_connection()
+    if not connection:
+        raise Exception("Database connection failed")
+    try:
+        cursor = connection.cursor()
+
+        count, max_id = _count(cursor, "products")
+        inserted["products"] = _insert_rows(
+            connection, cursor,
+            "INSERT INTO products (name, price, description, stock) VALUES (%s, %s, %s, %s)",
+            ((f"Product {n}", round(rng.uniform(1, 2000), 2), f"Synthetic product {n}", rng.randint(0, 500))
+             for n in range(max_id + 1, max_id + 1 + max(0, products - count)))
+        )
+
+        count, max_id = _count(cursor, "users")
+        password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        inserted["users"] = _insert_rows(
+            connection, cursor,
+            "INSERT INTO users (username, password, is_admin) VALUES (%s, %s, %s)",
+            ((f"bench_user_{n}", password_hash, False)
+             for n in range(max_id + 1, max_id + 1 + max(0, users - count)))
+        )
+
+        user_range = _id_range(cursor, "users")
+        product_range = _id_range(cursor, "products")
+
+        count, _ = _count(cursor, "orders")
+        inserted["orders"], inserted["order_items"] = _seed_orders(
+            connection, cursor, rng, max(0, orders - count), items_per_order, user_range, product_range
+        )
+
+        count, _ = _count(cursor, "cart_items")
+        inserted["cart_items"] = _insert_rows(
+            connection, cursor,
+            """INSERT IGNORE INTO cart_items (user_id, product_id, quantity)
+               VALUES (%s, %s, %s)""",
+            ((rng.randint(*user_range), rng.randint(*product_range), rng.randint(1, 3))
+             for _ in range(max(0, users * cart_items_per_user - count)))
+        )
+
+        cursor.execute("ANALYZE TABLE products, users, orders, order_items, cart_items")
+        cursor.fetchall()
+        logger.info(f"Seeded dataset in {time.perf_counter() - started:.1f}s: {inserted}")
+        return inserted
+    finally:
+        close_db_connection(connection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a synthetic dataset")
+    parser.add_argument("--scale", choices=sorted(SCALES), help="Named dataset size")
+    for name, default in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=None,
+                            help=f"default: {default}")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    sizes = dict(DEFAULT_SIZES, **SCALES.get(args.scale, {}))
+    for name in DEFAULT_SIZES:
+        if getattr(args, name) is not None:
+            sizes[name] = getattr(args, name)
+    print(seed_dataset(seed=args.seed, **sizes))
+
+
+if __name__ == "__main__":
+    main()
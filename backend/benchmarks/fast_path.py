@@ -0,0 +1,65 @@
+"""
+Microbenchmark: per-request overhead with and without the WSGI fast path.
+
+Calls the app's WSGI stack directly (no network) for each request class:
+    python -m benchmarks.fast_path --iterations 5000
+"""
+import argparse
+import logging
+import os
+import time
+
+from werkzeug.test import EnvironBuilder
+
+REQUEST_CLASSES = {
+    "liveness": dict(path="/api/health/live", method="GET"),
+    "preflight": dict(path="/api/cart", method="OPTIONS", headers={
+        "Origin": "http://localhost:5000",
+        "Access-Control-Request-Method": "POST",
+        "Access-Control-Request-Headers": "Content-Type",
+    }),
+    "static": dict(path="/styles.css", method="GET"),
+    # Not on the fast path: shows the cost it adds to everything else
+    "passthrough": dict(path="/api/does-not-exist", method="GET"),
+}
+
+
+def build_app(fast_path):
+    os.environ["FAST_PATH_ENABLED"] = "true" if fast_path else "false"
+    from app import create_app
+    return create_app()
+
+
+def time_requests(app, request, iterations):
+    """Return mean microseconds per request through app.wsgi_app."""
+    def start_response(status, headers, exc_info=None):
+        return None
+
+    environs = [EnvironBuilder(**request).get_environ() for _ in range(iterations)]
+    start = time.perf_counter()
+    for environ in environs:
+        result = app.wsgi_app(environ, start_response)
+        for _ in result:
+            pass
+        if hasattr(result, "close"):
+            result.close()
+    return (time.perf_counter() - start) * 1e6 / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    apps = {"flask": build_app(False), "fast path": build_app(True)}
+    logging.disable(logging.CRITICAL)
+
+    print(f"{'request':12} {'flask us':>10} {'fast path us':>13} {'speedup':>8}")
+    for name, request in REQUEST_CLASSES.items():
+        slow = time_requests(apps["flask"], request, args.iterations)
+        fast = time_requests(apps["fast path"], request, args.iterations)
+        print(f"{name:12} {slow:10.1f} {fast:13.1f} {slow / fast:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
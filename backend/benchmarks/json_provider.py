@@ -0,0 +1,136 @@
+"""
+JSON encoding cost of the catalog, order history and cart responses.
+
+Builds payloads shaped like what the routes hand to jsonify (Decimal prices,
+datetime timestamps; no database needed) and times, per payload:
+  - convert:  the old route code, float()/isoformat() per field, then
+              Flask's DefaultJSONProvider
+  - stdlib:   FastJSONProvider with its stdlib fallback (fast = False)
+  - orjson:   FastJSONProvider with orjson (skipped when it is not installed)
+and checks that every path produces the same document:
+    python -m benchmarks.json_provider --products 10000
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from utils.json_provider import FastJSONProvider, orjson
+
+MB = 1024 * 1024
+
+
+def catalog_payload(count, rng):
+    return [{"product_id": index,
+             "name": f"Product {index} {rng.choice(['Lamp', 'Desk', 'Chair', 'Mug'])}",
+             "price": Decimal(rng.randint(100, 99999)).scaleb(-2)}
+            for index in range(1, count + 1)]
+
+
+def order_payload(count, rng):
+    now = datetime(2024, 6, 1, 12, 0, 0)
+    orders = []
+    for order_id in range(1, count + 1):
+        items = [{"product_id": rng.randint(1, 5000), "product_name": f"Product {order_id}",
+                  "quantity": rng.randint(1, 4),
+                  "price_at_time": Decimal(rng.randint(100, 9999)).scaleb(-2)}
+                 for _ in range(rng.randint(1, 7))]
+        orders.append({"id": order_id,
+                       "total_amount": sum(i["quantity"] * i["price_at_time"] for i in items),
+                       "status": rng.choice(["pending", "processing", "shipped", "completed"]),
+                       "created_at": now - timedelta(hours=order_id),
+                       "items": items})
+    return orders
+
+
+def cart_payload(count, rng):
+    items = []
+    for index in range(1, count + 1):
+        price = Decimal(rng.randint(100, 9999)).scaleb(-2)
+        quantity = rng.randint(1, 5)
+        items.append({"product_id": index, "name": f"Product {index}", "price": price,
+                      "quantity": quantity, "total_price": quantity * price})
+    return {"message": "Cart items retrieved successfully", "cart_version": 7,
+            "cart_items": items}
+
+
+def convert(value):
+    """What the routes did by hand before the provider handled Decimal and datetime."""
+    if isinstance(value, dict):
+        return {key: convert(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [convert(item) for item in value]
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def measure(encode, payload, repeat):
+    """Return (median seconds, encoded body)."""
+    body = encode(payload)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode(payload)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON provider benchmark")
+    parser.add_argument("--products", type=int, default=10000, help="Catalog size")
+    parser.add_argument("--orders", type=int, default=2000, help="Orders in the history payload")
+    parser.add_argument("--cart-items", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    legacy = DefaultJSONProvider(app)
+    stdlib = FastJSONProvider(app)
+    stdlib.fast = False
+    paths = [
+        ("convert", lambda payload: legacy.response(convert(payload)).get_data()),
+        ("stdlib", lambda payload: stdlib.response(payload).get_data()),
+    ]
+    if orjson is not None:
+        fast = FastJSONProvider(app)
+        paths.append(("orjson", lambda payload: fast.response(payload).get_data()))
+    else:
+        print("orjson is not installed; measuring the stdlib paths only")
+
+    rng = random.Random(args.seed)
+    payloads = [
+        ("catalog", catalog_payload(args.products, rng)),
+        ("order history", order_payload(args.orders, rng)),
+        ("cart", cart_payload(args.cart_items, rng)),
+    ]
+    failed = False
+    print(f"{'payload':14} {'path':8} {'median ms':>9} {'MB/s':>8} {'bytes':>9}")
+    with app.app_context():
+        for name, payload in payloads:
+            bodies = {}
+            for label, encode in paths:
+                seconds, body = measure(encode, payload, args.repeat)
+                bodies[label] = body
+                print(f"{name:14} {label:8} {seconds * 1000:9.2f} "
+                      f"{len(body) / MB / seconds:8.1f} {len(body):9d}")
+            # Compare parsed documents: orjson and repr() may format the same float differently
+            documents = {label: json.loads(body) for label, body in bodies.items()}
+            if any(document != documents["convert"] for document in documents.values()):
+                print(f"{name}: provider output differs from the converted payload")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
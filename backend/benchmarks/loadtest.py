@@ -0,0 +1,328 @@
+"""
+End-to-end load test against the real WSGI app.
+
+Virtual users log in as generated bench users (see benchmarks/datagen.py)
+and run a weighted mix of scenarios, either in-process through the Flask
+test client or over HTTP against a local gunicorn:
+
+    python -m benchmarks.datagen --scale small
+    python -m benchmarks.loadtest --target flask --users 8 --duration 30 --save baseline.json
+    python -m benchmarks.loadtest --target gunicorn --users 16 --compare baseline.json
+
+Reports throughput and p50/p95/p99 latency per endpoint, plus DB round trips
+per request (MySQL 'Questions' delta). --compare exits 1 on regressions.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import mysql.connector
+from werkzeug.test import Client
+
+from database.db_config import DB_CONFIG
+from benchmarks.datagen import BENCH_PASSWORD
+
+# Every virtual user comes from one address; the per-IP rate limits would
+# measure the limiter instead of the app (also inherited by --target gunicorn)
+os.environ.setdefault("RATE_LIMIT_ENABLED", "False")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = "browse=35,product_detail=30,add_to_cart=15,checkout=5,order_history=15"
+
+
+class FlaskClient:
+    """In-process client: one test client (and cookie jar) per virtual user."""
+
+    def __init__(self, app):
+        # werkzeug's Client rather than app.test_client(): Flask 2.3's test
+        # client reads werkzeug.__version__, which Werkzeug 3.x no longer has
+        self.client = Client(app)
+
+    def request(self, method, path, json_body=None):
+        response = self.client.open(path, method=method, json=json_body)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpClient:
+    """HTTP client against a running server: one requests.Session per virtual user."""
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+
+    def request(self, method, path, json_body=None):
+        response = self.session.request(method, self.base_url + path, json=json_body, timeout=30)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+
+class VirtualUser:
+    """Runs scenarios and records (endpoint, seconds, status) samples."""
+
+    def __init__(self, client, product_range, rng):
+        self.client = client
+        self.product_range = product_range
+        self.rng = rng
+        self.samples = []
+
+    def call(self, endpoint, method, path, json_body=None):
+        start = time.perf_counter()
+        status, body = self.client.request(method, path, json_body)
+        self.samples.append((endpoint, time.perf_counter() - start, status))
+        return status, body
+
+    def random_product(self):
+        return self.rng.randint(*self.product_range)
+
+    # Scenarios
+    def browse(self):
+        self.call("GET /api/products", "GET", "/api/products")
+
+    def product_detail(self):
+        self.call("GET /api/products/<id>", "GET", f"/api/products/{self.random_product()}")
+
+    def add_to_cart(self):
+        self.call("POST /api/cart", "POST", "/api/cart",
+                  {"product_id": self.random_product(), "quantity": 1})
+
+    def checkout(self):
+        self.add_to_cart()
+        status, body = self.call("GET /api/cart", "GET", "/api/cart")
+        items = (body or {}).get("cart_items") or []
+        if status == 200 and items:
+            self.call("POST /api/orders", "POST", "/api/orders", {
+                "items": [{"product_id": i["product_id"], "quantity": i["quantity"]} for i in items]
+            })
+
+    def order_history(self):
+        self.call("GET /api/orders", "GET", "/api/orders")
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, weight = part.split("=")
+        if not hasattr(VirtualUser, name.strip()):
+            raise ValueError(f"Unknown scenario: {name}")
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def db_questions():
+    """Return the server's 'Questions' counter (statements executed)."""
+    connection = mysql.connector.connect(**DB_CONFIG)
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        return int(cursor.fetchone()[1])
+    finally:
+        connection.close()
+
+
+def bench_setup(user_count):
+    """Fetch bench usernames and the product id range."""
+    connection = mysql.connector.connect(**DB_CONFIG)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(
+            "SELECT username FROM users WHERE username LIKE 'bench\\_user\\_%%' ORDER BY id LIMIT %s",
+            (user_count,)
+        )
+        usernames = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT MIN(id), MAX(id) FROM products")
+        product_range = cursor.fetchone()
+    finally:
+        connection.close()
+    if len(usernames) < user_count:
+        raise SystemExit(f"Only {len(usernames)} bench users found; run benchmarks.datagen first")
+    return usernames, product_range
+
+
+def start_gunicorn(port, workers, threads):
+    """Start a local gunicorn serving wsgi:app and wait until it is live."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}",
+         "--workers", str(workers), "--threads", str(threads), "--worker-class", "gthread",
+         "--log-level", "warning", "wsgi:app"],
+        cwd=BACKEND_DIR
+    )
+    import requests
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/api/health/live", timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise SystemExit("gunicorn did not become live within 60s")
+
+
+def run_load(make_client, usernames, product_range, weights, duration, seed):
+    """Drive virtual users for `duration` seconds and return all samples."""
+    names = list(weights)
+    stop_at = time.perf_counter() + duration
+    users = []
+
+    def worker(index, username):
+        rng = random.Random(seed + index)
+        user = VirtualUser(make_client(), product_range, rng)
+        status, _ = user.client.request("POST", "/api/auth/login",
+                                        {"username": username, "password": BENCH_PASSWORD})
+        if status != 200:
+            logging.warning(f"Login failed for {username} ({status})")
+            return
+        users.append(user)
+        while time.perf_counter() < stop_at:
+            getattr(user, rng.choices(names, weights=[weights[n] for n in names])[0])()
+
+    threads = [threading.Thread(target=worker, args=(i, name)) for i, name in enumerate(usernames)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [sample for user in users for sample in user.samples]
+
+
+def summarize(samples, duration, round_trips):
+    by_endpoint = {}
+    for endpoint, seconds, status in samples:
+        by_endpoint.setdefault(endpoint, []).append((seconds, status))
+
+    endpoints = {}
+    for endpoint, values in sorted(by_endpoint.items()):
+        latencies = sorted(seconds for seconds, _ in values)
+        endpoints[endpoint] = {
+            "requests": len(values),
+            "errors": sum(1 for _, status in values if status >= 500),
+            "throughput_rps": round(len(values) / duration, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        }
+    return {
+        "overall": {
+            "requests": len(samples),
+            "throughput_rps": round(len(samples) / duration, 2),
+            "db_round_trips_per_request": round(round_trips / max(1, len(samples)), 2),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Return human-readable regressions of current vs baseline."""
+    regressions = []
+    for endpoint, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(endpoint)
+        if not before:
+            continue
+        if before["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{endpoint}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+        if before["throughput_rps"] and now["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{endpoint}: throughput {before['throughput_rps']} -> {now['throughput_rps']} rps"
+            )
+    before_trips = baseline.get("overall", {}).get("db_round_trips_per_request")
+    now_trips = current["overall"]["db_round_trips_per_request"]
+    if before_trips and now_trips > before_trips * (1 + threshold):
+        regressions.append(f"DB round trips per request {before_trips} -> {now_trips}")
+    return regressions
+
+
+def print_report(result):
+    overall = result["overall"]
+    print(f"{overall['requests']} requests, {overall['throughput_rps']} req/s, "
+          f"{overall['db_round_trips_per_request']} DB round trips/request")
+    print(f"{'endpoint':28} {'reqs':>7} {'err':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, stats in result["endpoints"].items():
+        print(f"{endpoint:28} {stats['requests']:7d} {stats['errors']:5d} {stats['throughput_rps']:9.2f} "
+              f"{stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} {stats['p99_ms']:9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test")
+    parser.add_argument("--target", choices=["flask", "gunicorn", "url"], default="flask")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Base URL for --target url")
+    parser.add_argument("--port", type=int, default=5055, help="Port for --target gunicorn")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=2, help="gunicorn threads per worker")
+    parser.add_argument("--users", type=int, default=8, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Scenario weights")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    weights = parse_mix(args.mix)
+    usernames, product_range = bench_setup(args.users)
+
+    server = None
+    if args.target == "flask":
+        from app import create_app
+        app = create_app()
+        make_client = lambda: FlaskClient(app)
+    elif args.target == "gunicorn":
+        server = start_gunicorn(args.port, args.workers, args.threads)
+        make_client = lambda: HttpClient(f"http://127.0.0.1:{args.port}")
+    else:
+        make_client = lambda: HttpClient(args.url)
+
+    try:
+        questions_before = db_questions()
+        started = time.perf_counter()
+        samples = run_load(make_client, usernames, product_range, weights, args.duration, args.seed)
+        elapsed = time.perf_counter() - started
+        # Exclude the counter query itself
+        round_trips = db_questions() - questions_before - 1
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    result = summarize(samples, elapsed, round_trips)
+    result["meta"] = {
+        "target": args.target, "users": args.users, "duration": args.duration,
+        "mix": weights, "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    print_report(result)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
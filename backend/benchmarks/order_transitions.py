@@ -0,0 +1,81 @@
+"""
+Benchmark: bulk order status transitions.
+
+Seeds pending orders for an existing user, moves them to 'processing'
+with Order.bulk_transition and removes them again:
+    python -m benchmarks.order_transitions --orders 100000 --user-id 2
+"""
+import argparse
+import logging
+import time
+
+from database.db_config import get_db_connection, close_db_connection
+from models.order import Order
+
+INSERT_BATCH_SIZE = 5000
+
+
+def seed_orders(user_id, count):
+    """Insert `count` pending orders and return their IDs."""
+    connection = get_db_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM orders")
+        first_id = cursor.fetchone()[0] + 1
+        for start in range(0, count, INSERT_BATCH_SIZE):
+            rows = [(user_id, 10.0, 'pending') for _ in range(min(INSERT_BATCH_SIZE, count - start))]
+            cursor.executemany(
+                "INSERT INTO orders (user_id, total_amount, status) VALUES (%s, %s, %s)",
+                rows
+            )
+        connection.commit()
+        cursor.execute(
+            "SELECT id FROM orders WHERE id >= %s AND user_id = %s AND status = 'pending'",
+            (first_id, user_id)
+        )
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        close_db_connection(connection)
+
+
+def delete_orders(order_ids):
+    """Remove the seeded orders."""
+    connection = get_db_connection()
+    try:
+        cursor = connection.cursor()
+        for start in range(0, len(order_ids), INSERT_BATCH_SIZE):
+            chunk = order_ids[start:start + INSERT_BATCH_SIZE]
+            cursor.execute(
+                f"DELETE FROM orders WHERE id IN ({', '.join(['%s'] * len(chunk))})",
+                tuple(chunk)
+            )
+            connection.commit()
+    finally:
+        close_db_connection(connection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=100000, help="Number of orders to seed")
+    parser.add_argument("--user-id", type=int, default=2, help="Existing user owning the orders")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Orders per transaction")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    order_ids = seed_orders(args.user_id, args.orders)
+    try:
+        start = time.perf_counter()
+        result = Order.bulk_transition(order_ids, 'processing', chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+    finally:
+        delete_orders(order_ids)
+
+    transitioned = sum(result["transitioned"].values())
+    print(f"{len(order_ids)} orders, chunk size {args.chunk_size}")
+    print(f"  transitioned: {transitioned} in {elapsed:.2f}s ({transitioned / elapsed:,.0f} orders/s)")
+    print(f"  rejected: {len(result['rejected'])}, not found: {len(result['not_found'])}, "
+          f"failed: {len(result['failed'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Page startup: API requests and time-to-render before and after /api/bootstrap.
+
+Replays each page's render-blocking startup calls serially, as the browser
+does, for a logged-in bench user (login and signup pages run logged out).
+Time-to-render is the measured server time plus one network round trip per
+request (--rtt-ms), since in-process calls have no network:
+    python -m benchmarks.page_bootstrap --target flask --iterations 200 --rtt-ms 40
+"""
+import argparse
+import logging
+import sys
+import time
+
+from benchmarks.datagen import BENCH_PASSWORD
+from benchmarks.loadtest import FlaskClient, HttpClient, bench_setup, percentile
+
+# (page, logged in, requests before, requests after)
+PAGES = [
+    ("index", True,
+     ["/api/auth/status", "/api/products"],
+     ["/api/bootstrap?include=auth", "/api/products"]),
+    ("catalog", True,
+     ["/api/auth/status", "/api/products", "/api/auth/status"],
+     ["/api/bootstrap?include=auth", "/api/products"]),
+    ("cart", True,
+     ["/api/auth/status", "/api/auth/status", "/api/cart"],
+     ["/api/bootstrap?include=auth", "/api/cart"]),
+    ("login", False,
+     ["/api/auth/status", "/api/auth/status"],
+     ["/api/bootstrap?include=auth"]),
+    ("signup", False,
+     ["/api/auth/status", "/api/auth/status"],
+     ["/api/bootstrap?include=auth"]),
+]
+
+
+def render_times(client, paths, iterations, rtt):
+    """Return sorted time-to-render samples in seconds for a request sequence."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for path in paths:
+            status, _ = client.request("GET", path)
+            # auth/status answers 401 when logged out, which pages render too
+            if status != 200 and not (status == 401 and path == "/api/auth/status"):
+                raise SystemExit(f"GET {path} returned {status}; not timing failed requests")
+        samples.append(time.perf_counter() - start + rtt * len(paths))
+    return sorted(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Page startup benchmark")
+    parser.add_argument("--target", choices=["flask", "url"], default="flask")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Base URL for --target url")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=40, help="Simulated network round trip per request")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    usernames, _ = bench_setup(1)
+    if args.target == "flask":
+        from app import create_app
+        app = create_app()
+        make_client = lambda: FlaskClient(app)
+    else:
+        make_client = lambda: HttpClient(args.url)
+
+    logged_in = make_client()
+    status, _ = logged_in.request("POST", "/api/auth/login",
+                                  {"username": usernames[0], "password": BENCH_PASSWORD})
+    if status != 200:
+        print(f"Login failed for {usernames[0]} ({status})")
+        return 1
+    logged_out = make_client()
+
+    rtt = args.rtt_ms / 1000
+    print(f"{'page':8} {'reqs before':>11} {'reqs after':>10} "
+          f"{'p50 before ms':>13} {'p50 after ms':>12} {'p95 before ms':>13} {'p95 after ms':>12}")
+    for page, needs_login, before, after in PAGES:
+        client = logged_in if needs_login else logged_out
+        slow = render_times(client, before, args.iterations, rtt)
+        fast = render_times(client, after, args.iterations, rtt)
+        print(f"{page:8} {len(before):11d} {len(after):10d} "
+              f"{percentile(slow, 50) * 1000:13.1f} {percentile(fast, 50) * 1000:12.1f} "
+              f"{percentile(slow, 95) * 1000:13.1f} {percentile(fast, 95) * 1000:12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
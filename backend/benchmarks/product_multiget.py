@@ -0,0 +1,52 @@
+"""
+Benchmark: N single product lookups vs one multi-get request.
+
+Runs against the real app and database configured in .env:
+    python -m benchmarks.product_multiget --ids 1,2,3,4,5 --rounds 50
+"""
+import argparse
+import logging
+import time
+
+from werkzeug.test import Client
+
+from app import create_app
+
+
+def time_rounds(rounds, func):
+    """Run func `rounds` times and return the mean duration in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) * 1000 / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ids", default="1,2,3,4,5", help="Comma-separated product IDs")
+    parser.add_argument("--rounds", type=int, default=50, help="Repetitions per variant")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    # Flask 2.3's test_client() does not work with Werkzeug 3.x
+    client = Client(create_app())
+    product_ids = [int(part) for part in args.ids.split(",")]
+
+    def single_calls():
+        for product_id in product_ids:
+            client.get(f"/api/products/{product_id}")
+
+    def multi_get():
+        client.get(f"/api/products?ids={args.ids}")
+
+    single_ms = time_rounds(args.rounds, single_calls)
+    multi_ms = time_rounds(args.rounds, multi_get)
+
+    print(f"{len(product_ids)} ids, {args.rounds} rounds")
+    print(f"  {len(product_ids)} single calls: {single_ms:8.2f} ms/round")
+    print(f"  1 multi-get call:  {multi_ms:8.2f} ms/round")
+    print(f"  speedup:           {single_ms / multi_ms:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Per-request cost of the phase timers (monitoring/request_timing.py).
+
+Runs a stand-in WSGI app shaped like a typical API request (session load,
+pool checkout, three queries with fetches, commit, JSON encoding, session
+save) against an in-memory cursor, so only the timing code is measured:
+  - off:    no middleware; the hooks find no timer and do nothing
+  - timed:  RequestTimingMiddleware with histograms, no header
+  - header: as timed, plus the Server-Timing header
+  - fixed:  the middleware around an app that hits no hook, compared with
+            that app alone: the cost every request pays whatever it does
+The difference from the baseline is the overhead each request pays:
+    python -m benchmarks.request_timing --requests 200000
+
+On the dev box (Python 3.11, where one perf_counter() pair alone costs
+~0.3us) timed adds ~10-13us: ~4us fixed (timer, thread-local, breakdown and
+histogram update) and ~0.5-0.7us for each of the stand-in's 13 hook calls.
+The header adds ~5us more, mostly float formatting, and is only sent to
+admin sessions by default. That misses the goal of a few microseconds per
+request; against the ~270us a minimal Flask route takes on the same box it
+is about 4%.
+"""
+import argparse
+import sys
+import time
+
+from monitoring.request_timing import (
+    RequestTimingMiddleware,
+    current_timer,
+    phase,
+    record_phase,
+    timed_connection,
+)
+
+
+class MemoryCursor:
+    def execute(self, operation, params=None):
+        self.rows = [(1, "Product 1", "9.99")]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class MemoryConnection:
+    def cursor(self, *args, **kwargs):
+        return MemoryCursor()
+
+    def commit(self):
+        pass
+
+
+def make_app(expose):
+    def app(environ, start_response):
+        with phase("session"):
+            pass
+        record_phase("pool", 0.0)
+        connection = timed_connection(MemoryConnection())
+        cursor = connection.cursor(dictionary=True)
+        for _ in range(3):
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        connection.commit()
+        with phase("json"):
+            body = b'{"ok":true}\n'
+        timer = current_timer()
+        if timer is not None:
+            timer.route = "/api/products/<int:product_id>"
+            timer.expose = expose
+        with phase("session"):
+            pass
+        start_response("200 OK", [("Content-Type", "application/json")])
+        return [body]
+    return app
+
+
+def bare_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "application/json")])
+    return [b'{"ok":true}\n']
+
+
+def start_response(status, headers, exc_info=None):
+    return None
+
+
+def run(app, requests, environ):
+    start = time.perf_counter()
+    for _ in range(requests):
+        app(environ, start_response)
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request phase timer overhead")
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    environ = {"PATH_INFO": "/api/products/1", "REQUEST_METHOD": "GET"}
+    # (mode, app, baseline mode); the fastest repeat is kept, as noise only adds time
+    modes = [
+        ("off", make_app(False), "off"),
+        ("timed", RequestTimingMiddleware(make_app(False)), "off"),
+        ("header", RequestTimingMiddleware(make_app(True)), "off"),
+        ("bare", bare_app, "bare"),
+        ("fixed", RequestTimingMiddleware(bare_app), "bare"),
+    ]
+    results = {}
+    for name, app, _ in modes:
+        run(app, 1000, environ)  # warm up histogram children and caches
+        results[name] = min(run(app, args.requests, environ) for _ in range(args.repeat))
+
+    print(f"{'mode':7} {'us/request':>10} {'overhead us':>11}")
+    for name, _, baseline in modes:
+        print(f"{name:7} {results[name] * 1e6:10.2f} {(results[name] - results[baseline]) * 1e6:11.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
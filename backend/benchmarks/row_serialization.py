@@ -0,0 +1,154 @@
+"""
+Allocation and latency of the product list and order history read paths.
+
+Compares, on synthetic rows shaped like the real queries (no database needed):
+  - before: dictionary-cursor rows -> model instance / per-row dict -> to_dict()
+    -> jsonify-style json.dumps
+  - after:  plain tuple rows -> RowEncoder (utils/serializer.py)
+and checks that both produce the same bytes. Peak memory comes from
+tracemalloc, latency is the median of --repeat runs:
+    python -m benchmarks.row_serialization --rows 10000
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from utils.serializer import order_history_json, product_list_json
+
+PRODUCT_COLUMNS = ("id", "name", "price")
+ORDER_COLUMNS = ("id", "total_amount", "status", "created_at",
+                 "product_id", "quantity", "price_at_time", "product_name")
+
+
+class LegacyProduct:
+    """The Product model before __slots__, as the old list path used it."""
+
+    def __init__(self, product_id, name, price):
+        self.product_id = product_id
+        self.name = name
+        self.price = price
+
+    def to_dict(self):
+        return {"product_id": self.product_id, "name": self.name, "price": self.price}
+
+
+def jsonify_dumps(obj):
+    """What the app's JSON provider (stdlib backend) writes outside debug mode."""
+    def default(value):
+        if isinstance(value, Decimal):
+            return float(value)
+        raise TypeError(type(value))
+    return (json.dumps(obj, default=default, ensure_ascii=False, sort_keys=True,
+                       separators=(",", ":")) + "\n").encode()
+
+
+def product_rows(count, rng):
+    return [(index, f"Product {index} {rng.choice(['Lamp', 'Desk', 'Chair', 'Mug'])}",
+             Decimal(rng.randint(100, 99999)).scaleb(-2)) for index in range(1, count + 1)]
+
+
+def order_rows(count, rng):
+    """count item rows, about four per order, newest order first."""
+    rows = []
+    order_id = 0
+    now = datetime(2024, 6, 1, 12, 0, 0)
+    while len(rows) < count:
+        order_id += 1
+        created_at = now - timedelta(hours=order_id)
+        status = rng.choice(["pending", "processing", "shipped", "completed"])
+        items = [(rng.randint(1, 5000), rng.randint(1, 4), Decimal(rng.randint(100, 9999)).scaleb(-2))
+                 for _ in range(min(rng.randint(1, 7), count - len(rows)))]
+        total = sum(quantity * price for _, quantity, price in items)
+        for product_id, quantity, price in items:
+            rows.append((order_id, total, status, created_at, product_id, quantity, price,
+                         f"Product {product_id}"))
+    return rows
+
+
+def products_before(rows):
+    dict_rows = [dict(zip(PRODUCT_COLUMNS, row)) for row in rows]  # dictionary cursor
+    products = [LegacyProduct(row['id'], row['name'], row['price']) for row in dict_rows]
+    return jsonify_dumps([product.to_dict() for product in products])
+
+
+def products_after(rows):
+    return product_list_json(rows)
+
+
+def orders_before(rows):
+    """The order history route before the serializer."""
+    orders_data = [dict(zip(ORDER_COLUMNS, row)) for row in rows]  # dictionary cursor
+    orders = {}
+    for row in orders_data:
+        order_id = row['id']
+        if order_id not in orders:
+            orders[order_id] = {
+                'id': order_id,
+                'total_amount': float(row['total_amount']),
+                'status': row['status'],
+                'created_at': row['created_at'].isoformat(),
+                'items': []
+            }
+        if row['product_id']:
+            orders[order_id]['items'].append({
+                'product_id': row['product_id'],
+                'product_name': row['product_name'],
+                'quantity': row['quantity'],
+                'price_at_time': float(row['price_at_time'])
+            })
+    return jsonify_dumps(list(orders.values()))
+
+
+def orders_after(rows):
+    return order_history_json(rows)
+
+
+def measure(func, rows, repeat):
+    """Return (median seconds, peak traced bytes, output)."""
+    output = func(rows)
+    tracemalloc.start()
+    func(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), peak, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Row serialization benchmark")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = [
+        ("product list", product_rows(args.rows, rng), products_before, products_after),
+        ("order history", order_rows(args.rows, rng), orders_before, orders_after),
+    ]
+    print(f"{'payload':14} {'path':7} {'median ms':>9} {'peak KB':>9} {'bytes':>9}")
+    failed = False
+    for name, rows, before, after in cases:
+        results = {}
+        for label, func in (("before", before), ("after", after)):
+            seconds, peak, output = measure(func, rows, args.repeat)
+            results[label] = output
+            print(f"{name:14} {label:7} {seconds * 1000:9.2f} {peak / 1024:9.1f} {len(output):9d}")
+        if results["before"] != results["after"]:
+            print(f"{name}: serializer output differs from jsonify")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
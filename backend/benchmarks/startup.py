@@ -0,0 +1,75 @@
+"""
+Startup benchmark: time from process start to first live and first ready probe.
+
+Starts gunicorn serving wsgi:app, polls /api/health/live and
+/api/health/ready, and stops the server once ready:
+    python -m benchmarks.startup --runs 5 --workers 4
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+from benchmarks.loadtest import BACKEND_DIR
+
+POLL_INTERVAL = 0.05
+
+
+def measure_startup(port, workers, timeout):
+    """Return (seconds to live, seconds to ready); None for a probe that never passed."""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}",
+         "--workers", str(workers), "--threads", "2", "--worker-class", "gthread",
+         "--log-level", "warning", "wsgi:app"],
+        cwd=BACKEND_DIR
+    )
+    live_at = ready_at = None
+    try:
+        while time.perf_counter() - started < timeout and ready_at is None:
+            try:
+                if live_at is None and requests.get(
+                        f"http://127.0.0.1:{port}/api/health/live", timeout=1).status_code == 200:
+                    live_at = time.perf_counter() - started
+                if live_at is not None and requests.get(
+                        f"http://127.0.0.1:{port}/api/health/ready", timeout=1).status_code == 200:
+                    ready_at = time.perf_counter() - started
+            except requests.RequestException:
+                pass
+            time.sleep(POLL_INTERVAL)
+    finally:
+        process.terminate()
+        process.wait()
+    return live_at, ready_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time-to-live and time-to-ready")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    live, ready = [], []
+    for run in range(1, args.runs + 1):
+        live_at, ready_at = measure_startup(args.port, args.workers, args.timeout)
+        print(f"run {run}: live {live_at if live_at is None else f'{live_at:.2f}s'}, "
+              f"ready {ready_at if ready_at is None else f'{ready_at:.2f}s'}")
+        if live_at is not None:
+            live.append(live_at)
+        if ready_at is not None:
+            ready.append(ready_at)
+
+    if live:
+        print(f"time-to-live:  median {statistics.median(live):.2f}s")
+    if ready:
+        print(f"time-to-ready: median {statistics.median(ready):.2f}s")
+    return 0 if len(ready) == args.runs else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Catalog page load: bytes on the wire and requests/second for the frontend files.
+
+Serves catalog.html and the stylesheet it references straight from the asset
+manifest (no network, no Flask) for three kinds of visit:
+  - identity:  first visit from a client that sends no Accept-Encoding
+  - gzip / br: first visit from a client that accepts compression
+  - repeat:    revisit with the ETags from the first visit (expects 304s)
+    python -m benchmarks.static_assets --iterations 2000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+from werkzeug.test import EnvironBuilder
+
+from app import FRONTEND_PATH
+from utils.assets import AssetManifest
+
+PAGE = "/catalog.html"
+
+
+def page_paths(manifest):
+    """The page plus every local asset URL it references."""
+    html = manifest.get(PAGE).body.decode()
+    refs = re.findall(r'(?:href|src)=["\'](/[^"\']+)["\']', html)
+    return [PAGE] + [ref for ref in refs if manifest.get(ref)]
+
+
+def load_page(manifest, paths, headers):
+    """Fetch every path once; return (bytes sent, statuses, etags)."""
+    sent, statuses, etags = 0, [], {}
+    for path in paths:
+        environ = EnvironBuilder(path=path, headers=headers.get(path, headers.get("*", {}))).get_environ()
+        captured = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            captured["status"] = status
+            captured["headers"] = dict(response_headers)
+
+        sent += sum(len(chunk) for chunk in manifest.get(path)(environ, start_response))
+        statuses.append(captured["status"].split()[0])
+        etags[path] = captured["headers"]["ETag"]
+    return sent, statuses, etags
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog page load benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--frontend", default=FRONTEND_PATH)
+    args = parser.parse_args()
+
+    manifest = AssetManifest(args.frontend)
+    if not manifest.get(PAGE):
+        print(f"{PAGE} not found under {os.path.abspath(args.frontend)}")
+        return 1
+    paths = page_paths(manifest)
+    print(f"page: {', '.join(paths)}")
+
+    # ETags differ per encoding, so take them from a visit with the repeat's Accept-Encoding
+    _, _, etags = load_page(manifest, paths, {"*": {"Accept-Encoding": "br, gzip"}})
+    visits = {
+        "identity": {},
+        "gzip": {"*": {"Accept-Encoding": "gzip"}},
+        "br": {"*": {"Accept-Encoding": "br, gzip"}},
+        "repeat": {path: {"Accept-Encoding": "br, gzip", "If-None-Match": etag}
+                   for path, etag in etags.items()},
+    }
+
+    print(f"{'visit':10} {'bytes':>8} {'statuses':>14} {'page loads/s':>13}")
+    for name, headers in visits.items():
+        sent, statuses, _ = load_page(manifest, paths, headers)
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            load_page(manifest, paths, headers)
+        rate = args.iterations / (time.perf_counter() - start)
+        print(f"{name:10} {sent:8} {','.join(statuses):>14} {rate:13.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Worker memory and spawn-latency benchmark, with and without preload_app.
+
+For each mode, starts gunicorn with gunicorn.conf.py, waits for all workers to
+initialize, reports RSS / USS / PSS per worker, then kills one worker and times
+how long its replacement takes to initialize:
+    python -m benchmarks.workers --workers 4
+"""
+import argparse
+import os
+import queue
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+
+from benchmarks.loadtest import BACKEND_DIR
+
+INITIALIZED = re.compile(r"Worker (\d+) initialized")
+
+
+def start_server(port, workers, preload):
+    env = dict(os.environ, GUNICORN_PRELOAD="true" if preload else "false")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py",
+         "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "info", "wsgi:app"],
+        cwd=BACKEND_DIR, env=env, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True
+    )
+    events = queue.Queue()
+
+    def read_log():
+        for line in process.stderr:
+            match = INITIALIZED.search(line)
+            if match:
+                events.put((int(match.group(1)), time.perf_counter()))
+
+    threading.Thread(target=read_log, daemon=True).start()
+    return process, events
+
+
+def wait_initialized(events, count, timeout=120):
+    """Wait for `count` worker-initialized log lines; return {pid: timestamp}."""
+    seen = {}
+    deadline = time.perf_counter() + timeout
+    while len(seen) < count:
+        pid, at = events.get(timeout=max(0.1, deadline - time.perf_counter()))
+        seen[pid] = at
+    return seen
+
+
+def worker_memory(pid):
+    info = psutil.Process(pid).memory_full_info()
+    return info.rss, info.uss, getattr(info, "pss", 0)
+
+
+def run_mode(port, workers, preload):
+    process, events = start_server(port, workers, preload)
+    try:
+        pids = list(wait_initialized(events, workers))
+        time.sleep(1)
+        memory = [worker_memory(pid) for pid in pids]
+
+        killed_at = time.perf_counter()
+        os.kill(pids[0], signal.SIGKILL)
+        _, ready_at = next(iter(wait_initialized(events, 1).items()))
+        spawn_latency = ready_at - killed_at
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+    return memory, spawn_latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare worker memory and spawn latency")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=5057)
+    args = parser.parse_args()
+
+    mb = 1024 * 1024
+    for preload in (False, True):
+        memory, spawn_latency = run_mode(args.port, args.workers, preload)
+        rss = sum(m[0] for m in memory) / len(memory) / mb
+        uss = sum(m[1] for m in memory) / len(memory) / mb
+        pss = sum(m[2] for m in memory) / len(memory) / mb
+        print(f"preload={'on ' if preload else 'off'}: per worker RSS {rss:6.1f} MB, "
+              f"USS {uss:6.1f} MB, PSS {pss:6.1f} MB; worker respawn {spawn_latency * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
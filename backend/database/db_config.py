@@ -1,8 +1,12 @@
 import mysql.connector
 from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
 from dotenv import load_dotenv
+from monitoring.request_timing import record_phase, timed_connection
+from database.deadlines import current_deadline, deadline_connection
 import os
 import logging
+import threading
 import time
 
 # Configure logging
@@ -15,10 +19,13 @@ load_dotenv()
 # Required environment variables
 REQUIRED_ENV_VARS = ["DB_HOST", "DB_USER", "DB_PASSWORD", "DB_NAME"]
 
-# Validate environment variables
-for var in REQUIRED_ENV_VARS:
-    if not os.getenv(var):
-        raise EnvironmentError(f"🚨 Environment variable '{var}' is not set! Please check your configuration.")
+def missing_env_vars():
+    """Return the required database environment variables that are not set."""
+    return [var for var in REQUIRED_ENV_VARS if not os.getenv(var)]
+
+# Validate environment variables (reported, not raised, so health probes still start)
+for var in missing_env_vars():
+    logger.error(f"🚨 Environment variable '{var}' is not set! Please check your configuration.")
 
 # Connection pool configuration
 POOL_CONFIG = {
@@ -41,6 +48,74 @@ connection_pool = None
 MAX_RETRIES = 5
 RETRY_DELAY = 2
 
+# Set once the pool exists with all its connections open
+_pool_ready = threading.Event()
+_warmup_thread = None
+WARMUP_MAX_DELAY = 30
+
+# Pool usage counters, read by the background health sampler
+_pool_stats_lock = threading.Lock()
+_pool_stats = {"in_use": 0, "checkouts": 0, "exhausted": 0, "last_exhausted_at": None,
+               "wait_avg": 0.0, "wait_updated_at": 0.0, "wait_total": 0.0,
+               "busy_seconds": 0.0, "busy_updated_at": time.monotonic()}
+
+# Smoothing for the pool wait average used by load shedding: each checkout
+# moves it POOL_WAIT_ALPHA of the way, and it halves every
+# POOL_WAIT_HALF_LIFE seconds without checkouts so shedding always recovers
+POOL_WAIT_ALPHA = 0.2
+POOL_WAIT_HALF_LIFE = float(os.getenv("POOL_WAIT_HALF_LIFE", 5))
+
+def _decayed_pool_wait(now):
+    elapsed = now - _pool_stats["wait_updated_at"]
+    return _pool_stats["wait_avg"] * 0.5 ** (max(elapsed, 0) / POOL_WAIT_HALF_LIFE)
+
+def _record_pool_wait(seconds):
+    """Fold one checkout's wait (including retry sleeps) into the smoothed average."""
+    now = time.monotonic()
+    with _pool_stats_lock:
+        average = _decayed_pool_wait(now)
+        _pool_stats["wait_avg"] = average + POOL_WAIT_ALPHA * (seconds - average)
+        _pool_stats["wait_updated_at"] = now
+        _pool_stats["wait_total"] += seconds
+
+def _busy_seconds(now):
+    """Connection-seconds checked out so far (integral of in_use); call with the stats lock held."""
+    return _pool_stats["busy_seconds"] + _pool_stats["in_use"] * (now - _pool_stats["busy_updated_at"])
+
+def _change_in_use(delta):
+    now = time.monotonic()
+    with _pool_stats_lock:
+        _pool_stats["busy_seconds"] = _busy_seconds(now)
+        _pool_stats["busy_updated_at"] = now
+        _pool_stats["in_use"] = max(0, _pool_stats["in_use"] + delta)
+        if delta > 0:
+            _pool_stats["checkouts"] += 1
+
+def get_pool_wait():
+    """
+    Recent average time spent waiting for a pool connection in this process.
+    Returns:
+        float: Seconds
+    """
+    now = time.monotonic()
+    with _pool_stats_lock:
+        return _decayed_pool_wait(now)
+
+def get_pool_stats():
+    """
+    Snapshot of pool usage for this process.
+    Returns:
+        dict: pool size, connections in use, total checkouts, exhaustion count,
+        the time of the last exhaustion (or None), total and recent average
+        wait, and connection-seconds checked out.
+    """
+    with _pool_stats_lock:
+        stats = dict(_pool_stats)
+        stats["busy_seconds"] = _busy_seconds(time.monotonic())
+    stats["size"] = POOL_CONFIG["pool_size"]
+    stats["wait_avg"] = get_pool_wait()
+    return stats
+
 def create_connection_pool():
     """
     Create a connection pool for MySQL database.
@@ -48,11 +123,17 @@ def create_connection_pool():
         pool (MySQLConnectionPool): A connection pool if successful, None otherwise.
     """
     global connection_pool
+    missing = missing_env_vars()
+    if missing:
+        logger.error(f"🚨 Cannot create connection pool, missing environment variables: {', '.join(missing)}")
+        return False
     try:
+        # The pool opens all pool_size connections up front, so a created pool is warm
         connection_pool = mysql.connector.pooling.MySQLConnectionPool(
             **DB_CONFIG,  # ✅ Fixed duplicate `connect_timeout`
             **POOL_CONFIG
         )
+        _pool_ready.set()
         logger.info(f"✅ Created MySQL connection pool for database '{DB_CONFIG['database']}'")
         return True
     except Error as e:
@@ -78,15 +159,81 @@ def initialize_pool():
     logger.error("🚨 Failed to initialize MySQL connection pool after all retries!")
     return False
 
+def reset_after_fork():
+    """
+    Drop pool state inherited from a preloading parent process.
+    The parent's sockets are left alone; the worker builds its own pool.
+    """
+    global connection_pool, _warmup_thread, _pool_stats_lock
+    connection_pool = None
+    _warmup_thread = None
+    _pool_ready.clear()
+    _pool_stats_lock = threading.Lock()
+    _pool_stats.update(in_use=0, checkouts=0, exhausted=0, last_exhausted_at=None,
+                       wait_avg=0.0, wait_updated_at=0.0, wait_total=0.0,
+                       busy_seconds=0.0, busy_updated_at=time.monotonic())
+
+def is_pool_ready():
+    """True once the connection pool has been created and warmed."""
+    return _pool_ready.is_set()
+
+def warm_up_pool(before=None, on_ready=None):
+    """
+    Create the connection pool, retrying with backoff until it succeeds.
+    Args:
+        before (callable): Optional step to run first (e.g. schema migrations).
+        on_ready (callable): Optional callback once the pool is warm.
+    """
+    attempt = 0
+    if before:
+        try:
+            before()
+        except Exception as e:
+            logger.error(f"🚨 Pre-warm-up step failed: {e}")
+
+    while not _pool_ready.is_set():
+        attempt += 1
+        logger.info(f"🔄 Warming up MySQL connection pool (attempt {attempt})...")
+        if connection_pool or create_connection_pool():
+            break
+        time.sleep(min(RETRY_DELAY * 2 ** min(attempt - 1, 4), WARMUP_MAX_DELAY))
+
+    logger.info(f"✅ Connection pool warm after {attempt} attempt(s)")
+    if on_ready:
+        on_ready()
+
+def start_pool_warmup(before=None, on_ready=None):
+    """
+    Warm up the pool on a background thread so startup never blocks on the database.
+    Returns:
+        threading.Thread: The warm-up thread.
+    """
+    global _warmup_thread
+    if _warmup_thread is None or not _warmup_thread.is_alive():
+        _warmup_thread = threading.Thread(
+            target=warm_up_pool, args=(before, on_ready), name="db-pool-warmup", daemon=True
+        )
+        _warmup_thread.start()
+    return _warmup_thread
+
 def get_db_connection():
     """
     Get a connection from the pool with retry mechanism.
+    Fails fast while a background warm-up is still in progress, and stops
+    retrying once the current request's deadline has passed.
     Returns:
         connection (MySQLConnection): A connection object if successful, None otherwise.
     """
     global connection_pool
     retries = 0
 
+    if not _pool_ready.is_set() and _warmup_thread is not None and _warmup_thread.is_alive():
+        logger.warning("⚠️ Connection pool is still warming up")
+        return None
+
+    wait_start = time.perf_counter()
+    deadline = current_deadline()
+
     while retries < MAX_RETRIES:
         try:
             if not connection_pool and not initialize_pool():
@@ -94,15 +241,34 @@ def get_db_connection():
 
             connection = connection_pool.get_connection()
             if connection.is_connected():
+                _change_in_use(1)
+                waited = time.perf_counter() - wait_start
+                _record_pool_wait(waited)
+                record_phase("pool", waited)
                 logger.debug("✅ Successfully retrieved a connection from the pool")
-                return connection
+                return timed_connection(deadline_connection(connection))
         except Error as e:
+            if isinstance(e, PoolError):
+                with _pool_stats_lock:
+                    _pool_stats["exhausted"] += 1
+                    _pool_stats["last_exhausted_at"] = time.time()
             retries += 1
             logger.warning(f"⚠️ Database connection attempt {retries}/{MAX_RETRIES} failed: {e}")
-            time.sleep(RETRY_DELAY)
+            if deadline is None:
+                time.sleep(RETRY_DELAY)
+            else:
+                remaining = deadline.remaining()
+                if remaining <= 0:
+                    deadline.fail("pool")
+                    logger.warning("⚠️ Request deadline passed while waiting for a connection")
+                    break
+                time.sleep(min(RETRY_DELAY, remaining))
             if not connection_pool:
                 initialize_pool()
 
+    waited = time.perf_counter() - wait_start
+    _record_pool_wait(waited)
+    record_phase("pool", waited)
     logger.error("🚨 Failed to get a database connection after all retries!")
     return None
 
@@ -118,6 +284,9 @@ def close_db_connection(connection):
             logger.debug("✅ Connection returned to the pool")
     except Error as e:
         logger.error(f"🚨 Error closing connection: {e}")
+    finally:
+        if connection:
+            _change_in_use(-1)
 
 def check_db_connection():
     """
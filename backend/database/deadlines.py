@@ -0,0 +1,143 @@
+"""
+Request deadlines in the database layer.
+
+A request's Deadline (set by utils/request_deadlines.py) lives in a
+thread-local. Connections checked out while one is active are wrapped so
+every statement gets what is left of the budget:
+  - plain SELECTs carry a MAX_EXECUTION_TIME(ms) optimizer hint, so MySQL
+    stops the query itself instead of leaving it running after the client
+    has given up
+  - writes and locking reads (FOR UPDATE / FOR SHARE) first lower the
+    session's innodb_lock_wait_timeout (whole seconds, at least 1)
+  - a SELECT issued after the deadline raises DeadlineExceeded without
+    reaching MySQL. Writes still run, because after the deadline they are
+    usually cleanup: rollbacks, idempotency key releases
+When MySQL reports a statement timeout or lock wait timeout, the deadline is
+marked failed so the request is answered with a 504. Session variables go
+back to the server defaults when the pool resets the connection.
+get_db_connection stops retrying the pool once the deadline has passed.
+"""
+import math
+import threading
+from time import monotonic
+
+from mysql.connector import Error, errorcode
+
+_local = threading.local()
+
+LOCKING_CLAUSES = ("FOR UPDATE", "FOR SHARE", "LOCK IN SHARE MODE")
+
+
+class DeadlineExceeded(Exception):
+    """Raised instead of running a query the request no longer has time for."""
+
+
+class Deadline:
+    """Time budget of one request."""
+    __slots__ = ("route_class", "budget", "started", "expires_at", "failure")
+
+    def __init__(self, route_class, budget):
+        self.route_class = route_class
+        self.budget = budget
+        self.started = monotonic()
+        self.expires_at = self.started + budget
+        self.failure = None  # pool, query or lock once the deadline has cut work short
+
+    def remaining(self):
+        return self.expires_at - monotonic()
+
+    def fail(self, stage):
+        if self.failure is None:
+            self.failure = stage
+
+
+def current_deadline():
+    """The deadline of the request running on this thread, or None."""
+    return getattr(_local, "deadline", None)
+
+
+def set_deadline(deadline):
+    _local.deadline = deadline
+
+
+def is_locking(operation):
+    upper = operation.upper()
+    return any(clause in upper for clause in LOCKING_CLAUSES)
+
+
+class DeadlineCursor:
+    """Cursor proxy applying the remaining budget to each statement."""
+    __slots__ = ("_cursor", "_connection")
+
+    def __init__(self, cursor, connection):
+        self._cursor = cursor
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+        return False
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        deadline = self._connection._deadline
+        remaining = deadline.remaining()
+        statement = operation.lstrip()
+        if statement[:6].upper() == "SELECT" and not is_locking(statement):
+            if remaining <= 0:
+                deadline.fail("query")
+                raise DeadlineExceeded("Request deadline passed before the query ran")
+            operation = f"SELECT /*+ MAX_EXECUTION_TIME({max(1, int(remaining * 1000))}) */{statement[6:]}"
+        else:
+            self._connection.limit_lock_wait(remaining)
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        except Error as e:
+            if e.errno == errorcode.ER_QUERY_TIMEOUT:
+                deadline.fail("query")
+            elif e.errno == errorcode.ER_LOCK_WAIT_TIMEOUT and self._connection._lock_wait is not None:
+                deadline.fail("lock")
+            raise
+
+
+class DeadlineConnection:
+    """Pooled connection proxy handing out DeadlineCursors."""
+    __slots__ = ("_connection", "_deadline", "_lock_wait")
+
+    def __init__(self, connection, deadline):
+        self._connection = connection
+        self._deadline = deadline
+        self._lock_wait = None  # innodb_lock_wait_timeout last set on this checkout
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        return DeadlineCursor(self._connection.cursor(*args, **kwargs), self)
+
+    def limit_lock_wait(self, remaining):
+        """Lower innodb_lock_wait_timeout to the remaining budget; one round trip per whole second lost."""
+        seconds = max(1, math.ceil(remaining))
+        if self._lock_wait is not None and seconds >= self._lock_wait:
+            return
+        cursor = self._connection.cursor()
+        try:
+            cursor.execute("SET SESSION innodb_lock_wait_timeout = %s", (seconds,))
+        finally:
+            cursor.close()
+        self._lock_wait = seconds
+
+
+def deadline_connection(connection):
+    """Wrap a pooled connection for the current request's deadline; unchanged without one."""
+    deadline = getattr(_local, "deadline", None)
+    if deadline is None or connection is None:
+        return connection
+    return DeadlineConnection(connection, deadline)
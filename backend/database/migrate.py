@@ -0,0 +1,219 @@
+"""
+Versioned schema migrations.
+
+Migrations live in database/migrations/ as numbered Python files
+(0001_description.py) that define `upgrade(migrator)`. Applied versions are
+recorded in the schema_migrations table, so running the migrator again is a
+no-op. A MySQL named lock makes sure only one process migrates at a time.
+
+    python -m database.migrate status
+    python -m database.migrate up [--target 3]
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import re
+import time
+
+import mysql.connector
+from mysql.connector import Error
+
+from .db_config import DB_CONFIG
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d{4})_(\w+)\.py$")
+MIGRATION_LOCK_NAME = "shopeasy_schema_migrations"
+MIGRATION_LOCK_TIMEOUT = int(os.getenv("MIGRATION_LOCK_TIMEOUT", 600))
+
+
+class Migrator:
+    """Helpers handed to each migration's upgrade() function."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, statement, params=None):
+        """Run a single statement and commit it."""
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(statement, params or ())
+            self.connection.commit()
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+    def execute_atomic(self, statements):
+        """Run several statements in one transaction; none of them stick if one fails."""
+        cursor = self.connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+            self.connection.commit()
+        except Error:
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def index_exists(self, table, index_name):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                """SELECT 1 FROM information_schema.statistics
+                   WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+                   LIMIT 1""",
+                (table, index_name)
+            )
+            return cursor.fetchone() is not None
+        finally:
+            cursor.close()
+
+    def add_index(self, table, index_name, columns, unique=False):
+        """
+        Add an index with online, in-place DDL unless it already exists.
+        Returns:
+            float: Seconds spent building the index (0 if it already existed).
+        """
+        if self.index_exists(table, index_name):
+            logger.info(f"⏭️ Index {table}.{index_name} already exists")
+            return 0.0
+
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        start = time.perf_counter()
+        self.execute(
+            f"ALTER TABLE {table} ADD {kind} {index_name} ({', '.join(columns)}), "
+            f"ALGORITHM=INPLACE, LOCK=NONE"
+        )
+        elapsed = time.perf_counter() - start
+        logger.info(f"✅ Built index {table}.{index_name} in {elapsed:.2f}s")
+        return elapsed
+
+
+def discover_migrations():
+    """Return (version, name, path) for every migration file, sorted by version."""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+def load_migration(version, path):
+    spec = importlib.util.spec_from_file_location(f"migration_{version:04d}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def ensure_migrations_table(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS schema_migrations (
+                   version INT PRIMARY KEY,
+                   name VARCHAR(100) NOT NULL,
+                   duration_ms INT NOT NULL,
+                   applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+               )"""
+        )
+        connection.commit()
+    finally:
+        cursor.close()
+
+
+def applied_versions(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT version FROM schema_migrations")
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def acquire_lock(connection, timeout=MIGRATION_LOCK_TIMEOUT):
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK_NAME, timeout))
+        return cursor.fetchone()[0] == 1
+    finally:
+        cursor.close()
+
+
+def release_lock(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK_NAME,))
+        cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def run_migrations(target=None):
+    """
+    Apply all pending migrations up to target (inclusive) under the migration lock.
+    Uses a dedicated connection so long index builds never hold a pool slot.
+    Returns:
+        list: (version, name, seconds) for each migration applied by this call.
+    """
+    connection = mysql.connector.connect(**DB_CONFIG)
+    try:
+        if not acquire_lock(connection):
+            raise Error(f"Timed out waiting for migration lock '{MIGRATION_LOCK_NAME}'")
+        try:
+            ensure_migrations_table(connection)
+            done = applied_versions(connection)
+            applied = []
+            for version, name, path in discover_migrations():
+                if version in done or (target is not None and version > target):
+                    continue
+                logger.info(f"🔄 Applying migration {version:04d}_{name}...")
+                start = time.perf_counter()
+                load_migration(version, path).upgrade(Migrator(connection))
+                elapsed = time.perf_counter() - start
+                Migrator(connection).execute(
+                    "INSERT INTO schema_migrations (version, name, duration_ms) VALUES (%s, %s, %s)",
+                    (version, name, int(elapsed * 1000))
+                )
+                logger.info(f"✅ Applied migration {version:04d}_{name} in {elapsed:.2f}s")
+                applied.append((version, name, elapsed))
+            if not applied:
+                logger.info("✅ Database schema is up to date")
+            return applied
+        finally:
+            release_lock(connection)
+    finally:
+        connection.close()
+
+
+def migration_status():
+    """Return (version, name, applied) for every known migration."""
+    connection = mysql.connector.connect(**DB_CONFIG)
+    try:
+        ensure_migrations_table(connection)
+        done = applied_versions(connection)
+        return [(version, name, version in done) for version, name, _ in discover_migrations()]
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("command", choices=["up", "status"], nargs="?", default="up")
+    parser.add_argument("--target", type=int, default=None, help="Highest version to apply")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        for version, name, applied in migration_status():
+            print(f"{version:04d}_{name}: {'applied' if applied else 'pending'}")
+        return
+
+    for version, name, elapsed in run_migrations(args.target):
+        print(f"{version:04d}_{name}: applied in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
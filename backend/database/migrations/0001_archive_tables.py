@@ -0,0 +1,28 @@
+"""Create the order archive tables on databases initialized before they existed."""
+
+
+def upgrade(migrator):
+    migrator.execute(
+        """CREATE TABLE IF NOT EXISTS orders_archive (
+               id INT PRIMARY KEY,
+               user_id INT NOT NULL,
+               total_amount DECIMAL(10, 2) NOT NULL,
+               status VARCHAR(20) NOT NULL,
+               created_at TIMESTAMP NULL,
+               updated_at TIMESTAMP NULL,
+               archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+               INDEX (user_id, created_at)
+           )"""
+    )
+    migrator.execute(
+        """CREATE TABLE IF NOT EXISTS order_items_archive (
+               id INT PRIMARY KEY,
+               order_id INT NOT NULL,
+               product_id INT NOT NULL,
+               quantity INT NOT NULL,
+               price_at_time DECIMAL(10, 2) NOT NULL,
+               created_at TIMESTAMP NULL,
+               updated_at TIMESTAMP NULL,
+               INDEX (order_id)
+           )"""
+    )
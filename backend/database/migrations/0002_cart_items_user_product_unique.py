@@ -0,0 +1,25 @@
+"""One cart row per (user, product): merge duplicates, then add a unique index."""
+
+
+def upgrade(migrator):
+    if migrator.index_exists("cart_items", "uq_cart_items_user_product"):
+        return
+
+    # Fold duplicate rows into the oldest one before the unique index is built.
+    # Both steps commit together: once they have, no duplicates are left, so a
+    # rerun after a failed index build merges nothing twice
+    migrator.execute_atomic([
+        """UPDATE cart_items c
+           JOIN (SELECT MIN(id) AS keep_id, SUM(quantity) AS total_quantity
+                 FROM cart_items
+                 GROUP BY user_id, product_id
+                 HAVING COUNT(*) > 1) d ON c.id = d.keep_id
+           SET c.quantity = d.total_quantity""",
+        """DELETE c FROM cart_items c
+           JOIN (SELECT user_id, product_id, MIN(id) AS keep_id
+                 FROM cart_items
+                 GROUP BY user_id, product_id
+                 HAVING COUNT(*) > 1) d
+             ON c.user_id = d.user_id AND c.product_id = d.product_id AND c.id <> d.keep_id"""
+    ])
+    migrator.add_index("cart_items", "uq_cart_items_user_product", ["user_id", "product_id"], unique=True)
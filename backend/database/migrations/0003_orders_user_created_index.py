@@ -0,0 +1,5 @@
+"""Index order history lookups: WHERE user_id = ? ORDER BY created_at."""
+
+
+def upgrade(migrator):
+    migrator.add_index("orders", "idx_orders_user_created", ["user_id", "created_at"])
@@ -0,0 +1,5 @@
+"""Index price-ordered catalog listings with a stable id tiebreaker."""
+
+
+def upgrade(migrator):
+    migrator.add_index("products", "idx_products_price_id", ["price", "id"])
@@ -0,0 +1,5 @@
+"""Index products.updated_at so the catalog validator (MAX(updated_at)) is an index lookup."""
+
+
+def upgrade(migrator):
+    migrator.add_index("products", "idx_products_updated_at", ["updated_at"])
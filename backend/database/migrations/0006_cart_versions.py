@@ -0,0 +1,12 @@
+"""Create the per-user cart version table on databases initialized before it existed."""
+
+
+def upgrade(migrator):
+    migrator.execute(
+        """CREATE TABLE IF NOT EXISTS cart_versions (
+               user_id INT PRIMARY KEY,
+               version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+               updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+               FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+           )"""
+    )
@@ -0,0 +1,22 @@
+"""Create the Idempotency-Key table on databases initialized before it existed."""
+
+
+def upgrade(migrator):
+    migrator.execute(
+        """CREATE TABLE IF NOT EXISTS idempotency_keys (
+               id BIGINT AUTO_INCREMENT PRIMARY KEY,
+               user_id INT NOT NULL,
+               endpoint VARCHAR(64) NOT NULL,
+               idempotency_key VARCHAR(255) NOT NULL,
+               request_hash CHAR(64) NOT NULL,
+               status VARCHAR(16) NOT NULL DEFAULT 'in_flight',
+               response_status SMALLINT NULL,
+               response_body MEDIUMTEXT NULL,
+               created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+               updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+               expires_at TIMESTAMP NOT NULL,
+               FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+               UNIQUE KEY uq_idempotency_user_key (user_id, endpoint, idempotency_key),
+               INDEX (expires_at)
+           )"""
+    )
@@ -0,0 +1,19 @@
+"""Create the transactional outbox table on databases initialized before it existed."""
+
+
+def upgrade(migrator):
+    migrator.execute(
+        """CREATE TABLE IF NOT EXISTS outbox (
+               id BIGINT AUTO_INCREMENT PRIMARY KEY,
+               event_type VARCHAR(64) NOT NULL,
+               aggregate_id BIGINT NULL,
+               payload JSON NOT NULL,
+               status VARCHAR(16) NOT NULL DEFAULT 'pending',
+               attempts INT NOT NULL DEFAULT 0,
+               last_error TEXT NULL,
+               available_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+               created_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+               processed_at TIMESTAMP(3) NULL,
+               INDEX idx_outbox_status_available (status, available_at)
+           )"""
+    )
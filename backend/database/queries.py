@@ -0,0 +1,363 @@
+"""
+Catalog of hot SQL statements.
+
+Request-path queries live here rather than inline in routes and models, so
+their plans can be checked as a whole (see tests/test_query_plans.py).
+Statements with an IN list take a `{placeholders}` field, filled with
+in_placeholders().
+"""
+
+
+def in_placeholders(count):
+    """Return '%s, %s, ...' for an IN list of `count` values."""
+    return ', '.join(['%s'] * count)
+
+
+# Products
+PRODUCT_LIST = "SELECT id, name, price FROM products"
+
+PRODUCT_BY_ID = "SELECT id, name, price FROM products WHERE id = %s"
+
+PRODUCTS_BY_IDS = "SELECT id, name, price FROM products WHERE id IN ({placeholders})"
+
+PRODUCT_PRICE_BY_ID = "SELECT price FROM products WHERE id = %s"
+
+# Catalog snapshot build (utils/catalog_snapshot.py); column order is the file's row layout
+PRODUCT_SNAPSHOT = """
+    SELECT id, name, price, stock, description, UNIX_TIMESTAMP(updated_at) AS updated_at
+    FROM products
+    ORDER BY id
+"""
+
+# Validators for conditional GET (utils/conditional.py). Each returns one row of
+# counts and *_modified epoch columns plus the database clock as db_now.
+PRODUCT_CATALOG_VERSION = """
+    SELECT COUNT(*) AS row_count,
+           UNIX_TIMESTAMP(MAX(updated_at)) AS last_modified,
+           UNIX_TIMESTAMP() AS db_now
+    FROM products
+"""
+
+PRODUCT_VERSION_BY_ID = """
+    SELECT id, UNIX_TIMESTAMP(updated_at) AS last_modified, UNIX_TIMESTAMP() AS db_now
+    FROM products WHERE id = %s
+"""
+
+# Cart
+CART_ITEMS_FOR_USER = """
+    SELECT c.product_id, c.quantity, p.name, p.price
+    FROM cart_items c
+    JOIN products p ON c.product_id = p.id
+    WHERE c.user_id = %s
+"""
+
+CART_ITEM_QUANTITY = """
+    SELECT quantity FROM cart_items WHERE user_id = %s AND product_id = %s
+"""
+
+CART_ITEM_UPDATE_QUANTITY = """
+    UPDATE cart_items SET quantity = %s WHERE user_id = %s AND product_id = %s
+"""
+
+CART_ITEM_INSERT = """
+    INSERT INTO cart_items (user_id, product_id, quantity) VALUES (%s, %s, %s)
+"""
+
+CART_ITEM_DELETE = """
+    DELETE FROM cart_items WHERE user_id = %s AND product_id = %s
+"""
+
+CART_CLEAR_FOR_USER = "DELETE FROM cart_items WHERE user_id = %s"
+
+CART_VERSION_FOR_USER = "SELECT version FROM cart_versions WHERE user_id = %s"
+
+CART_VERSION_FOR_UPDATE = "SELECT version FROM cart_versions WHERE user_id = %s FOR UPDATE"
+
+CART_VERSION_BUMP = """
+    INSERT INTO cart_versions (user_id, version) VALUES (%s, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1
+"""
+
+CART_VERSIONS_BUMP = """
+    INSERT INTO cart_versions (user_id, version) VALUES {values}
+    ON DUPLICATE KEY UPDATE version = version + 1
+"""
+
+CART_USERS_FOR_PRODUCTS = "SELECT DISTINCT user_id FROM cart_items WHERE product_id IN ({placeholders})"
+
+# Idempotency keys (utils/idempotency.py)
+IDEMPOTENCY_CLAIM = """
+    INSERT INTO idempotency_keys
+        (user_id, endpoint, idempotency_key, request_hash, status, expires_at)
+    VALUES (%s, %s, %s, %s, 'in_flight', NOW() + INTERVAL %s SECOND)
+"""
+
+IDEMPOTENCY_LOOKUP = """
+    SELECT request_hash, status, response_status, response_body,
+           expires_at < NOW() AS expired,
+           updated_at < NOW() - INTERVAL %s SECOND AS lease_expired
+    FROM idempotency_keys
+    WHERE user_id = %s AND endpoint = %s AND idempotency_key = %s
+"""
+
+IDEMPOTENCY_TAKEOVER = """
+    UPDATE idempotency_keys
+    SET request_hash = %s, status = 'in_flight', response_status = NULL, response_body = NULL,
+        expires_at = NOW() + INTERVAL %s SECOND
+    WHERE user_id = %s AND endpoint = %s AND idempotency_key = %s
+      AND (expires_at < NOW() OR (status = 'in_flight' AND updated_at < NOW() - INTERVAL %s SECOND))
+"""
+
+IDEMPOTENCY_COMPLETE = """
+    UPDATE idempotency_keys
+    SET status = 'completed', response_status = %s, response_body = %s
+    WHERE user_id = %s AND endpoint = %s AND idempotency_key = %s
+"""
+
+IDEMPOTENCY_RELEASE = """
+    DELETE FROM idempotency_keys
+    WHERE user_id = %s AND endpoint = %s AND idempotency_key = %s AND status = 'in_flight'
+"""
+
+IDEMPOTENCY_PURGE_EXPIRED = """
+    DELETE FROM idempotency_keys WHERE expires_at < NOW() ORDER BY expires_at LIMIT %s
+"""
+
+# Outbox (utils/outbox.py)
+OUTBOX_INSERT = "INSERT INTO outbox (event_type, aggregate_id, payload) VALUES (%s, %s, %s)"
+
+OUTBOX_CLAIM = """
+    SELECT id, event_type, payload, attempts, UNIX_TIMESTAMP(created_at) AS created_at
+    FROM outbox
+    WHERE status = 'pending' AND available_at <= NOW(3)
+    ORDER BY available_at
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+"""
+
+# OUTBOX_CLAIM for a worker limited to some event types
+OUTBOX_CLAIM_TYPES = """
+    SELECT id, event_type, payload, attempts, UNIX_TIMESTAMP(created_at) AS created_at
+    FROM outbox
+    WHERE status = 'pending' AND available_at <= NOW(3) AND event_type IN ({placeholders})
+    ORDER BY available_at
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+"""
+
+OUTBOX_LEASE = """
+    UPDATE outbox SET attempts = attempts + 1, available_at = NOW(3) + INTERVAL %s SECOND
+    WHERE id IN ({placeholders})
+"""
+
+OUTBOX_DONE = "UPDATE outbox SET status = 'done', processed_at = NOW(3), last_error = NULL WHERE id = %s"
+
+OUTBOX_RETRY = "UPDATE outbox SET available_at = NOW(3) + INTERVAL %s SECOND, last_error = %s WHERE id = %s"
+
+OUTBOX_FAIL = "UPDATE outbox SET status = 'failed', processed_at = NOW(3), last_error = %s WHERE id = %s"
+
+OUTBOX_STATS = """
+    SELECT COUNT(*) AS depth,
+           TIMESTAMPDIFF(MICROSECOND, MIN(created_at), NOW(3)) / 1000000 AS lag_seconds
+    FROM outbox
+    WHERE status = 'pending'
+"""
+
+OUTBOX_PURGE_DONE = """
+    DELETE FROM outbox
+    WHERE status = 'done' AND processed_at < NOW() - INTERVAL %s DAY
+    ORDER BY id
+    LIMIT %s
+"""
+
+# Orders
+ORDER_HISTORY_FOR_USER = """
+    SELECT o.id, o.total_amount, o.status, o.created_at,
+           oi.product_id,
+           oi.quantity,
+           oi.price_at_time,
+           p.name as product_name
+    FROM orders o
+    LEFT JOIN order_items oi ON o.id = oi.order_id
+    LEFT JOIN products p ON oi.product_id = p.id
+    WHERE o.user_id = %s
+    UNION ALL
+    SELECT o.id, o.total_amount, o.status, o.created_at,
+           oi.product_id,
+           oi.quantity,
+           oi.price_at_time,
+           p.name as product_name
+    FROM orders_archive o
+    LEFT JOIN order_items_archive oi ON o.id = oi.order_id
+    LEFT JOIN products p ON oi.product_id = p.id
+    WHERE o.user_id = %s
+    ORDER BY created_at DESC
+"""
+
+# Item counts catch product deletes: the FK cascade removes hot order_items,
+# and archived items lose their product row, without touching any updated_at
+ORDER_HISTORY_VERSION_FOR_USER = """
+    SELECT (SELECT COUNT(*) FROM orders WHERE user_id = %s) AS row_count,
+           (SELECT COUNT(*) FROM orders_archive WHERE user_id = %s) AS archived_count,
+           (SELECT COUNT(*) FROM orders o JOIN order_items oi ON oi.order_id = o.id
+            WHERE o.user_id = %s) AS item_count,
+           (SELECT COUNT(p.id) FROM orders_archive o
+            JOIN order_items_archive oi ON oi.order_id = o.id
+            LEFT JOIN products p ON p.id = oi.product_id
+            WHERE o.user_id = %s) AS archived_item_count,
+           UNIX_TIMESTAMP((SELECT MAX(updated_at) FROM orders WHERE user_id = %s)) AS orders_modified,
+           UNIX_TIMESTAMP((SELECT MAX(archived_at) FROM orders_archive WHERE user_id = %s)) AS archive_modified,
+           UNIX_TIMESTAMP((SELECT MAX(updated_at) FROM products)) AS products_modified,
+           UNIX_TIMESTAMP() AS db_now
+"""
+
+ORDER_DETAIL = """
+    SELECT o.id, o.user_id, o.total_amount, o.status,
+           oi.product_id, oi.quantity, oi.price_at_time, p.name
+    FROM orders o
+    JOIN order_items oi ON o.id = oi.order_id
+    JOIN products p ON oi.product_id = p.id
+    WHERE o.id = %s
+"""
+
+ORDER_DETAIL_ARCHIVED = """
+    SELECT o.id, o.user_id, o.total_amount, o.status,
+           oi.product_id, oi.quantity, oi.price_at_time, p.name
+    FROM orders_archive o
+    JOIN order_items_archive oi ON o.id = oi.order_id
+    JOIN products p ON oi.product_id = p.id
+    WHERE o.id = %s
+"""
+
+ORDER_STATUS_FOR_UPDATE = "SELECT id, status FROM orders WHERE id IN ({placeholders}) FOR UPDATE"
+
+# Plan budgets for the statements above.
+#   params:   sample parameters used for EXPLAIN
+#   max_rows: budget for the optimizer's examined-row estimate
+#   allow:    plan features accepted for this statement (full_scan, filesort, temporary)
+HOT_QUERIES = {
+    "product_list": {
+        "sql": PRODUCT_LIST,
+        "params": (),
+        "max_rows": None,
+        # The catalog page lists every product by design
+        "allow": ("full_scan",),
+    },
+    "product_by_id": {
+        "sql": PRODUCT_BY_ID,
+        "params": (1,),
+        "max_rows": 1,
+        "allow": (),
+    },
+    "products_by_ids": {
+        "sql": PRODUCTS_BY_IDS.format(placeholders=in_placeholders(50)),
+        "params": tuple(range(1, 51)),
+        "max_rows": 50,
+        "allow": (),
+    },
+    "product_snapshot": {
+        "sql": PRODUCT_SNAPSHOT,
+        "params": (),
+        "max_rows": None,
+        # Reads the whole catalog by design, in primary key order (no filesort)
+        "allow": ("full_scan",),
+    },
+    "product_catalog_version": {
+        "sql": PRODUCT_CATALOG_VERSION,
+        "params": (),
+        "max_rows": None,
+        # COUNT(*) walks the smallest index; MAX(updated_at) uses idx_products_updated_at
+        "allow": ("full_scan",),
+    },
+    "product_version_by_id": {
+        "sql": PRODUCT_VERSION_BY_ID,
+        "params": (1,),
+        "max_rows": 1,
+        "allow": (),
+    },
+    "product_price_by_id": {
+        "sql": PRODUCT_PRICE_BY_ID,
+        "params": (1,),
+        "max_rows": 1,
+        "allow": (),
+    },
+    "cart_items_for_user": {
+        "sql": CART_ITEMS_FOR_USER,
+        "params": (2,),
+        "max_rows": 200,
+        "allow": (),
+    },
+    "cart_item_quantity": {
+        "sql": CART_ITEM_QUANTITY,
+        "params": (2, 1),
+        "max_rows": 50,
+        "allow": (),
+    },
+    "cart_item_update_quantity": {
+        "sql": CART_ITEM_UPDATE_QUANTITY,
+        "params": (1, 2, 1),
+        "max_rows": 50,
+        "allow": (),
+    },
+    "cart_item_delete": {
+        "sql": CART_ITEM_DELETE,
+        "params": (2, 1),
+        "max_rows": 50,
+        "allow": (),
+    },
+    "cart_version_for_user": {
+        "sql": CART_VERSION_FOR_USER,
+        "params": (2,),
+        "max_rows": 1,
+        "allow": (),
+    },
+    "cart_clear_for_user": {
+        "sql": CART_CLEAR_FOR_USER,
+        "params": (2,),
+        "max_rows": 200,
+        "allow": (),
+    },
+    "order_history_for_user": {
+        "sql": ORDER_HISTORY_FOR_USER,
+        "params": (2, 2),
+        "max_rows": 2000,
+        # Sorting the UNION of live and archived orders needs a temporary table
+        "allow": ("filesort", "temporary"),
+    },
+    "idempotency_lookup": {
+        "sql": IDEMPOTENCY_LOOKUP,
+        "params": (60, 2, "orders.create_order", "sample-key"),
+        "max_rows": 1,
+        "allow": (),
+    },
+    "outbox_claim": {
+        "sql": OUTBOX_CLAIM,
+        "params": (50,),
+        "max_rows": 50,
+        "allow": (),
+    },
+    "order_history_version_for_user": {
+        "sql": ORDER_HISTORY_VERSION_FOR_USER,
+        "params": (2,) * 6,
+        "max_rows": 2000,
+        "allow": (),
+    },
+    "order_detail": {
+        "sql": ORDER_DETAIL,
+        "params": (1,),
+        "max_rows": 100,
+        "allow": (),
+    },
+    "order_detail_archived": {
+        "sql": ORDER_DETAIL_ARCHIVED,
+        "params": (1,),
+        "max_rows": 100,
+        "allow": (),
+    },
+    "order_status_for_update": {
+        "sql": ORDER_STATUS_FOR_UPDATE.format(placeholders=in_placeholders(100)),
+        "params": tuple(range(1, 101)),
+        "max_rows": 100,
+        "allow": (),
+    },
+}
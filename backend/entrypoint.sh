@@ -1,29 +1,20 @@
 #!/bin/bash
 set -e
 
-echo "🔄 Waiting for MySQL to be available at $DB_HOST:$DB_PORT..."
+# The app warms its connection pool in the background and gates readiness on it,
+# so waiting for MySQL here is optional (WAIT_FOR_DB=true restores the old behaviour)
+if [ "${WAIT_FOR_DB:-false}" = "true" ]; then
+    echo "🔄 Waiting for MySQL to be available at $DB_HOST:$DB_PORT..."
 
-# Wait for MySQL to be ready before running the app
-until mysqladmin ping -h"$DB_HOST" --silent; do
-    echo "⏳ MySQL is unavailable - sleeping..."
-    sleep 5
-done
+    until mysqladmin ping -h"$DB_HOST" --silent; do
+        echo "⏳ MySQL is unavailable - sleeping..."
+        sleep 5
+    done
 
-echo "✅ MySQL is up - Starting the application..."
+    echo "✅ MySQL is up"
+fi
 
-# Start Gunicorn server with appropriate settings
-exec gunicorn --bind 0.0.0.0:5000 \
-    --workers 4 \
-    --threads 2 \
-    --worker-class gthread \
-    --worker-tmp-dir /dev/shm \
-    --timeout 120 \
-    --graceful-timeout 30 \
-    --keep-alive 5 \
-    --max-requests 1000 \
-    --max-requests-jitter 50 \
-    --access-logfile - \
-    --error-logfile - \
-    --log-level debug \
-    --capture-output \
-    "wsgi:app"
\ No newline at end of file
+echo "🚀 Starting the application..."
+
+# Start Gunicorn; settings, preload mode and fork hooks live in gunicorn.conf.py
+exec gunicorn --config gunicorn.conf.py "wsgi:app"
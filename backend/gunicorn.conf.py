@@ -0,0 +1,62 @@
+"""
+Gunicorn configuration (loaded automatically from the working directory).
+
+With GUNICORN_PRELOAD=true (the default) the master imports Flask,
+mysql-connector, prometheus_client, psutil and bcrypt and builds the app once;
+workers share that memory copy-on-write. Anything that must not cross a fork
+- the MySQL pool, pool counters and background threads - is deferred by
+create_app() and started per worker in post_fork.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("GUNICORN_WORKERS", 4))
+threads = int(os.getenv("GUNICORN_THREADS", 2))
+worker_class = "gthread"
+worker_tmp_dir = "/dev/shm"
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+# Only a backstop: the memory watchdog recycles workers that actually bloat
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 20000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "debug")
+capture_output = True
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "True").lower() == "true"
+watchdog_enabled = os.getenv("WORKER_WATCHDOG_ENABLED", "True").lower() == "true"
+
+if preload_app:
+    # Read by create_app() while the master preloads wsgi:app
+    os.environ["DEFER_BACKGROUND_SERVICES"] = "true"
+
+
+def post_fork(server, worker):
+    """Re-create per-process resources in each worker forked from a preloaded master."""
+    if not preload_app:
+        return
+
+    from database.db_config import reset_after_fork
+    from app import start_background_services
+    import wsgi
+
+    reset_after_fork()
+    start_background_services(wsgi.app)
+    server.log.info(f"Worker {worker.pid} reinitialized after fork")
+
+
+def post_worker_init(worker):
+    if watchdog_enabled:
+        from monitoring.worker_watchdog import MemoryWatchdog
+        worker.memory_watchdog = MemoryWatchdog(worker).start()
+    worker.log.info(f"Worker {worker.pid} initialized")
+
+
+def worker_exit(server, worker):
+    """Count why the worker is going away (memory, max_requests or shutdown)."""
+    from monitoring.worker_watchdog import exit_reason, record_recycle
+    reason = exit_reason(worker, getattr(worker, "memory_watchdog", None))
+    record_recycle(reason)
+    server.log.info(f"Worker {worker.pid} exiting ({reason})")
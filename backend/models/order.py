@@ -1,10 +1,25 @@
 from database.db_config import get_db_connection, close_db_connection
+from database import queries
 from models.product import Product
+from monitoring.prometheus_metrics import ORDER_STATUS_CHANGES
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Allowed order status transitions: current status -> reachable statuses
+ORDER_STATUS_TRANSITIONS = {
+    'pending': {'processing', 'cancelled'},
+    'processing': {'shipped', 'cancelled'},
+    'shipped': {'completed'},
+    'completed': set(),
+    'cancelled': set(),
+}
+ORDER_STATUSES = tuple(ORDER_STATUS_TRANSITIONS)
+STATUS_UPDATE_CHUNK_SIZE = 1000
+
 class Order:
+    __slots__ = ("order_id", "user_id", "total_amount", "status", "items")
+
     def __init__(self, order_id, user_id, total_amount, status='pending'):
         self.order_id = order_id
         self.user_id = user_id
@@ -17,7 +32,7 @@ class Order:
         return {
             "order_id": self.order_id,
             "user_id": self.user_id,
-            "total_amount": float(self.total_amount),
+            "total_amount": self.total_amount,
             "status": self.status,
             "items": [item.to_dict() for item in self.items if item]
         }
@@ -39,7 +54,7 @@ class Order:
                 )
                 product = cursor.fetchone()
                 if product:
-                    total_amount += float(product["price"]) * item["quantity"]
+                    total_amount += product["price"] * item["quantity"]
 
             # Create order
             cursor.execute(
@@ -82,16 +97,12 @@ class Order:
             connection = get_db_connection()
             cursor = connection.cursor(dictionary=True)
 
-            cursor.execute(
-                """SELECT o.*, oi.product_id, oi.quantity, 
-                          oi.price_at_time, p.name
-                   FROM orders o
-                   JOIN order_items oi ON o.id = oi.order_id
-                   JOIN products p ON oi.product_id = p.id
-                   WHERE o.id = %s""",
-                (order_id,)
-            )
-            rows = cursor.fetchall()
+            # Fall back to the archive tables for orders moved by utils/archiver.py
+            for query in (queries.ORDER_DETAIL, queries.ORDER_DETAIL_ARCHIVED):
+                cursor.execute(query, (order_id,))
+                rows = cursor.fetchall()
+                if rows:
+                    break
 
             if not rows:
                 return None
@@ -99,7 +110,7 @@ class Order:
             order = Order(
                 order_id=rows[0]["id"],
                 user_id=rows[0]["user_id"],
-                total_amount=float(rows[0]["total_amount"]),
+                total_amount=rows[0]["total_amount"],
                 status=rows[0]["status"]
             )
 
@@ -107,7 +118,7 @@ class Order:
                 product = Product(
                     product_id=row["product_id"],
                     name=row["name"],
-                    price=float(row["price_at_time"])
+                    price=row["price_at_time"]
                 )
                 order.items.append(product)
 
@@ -118,4 +129,83 @@ class Order:
             return None
         finally:
             if connection:
-                close_db_connection(connection)
\ No newline at end of file
+                close_db_connection(connection)
+
+    @staticmethod
+    def can_transition(current_status, target_status):
+        """Check whether an order may move from current_status to target_status."""
+        return target_status in ORDER_STATUS_TRANSITIONS.get(current_status, set())
+
+    @staticmethod
+    def bulk_transition(order_ids, target_status, chunk_size=STATUS_UPDATE_CHUNK_SIZE):
+        """
+        Move many orders to target_status in chunked, set-based updates.
+        Each chunk locks its rows, groups them by current status and runs one
+        UPDATE ... WHERE id IN (...) AND status = <expected> per allowed source
+        status, all in one transaction.
+        Args:
+            order_ids (list): IDs of the orders to transition.
+            target_status (str): The status to move the orders to.
+            chunk_size (int): Number of orders handled per transaction.
+        Returns:
+            dict: Transitioned counts per source status, missing IDs, rejected
+            orders with their current status and IDs from failed chunks.
+        """
+        if target_status not in ORDER_STATUS_TRANSITIONS:
+            raise ValueError(f"Unknown order status: {target_status}")
+
+        unique_ids = list(dict.fromkeys(order_ids))
+        result = {"transitioned": {}, "not_found": [], "rejected": [], "failed": []}
+        connection = get_db_connection()
+        if not connection:
+            raise Exception("Database connection failed")
+        try:
+            cursor = connection.cursor()
+            for start in range(0, len(unique_ids), chunk_size):
+                chunk = unique_ids[start:start + chunk_size]
+                try:
+                    cursor.execute(
+                        queries.ORDER_STATUS_FOR_UPDATE.format(placeholders=queries.in_placeholders(len(chunk))),
+                        tuple(chunk)
+                    )
+                    by_status = {}
+                    for order_id, status in cursor.fetchall():
+                        by_status.setdefault(status, []).append(order_id)
+
+                    found = {order_id for ids in by_status.values() for order_id in ids}
+                    not_found = [order_id for order_id in chunk if order_id not in found]
+
+                    transitioned = {}
+                    rejected = []
+                    for status, ids in by_status.items():
+                        if not Order.can_transition(status, target_status):
+                            rejected.extend({"order_id": order_id, "status": status} for order_id in ids)
+                            continue
+                        cursor.execute(
+                            f"""UPDATE orders SET status = %s
+                                WHERE id IN ({', '.join(['%s'] * len(ids))}) AND status = %s""",
+                            (target_status, *ids, status)
+                        )
+                        transitioned[status] = cursor.rowcount
+
+                    connection.commit()
+                except Exception as e:
+                    connection.rollback()
+                    logger.error(f"Error transitioning order chunk to '{target_status}': {str(e)}")
+                    result["failed"].extend(chunk)
+                    continue
+
+                result["not_found"].extend(not_found)
+                result["rejected"].extend(rejected)
+                for status, count in transitioned.items():
+                    result["transitioned"][status] = result["transitioned"].get(status, 0) + count
+                    ORDER_STATUS_CHANGES.labels(from_status=status, to_status=target_status).inc(count)
+
+            logger.info(
+                f"Transitioned {sum(result['transitioned'].values())} orders to '{target_status}', "
+                f"{len(result['rejected'])} rejected, {len(result['not_found'])} not found, "
+                f"{len(result['failed'])} failed"
+            )
+            return result
+        finally:
+            close_db_connection(connection)
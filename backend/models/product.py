@@ -1,9 +1,30 @@
 from database.db_config import get_db_connection, close_db_connection
+from database import queries
+from monitoring.prometheus_metrics import CATALOG_READS
+from utils.catalog_snapshot import current_catalog, request_catalog_refresh
+from decimal import Decimal
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Batch update settings
+BULK_UPDATE_CHUNK_SIZE = 500
+BULK_UPDATE_FIELDS = ("name", "price", "description", "stock")
+# Fields shown in carts; changing them invalidates the cart versions clients hold
+CART_FIELDS = ("name", "price")
+# Column limits from 01_schema.sql: name VARCHAR(100), description TEXT (bytes),
+# price DECIMAL(10, 2), stock INT
+NAME_MAX_LENGTH = 100
+DESCRIPTION_MAX_BYTES = 65535
+PRICE_MAX = Decimal("99999999.99")
+PRICE_DECIMAL_PLACES = 2
+STOCK_MAX = 2147483647
+
 class Product:
+    # Rows from the PRODUCT_* queries and the catalog snapshot are
+    # (id, name, price), the constructor's argument order: Product(*row)
+    __slots__ = ("product_id", "name", "price")
+
     def __init__(self, product_id, name, price):
         self.product_id = product_id
         self.name = name
@@ -17,30 +38,85 @@ class Product:
         }
 
     @staticmethod
-    def get_all_products():
+    def get_all_product_rows():
+        """
+        Fetch the whole catalog as (id, name, price) tuples, without building
+        a Product per row (see utils/serializer.py for the list response).
+        Returns:
+            list | generator: (id, name, price) rows
+        """
+        snapshot = current_catalog()
+        if snapshot is not None:
+            CATALOG_READS.labels(source='snapshot').inc()
+            return snapshot.rows()
+        CATALOG_READS.labels(source='database').inc()
         logger.info("Fetching all products from the database")
         connection = get_db_connection()
         if not connection:
             raise Exception("Database connection failed")
         try:
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT id, name, price FROM products")
-            products = cursor.fetchall()
-            return [Product(product['id'], product['name'], product['price']) for product in products]
+            cursor = connection.cursor()
+            cursor.execute(queries.PRODUCT_LIST)
+            return cursor.fetchall()
         finally:
             close_db_connection(connection)
 
+    @staticmethod
+    def get_all_products():
+        return [Product(*row) for row in Product.get_all_product_rows()]
+
     @staticmethod
     def get_product_by_id(product_id):
+        snapshot = current_catalog()
+        if snapshot is not None:
+            CATALOG_READS.labels(source='snapshot').inc()
+            index = snapshot.find(product_id)
+            return Product(*snapshot.row(index)) if index is not None else None
+        CATALOG_READS.labels(source='database').inc()
         logger.info(f"Fetching product with ID {product_id}")
         connection = get_db_connection()
         if not connection:
             raise Exception("Database connection failed")
         try:
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT id, name, price FROM products WHERE id = %s", (product_id,))
-            product = cursor.fetchone()
-            return Product(product['id'], product['name'], product['price']) if product else None
+            cursor = connection.cursor()
+            cursor.execute(queries.PRODUCT_BY_ID, (product_id,))
+            row = cursor.fetchone()
+            return Product(*row) if row else None
+        finally:
+            close_db_connection(connection)
+
+    @staticmethod
+    def get_products_by_ids(product_ids):
+        """
+        Fetch many products with a single IN query.
+        Args:
+            product_ids (list): Product IDs; duplicates are queried once.
+        Returns:
+            dict: Product objects keyed by ID. Missing IDs are absent.
+        """
+        unique_ids = list(dict.fromkeys(product_ids))
+        if not unique_ids:
+            return {}
+        snapshot = current_catalog()
+        if snapshot is not None:
+            CATALOG_READS.labels(source='snapshot').inc()
+            indexes = (snapshot.find(product_id) for product_id in unique_ids)
+            return {
+                row[0]: Product(*row)
+                for row in (snapshot.row(index) for index in indexes if index is not None)
+            }
+        CATALOG_READS.labels(source='database').inc()
+        logger.info(f"Fetching {len(unique_ids)} products by ID")
+        connection = get_db_connection()
+        if not connection:
+            raise Exception("Database connection failed")
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                queries.PRODUCTS_BY_IDS.format(placeholders=queries.in_placeholders(len(unique_ids))),
+                tuple(unique_ids)
+            )
+            return {row[0]: Product(*row) for row in cursor.fetchall()}
         finally:
             close_db_connection(connection)
 
@@ -56,6 +132,7 @@ class Product:
             cursor = connection.cursor()
             cursor.execute("INSERT INTO products (name, price) VALUES (%s, %s)", (name, price))
             connection.commit()
+            request_catalog_refresh()
             return Product(cursor.lastrowid, name, price)
         except Exception as e:
             connection.rollback()
@@ -86,8 +163,10 @@ class Product:
             params.append(product_id)
             query = f"UPDATE products SET {', '.join(updates)} WHERE id = %s"
             cursor = connection.cursor()
+            Product._bump_cart_versions(cursor, [product_id])
             cursor.execute(query, tuple(params))
             connection.commit()
+            request_catalog_refresh()
             return cursor.rowcount > 0
         except Exception as e:
             connection.rollback()
@@ -104,8 +183,11 @@ class Product:
             raise Exception("Database connection failed")
         try:
             cursor = connection.cursor()
+            # The FK cascade removes the product from carts without a cart write
+            Product._bump_cart_versions(cursor, [product_id])
             cursor.execute("DELETE FROM products WHERE id = %s", (product_id,))
             connection.commit()
+            request_catalog_refresh()
             return cursor.rowcount > 0
         except Exception as e:
             connection.rollback()
@@ -113,3 +195,165 @@ class Product:
             raise e
         finally:
             close_db_connection(connection)
+
+    @staticmethod
+    def validate_bulk_update(update):
+        """
+        Validate a single partial update from a batch request.
+        Args:
+            update (dict): Must contain 'id' and at least one updatable field.
+        Returns:
+            str: An error message, or None if the update is valid.
+        """
+        if not isinstance(update, dict):
+            return "Update must be an object"
+        product_id = update.get('id')
+        if not isinstance(product_id, int) or isinstance(product_id, bool) or product_id <= 0:
+            return "'id' must be a positive integer"
+        if not any(field in update for field in BULK_UPDATE_FIELDS):
+            return f"At least one field ({', '.join(BULK_UPDATE_FIELDS)}) is required"
+        if 'name' in update:
+            name = update['name']
+            if not isinstance(name, str) or not name.strip():
+                return "Name must be a non-empty string"
+            if len(name) > NAME_MAX_LENGTH:
+                return f"Name must be at most {NAME_MAX_LENGTH} characters"
+        if 'description' in update:
+            description = update['description']
+            if description is not None:
+                if not isinstance(description, str):
+                    return "Description must be a string or null"
+                if len(description.encode('utf-8')) > DESCRIPTION_MAX_BYTES:
+                    return f"Description must be at most {DESCRIPTION_MAX_BYTES} bytes"
+        if 'price' in update:
+            price = update['price']
+            if not isinstance(price, (int, float)) or isinstance(price, bool) or price <= 0:
+                return "Price must be a positive number"
+            exact = Decimal(str(price))
+            if not exact.is_finite() or exact > PRICE_MAX:
+                return f"Price must be at most {PRICE_MAX}"
+            if exact.as_tuple().exponent < -PRICE_DECIMAL_PLACES:
+                return f"Price must have at most {PRICE_DECIMAL_PLACES} decimal places"
+        if 'stock' in update:
+            stock = update['stock']
+            if not isinstance(stock, int) or isinstance(stock, bool) or stock < 0:
+                return "Stock must be a non-negative integer"
+            if stock > STOCK_MAX:
+                return f"Stock must be at most {STOCK_MAX}"
+        return None
+
+    @staticmethod
+    def bulk_update_products(updates, chunk_size=BULK_UPDATE_CHUNK_SIZE):
+        """
+        Apply a batch of partial product updates.
+        Updates are validated up front, then applied in chunks with one grouped
+        CASE update per chunk, each chunk in its own transaction.
+        Args:
+            updates (list): Dicts with 'id' and any of name, price, description, stock.
+            chunk_size (int): Number of products updated per transaction.
+        Returns:
+            list: One result dict per input update, in request order.
+        """
+        results = [None] * len(updates)
+        valid = []
+        seen_ids = set()
+        for index, update in enumerate(updates):
+            error = Product.validate_bulk_update(update)
+            if not error and update['id'] in seen_ids:
+                error = "Duplicate 'id' in batch"
+            if error:
+                product_id = update.get('id') if isinstance(update, dict) else None
+                results[index] = {"product_id": product_id, "status": "invalid", "error": error}
+                continue
+            seen_ids.add(update['id'])
+            valid.append((index, update))
+
+        if not valid:
+            return results
+
+        logger.info(f"Bulk updating {len(valid)} products in chunks of {chunk_size}")
+        connection = get_db_connection()
+        if not connection:
+            raise Exception("Database connection failed")
+        try:
+            for start in range(0, len(valid), chunk_size):
+                chunk = valid[start:start + chunk_size]
+                try:
+                    found_ids = Product._apply_update_chunk(connection, [u for _, u in chunk])
+                    connection.commit()
+                except Exception as e:
+                    connection.rollback()
+                    logger.error("Error applying product update chunk", exc_info=True)
+                    for index, update in chunk:
+                        results[index] = {"product_id": update['id'], "status": "failed", "error": str(e)}
+                    continue
+                for index, update in chunk:
+                    status = "updated" if update['id'] in found_ids else "not_found"
+                    results[index] = {"product_id": update['id'], "status": status}
+            request_catalog_refresh()
+            return results
+        finally:
+            close_db_connection(connection)
+
+    @staticmethod
+    def _bump_cart_versions(cursor, product_ids):
+        """
+        Advance the cart version of every user with one of these products in
+        their cart, so a checkout holding the version rendered with the old
+        name, price or item list gets a 409. Run it before touching products:
+        cart writes lock cart_versions first, then the product row (FK check).
+        """
+        if not product_ids:
+            return
+        cursor.execute(
+            queries.CART_USERS_FOR_PRODUCTS.format(placeholders=queries.in_placeholders(len(product_ids))),
+            tuple(product_ids)
+        )
+        user_ids = sorted({row[0] for row in cursor.fetchall()})
+        if user_ids:
+            cursor.execute(
+                queries.CART_VERSIONS_BUMP.format(values=', '.join(['(%s, 1)'] * len(user_ids))),
+                tuple(user_ids)
+            )
+
+    @staticmethod
+    def _apply_update_chunk(connection, chunk):
+        """
+        Lock the chunk's rows and apply a grouped CASE update.
+        Returns:
+            set: IDs of the products that exist and were updated.
+        """
+        ids = [update['id'] for update in chunk]
+        placeholders = ', '.join(['%s'] * len(ids))
+        cursor = connection.cursor()
+        Product._bump_cart_versions(
+            cursor, [update['id'] for update in chunk if any(field in update for field in CART_FIELDS)]
+        )
+        cursor.execute(
+            f"SELECT id FROM products WHERE id IN ({placeholders}) FOR UPDATE",
+            tuple(ids)
+        )
+        found_ids = {row[0] for row in cursor.fetchall()}
+        if not found_ids:
+            return found_ids
+
+        assignments = []
+        params = []
+        for field in BULK_UPDATE_FIELDS:
+            cases = [(u['id'], u[field]) for u in chunk if field in u and u['id'] in found_ids]
+            if not cases:
+                continue
+            assignments.append(
+                f"{field} = CASE id {' '.join(['WHEN %s THEN %s'] * len(cases))} ELSE {field} END"
+            )
+            for product_id, value in cases:
+                params.extend((product_id, value))
+
+        found = sorted(found_ids)
+        params.extend(found)
+        query = (
+            f"UPDATE products SET {', '.join(assignments)} "
+            f"WHERE id IN ({', '.join(['%s'] * len(found))})"
+        )
+        cursor.execute(query, tuple(params))
+        return found_ids
@@ -1,10 +1,13 @@
 from database.db_config import get_db_connection, close_db_connection
+from monitoring.request_timing import phase
 import bcrypt  # For password hashing
 import logging
 
 logger = logging.getLogger(__name__)
 
 class User:
+    __slots__ = ("user_id", "username", "password", "is_admin")
+
     def __init__(self, user_id, username, password, is_admin=False):
         self.user_id = user_id
         self.username = username
@@ -75,7 +78,8 @@ class User:
             raise Exception("Database connection failed")
         try:
             # Hash the password before storing
-            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            with phase("bcrypt"):
+                hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
             cursor = connection.cursor()
             cursor.execute(
                 "INSERT INTO users (username, password, is_admin) VALUES (%s, %s, %s)", 
@@ -101,8 +105,11 @@ class User:
             User: The authenticated User object if successful, else None.
         """
         user = User.get_user_by_username(username)
-        if user and bcrypt.checkpw(password.encode('utf-8'), user.password.encode('utf-8')):
-            return user
+        if user:
+            with phase("bcrypt"):
+                valid = bcrypt.checkpw(password.encode('utf-8'), user.password.encode('utf-8'))
+            if valid:
+                return user
         return None
 
     @staticmethod
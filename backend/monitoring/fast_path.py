@@ -0,0 +1,77 @@
+"""
+WSGI fast path in front of the Flask app.
+
+Answers the cheapest, most frequent requests without touching monitoring
+middleware, Flask routing, the session store or before_request hooks:
+  - liveness probes (/api/health/live, /api/health/health)
+  - CORS preflights for /api/*, with Access-Control-Max-Age so browsers cache them
+  - frontend files from the startup asset manifest (utils/assets.py)
+Everything else is passed through to the wrapped app unchanged.
+"""
+import json
+import os
+import time
+
+from .prometheus_metrics import FAST_PATH_REQUESTS
+
+LIVENESS_PATHS = {"/api/health/live", "/api/health/health"}
+# Shared with the flask-cors setup in app.py, so preflights answered here and
+# by Flask allow the same methods and request headers
+CORS_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+CORS_REQUEST_HEADERS = ["Content-Type", "Authorization", "Accept", "Idempotency-Key", "X-Request-Timeout-Ms"]
+CORS_ALLOW_METHODS = ", ".join(CORS_METHODS)
+CORS_ALLOW_HEADERS = {header.lower() for header in CORS_REQUEST_HEADERS}
+CORS_MAX_AGE = os.getenv("CORS_MAX_AGE", "86400")
+
+
+class FastPathMiddleware:
+    def __init__(self, app, assets):
+        self.app = app
+        self.assets = assets
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        method = environ.get('REQUEST_METHOD', '')
+
+        if method == 'OPTIONS' and path.startswith('/api/') and environ.get('HTTP_ORIGIN'):
+            FAST_PATH_REQUESTS.labels(kind='preflight').inc()
+            return self.preflight(environ, start_response)
+
+        if method in ('GET', 'HEAD'):
+            if path in LIVENESS_PATHS:
+                FAST_PATH_REQUESTS.labels(kind='liveness').inc()
+                return self.liveness(method, start_response)
+            asset = self.assets.get(path)
+            if asset:
+                FAST_PATH_REQUESTS.labels(kind='static').inc()
+                return asset(environ, start_response)
+
+        return self.app(environ, start_response)
+
+    def liveness(self, method, start_response):
+        body = json.dumps({
+            "status": "healthy",
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }).encode()
+        start_response('200 OK', [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(body))),
+            ('Cache-Control', 'no-store'),
+        ])
+        return [b''] if method == 'HEAD' else [body]
+
+    def preflight(self, environ, start_response):
+        requested = environ.get('HTTP_ACCESS_CONTROL_REQUEST_HEADERS', '')
+        allowed = [h.strip() for h in requested.split(',') if h.strip().lower() in CORS_ALLOW_HEADERS]
+        headers = [
+            ('Access-Control-Allow-Origin', environ['HTTP_ORIGIN']),
+            ('Access-Control-Allow-Credentials', 'true'),
+            ('Access-Control-Allow-Methods', CORS_ALLOW_METHODS),
+            ('Access-Control-Max-Age', CORS_MAX_AGE),
+            ('Vary', 'Origin'),
+            ('Content-Length', '0'),
+        ]
+        if allowed:
+            headers.append(('Access-Control-Allow-Headers', ', '.join(allowed)))
+        start_response('204 No Content', headers)
+        return [b'']
@@ -1,6 +1,5 @@
 from flask import Blueprint, jsonify
-from database.db_config import check_db_connection
-import psutil
+from .health_sampler import get_health_snapshot
 import time
 
 # Create Blueprint with the EXACT name 'health'
@@ -24,18 +23,17 @@ def liveness():
 
 @health_bp.route('/ready')  # This becomes /api/health/ready
 def readiness():
-    """Readiness probe endpoint"""
+    """Readiness probe endpoint, served from the background sampler's snapshot"""
     try:
-        db_status = check_db_connection()
-        checks = {
-            "database": "healthy" if db_status else "unhealthy",
-            "memory_usage": psutil.virtual_memory().percent,
-            "cpu_usage": psutil.cpu_percent(),
-            "disk_usage": psutil.disk_usage('/').percent
-        }
-        is_ready = db_status and checks["memory_usage"] < 90
+        is_ready, checks = get_health_snapshot()
+        if not is_ready:
+            status = "not ready"
+        elif checks["degraded"]:
+            status = "degraded"  # still ready until the problem outlasts HEALTH_POOL_EXHAUSTED_WINDOW
+        else:
+            status = "ready"
         return jsonify({
-            "status": "ready" if is_ready else "not ready",
+            "status": status,
             "checks": checks
         }), 200 if is_ready else 503
     except Exception as e:
@@ -0,0 +1,204 @@
+"""
+Background health sampler.
+
+A daemon thread refreshes DB reachability, pool saturation and host stats on
+an interval, so health probes only read a cached snapshot and never check out
+a pool connection or call psutil inline.
+
+Readiness fails when this pod cannot reach the database (or has no fresh
+snapshot yet). Pool exhaustion and slow DB probes are first reported as
+"degraded": a short spike hits every replica together, and pulling all of
+them out of the Service at once would only push the load onto whatever is
+left. Only once either has lasted HEALTH_POOL_EXHAUSTED_WINDOW seconds does
+readiness fail, so a pod stuck in that state stops taking new traffic;
+READINESS_STRICT=false keeps both as "degraded" only. High memory is always
+just "degraded".
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+import psutil
+
+from database.db_config import DB_CONFIG, get_pool_stats, is_pool_ready
+from .prometheus_metrics import DB_CONNECTION_COUNT, DB_POOL_RECENTLY_EXHAUSTED, DB_PROBE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+HEALTH_SAMPLE_INTERVAL = float(os.getenv("HEALTH_SAMPLE_INTERVAL", 5))
+# Reported as degraded when the recent average DB probe latency exceeds this
+HEALTH_DB_LATENCY_LIMIT_MS = float(os.getenv("HEALTH_DB_LATENCY_LIMIT_MS", 500))
+# ... or when the pool ran out of connections within this many seconds
+HEALTH_POOL_EXHAUSTED_WINDOW = float(os.getenv("HEALTH_POOL_EXHAUSTED_WINDOW", 15))
+HEALTH_MEMORY_LIMIT_PERCENT = float(os.getenv("HEALTH_MEMORY_LIMIT_PERCENT", 90))
+# Fail readiness when exhaustion or high latency lasts a whole HEALTH_POOL_EXHAUSTED_WINDOW
+READINESS_STRICT = os.getenv("READINESS_STRICT", "True").lower() == "true"
+LATENCY_WINDOW = 6
+
+
+class HealthSampler:
+    """Owns the sampler thread, its dedicated DB connection and the latest snapshot."""
+
+    def __init__(self, interval=HEALTH_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.snapshot = None
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        # When the pool exhaustion / high latency currently going on started
+        self._exhausted_since = None
+        self._slow_since = None
+        self._connection = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.pid = None
+
+    def start(self):
+        self.pid = os.getpid()
+        self._stop.clear()
+        psutil.cpu_percent(interval=None)  # prime the non-blocking CPU counter
+        self._thread = threading.Thread(target=self._run, name="health-sampler", daemon=True)
+        self._thread.start()
+        logger.info(f"✅ Health sampler started (interval {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive() and self.pid == os.getpid()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"🚨 Health sampling failed: {e}")
+            self._stop.wait(self.interval)
+        if self._connection:
+            try:
+                self._connection.close()
+            except mysql.connector.Error:
+                pass
+
+    def probe_db(self):
+        """
+        Ping the DB over a dedicated connection that never takes a pool slot.
+        Returns:
+            float: Round-trip time in milliseconds, or None if unreachable.
+        """
+        start = time.perf_counter()
+        try:
+            if self._connection is None:
+                self._connection = mysql.connector.connect(**DB_CONFIG)
+            else:
+                self._connection.ping(reconnect=True, attempts=1)
+            cursor = self._connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return (time.perf_counter() - start) * 1000
+        except mysql.connector.Error as e:
+            logger.warning(f"⚠️ DB health probe failed: {e}")
+            self._connection = None
+            return None
+
+    def sample(self):
+        latency_ms = self.probe_db()
+        if latency_ms is not None:
+            self._latencies.append(latency_ms)
+            DB_PROBE_LATENCY.set(latency_ms / 1000)
+        pool = get_pool_stats()
+        DB_CONNECTION_COUNT.set(pool["in_use"])
+
+        recent_exhaustion = (
+            pool["last_exhausted_at"] is not None
+            and time.time() - pool["last_exhausted_at"] < HEALTH_POOL_EXHAUSTED_WINDOW
+        )
+        DB_POOL_RECENTLY_EXHAUSTED.set(1 if recent_exhaustion else 0)
+        avg_latency = sum(self._latencies) / len(self._latencies) if self._latencies else None
+        now = time.time()
+        self._exhausted_since = _since(self._exhausted_since, recent_exhaustion, now)
+        self._slow_since = _since(
+            self._slow_since, avg_latency is not None and avg_latency > HEALTH_DB_LATENCY_LIMIT_MS, now)
+        self.snapshot = {
+            "sampled_at": now,
+            "database": "healthy" if latency_ms is not None else "unhealthy",
+            "db_latency_ms": round(latency_ms, 2) if latency_ms is not None else None,
+            "db_latency_avg_ms": round(avg_latency, 2) if avg_latency is not None else None,
+            "pool_size": pool["size"],
+            "pool_in_use": pool["in_use"],
+            "pool_saturation": round(pool["in_use"] / pool["size"], 2),
+            "pool_exhausted_total": pool["exhausted"],
+            "pool_recently_exhausted": recent_exhaustion,
+            "pool_exhausted_seconds": _duration(self._exhausted_since, now),
+            "db_latency_high_seconds": _duration(self._slow_since, now),
+            "memory_usage": psutil.virtual_memory().percent,
+            "cpu_usage": psutil.cpu_percent(interval=None),
+            "disk_usage": psutil.disk_usage('/').percent,
+        }
+
+
+def _since(started, active, now):
+    """Start time of a condition that is active now, or None once it has cleared."""
+    if not active:
+        return None
+    return started if started is not None else now
+
+
+def _duration(started, now):
+    return round(now - started, 1) if started is not None else None
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def start_health_sampler():
+    """Start the sampler for this process (again after a fork)."""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None or not _sampler.is_alive():
+            _sampler = HealthSampler()
+            _sampler.start()
+    return _sampler
+
+
+def get_health_snapshot():
+    """
+    Evaluate readiness from the cached snapshot in O(1).
+    Returns:
+        tuple: (is_ready, checks dict). checks["reasons"] lists why the pod is
+        not ready, checks["degraded"] load problems that do not (yet) affect
+        readiness.
+    """
+    sampler = _sampler
+    snapshot = sampler.snapshot if sampler else None
+    if snapshot is None:
+        return False, {"sampler": "warming up"}
+
+    checks = dict(snapshot)
+    checks["age_seconds"] = round(time.time() - snapshot["sampled_at"], 2)
+    reasons = []
+    if not is_pool_ready():
+        reasons.append("connection pool warming up")
+    if not sampler.is_alive() or checks["age_seconds"] > 3 * sampler.interval:
+        reasons.append("stale health snapshot")
+    if snapshot["database"] != "healthy":
+        reasons.append("database unreachable")
+
+    degraded = []
+    for key, problem in (("db_latency_high_seconds", "database latency above limit"),
+                         ("pool_exhausted_seconds", "connection pool exhausted")):
+        seconds = snapshot[key]
+        if seconds is None:
+            continue
+        if READINESS_STRICT and seconds >= HEALTH_POOL_EXHAUSTED_WINDOW:
+            reasons.append(f"{problem} for {seconds:.0f}s")
+        else:
+            degraded.append(problem)
+    if snapshot["memory_usage"] >= HEALTH_MEMORY_LIMIT_PERCENT:
+        degraded.append("memory usage above limit")
+    checks["reasons"] = reasons
+    checks["degraded"] = degraded
+    return not reasons, checks
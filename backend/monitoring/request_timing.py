@@ -0,0 +1,278 @@
+"""
+Per-request phase timers: where a request's time went.
+
+RequestTimingMiddleware starts a RequestTimer for every request that reaches
+Flask and keeps it in a thread-local, so code anywhere below can add to it
+without passing it around:
+  - session: loading and saving the session (TimedSessionInterface)
+  - pool:    waiting for a pool connection (database.db_config.get_db_connection)
+  - db:      execute/fetch/commit on pooled connections (TimedConnection)
+  - bcrypt:  password hashing and checks (models/user.py)
+  - json:    response encoding (utils/json_provider.py, utils/serializer.py)
+  - other:   the rest of the request
+When the response starts, each phase is observed in
+http_request_phase_seconds{route,phase}, labeled by the route template
+(/api/products/<int:product_id>) rather than the path. With SERVER_TIMING set
+to "all", or "admin" (default) for admin sessions, the same breakdown is sent
+in a Server-Timing header and shows up in the browser's network panel.
+
+Outside a request (background threads, CLI tools) there is no timer and the
+hooks do nothing. REQUEST_TIMING_ENABLED=false removes the middleware.
+"""
+import os
+import threading
+from functools import wraps
+from time import perf_counter
+
+from flask import request, session
+
+from .prometheus_metrics import REQUEST_PHASE_LATENCY
+
+REQUEST_TIMING_ENABLED = os.getenv("REQUEST_TIMING_ENABLED", "True").lower() == "true"
+# off, admin (admin sessions only) or all
+SERVER_TIMING = os.getenv("SERVER_TIMING", "admin").lower()
+
+SKIP_PATHS = ("/api/metrics",)
+
+_local = threading.local()
+
+
+class RequestTimer:
+    """
+    Seconds spent per phase during one request. The db phase, hit several
+    times per request, is a plain attribute so the cursor hooks skip the dict.
+    """
+    __slots__ = ("started", "phases", "db", "route", "expose")
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.phases = {}
+        self.db = 0.0
+        self.route = "unmatched"
+        self.expose = False
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def breakdown(self, total):
+        """Phases in order of first use, then db, other (unaccounted time) and total."""
+        if not self.phases and not self.db:
+            return [("other", total), ("total", total)]
+        phases = list(self.phases.items())
+        accounted = sum(self.phases.values())
+        if self.db:
+            phases.append(("db", self.db))
+            accounted += self.db
+        phases.append(("other", max(0.0, total - accounted)))
+        phases.append(("total", total))
+        return phases
+
+
+def server_timing(phases):
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in phases)
+
+
+def current_timer():
+    """The timer of the request running on this thread, or None."""
+    return getattr(_local, "timer", None)
+
+
+def record_phase(name, seconds):
+    """Add already-measured time to the current request's phase, if any."""
+    timer = getattr(_local, "timer", None)
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+class phase:
+    """
+    Time a block as one phase of the current request:
+        with phase("bcrypt"):
+            bcrypt.checkpw(...)
+    """
+    __slots__ = ("name", "timer", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.timer = getattr(_local, "timer", None)
+        if self.timer is not None:
+            self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.timer is not None:
+            self.timer.add(self.name, perf_counter() - self.start)
+        return False
+
+
+def timed(name):
+    """Decorator form of phase()."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimedCursor:
+    """Cursor proxy adding execute and fetch time to the db phase."""
+    __slots__ = ("_cursor", "_timer")
+
+    def __init__(self, cursor, timer):
+        self._cursor = cursor
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+        return False
+
+    def _timed(self, method, args, kwargs):
+        start = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._timer.db += perf_counter() - start
+
+    # execute and the fetches are inlined: they run several times per request
+    def execute(self, *args, **kwargs):
+        start = perf_counter()
+        try:
+            return self._cursor.execute(*args, **kwargs)
+        finally:
+            self._timer.db += perf_counter() - start
+
+    def executemany(self, *args, **kwargs):
+        return self._timed(self._cursor.executemany, args, kwargs)
+
+    def callproc(self, *args, **kwargs):
+        return self._timed(self._cursor.callproc, args, kwargs)
+
+    def fetchone(self):
+        start = perf_counter()
+        try:
+            return self._cursor.fetchone()
+        finally:
+            self._timer.db += perf_counter() - start
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed(self._cursor.fetchmany, args, kwargs)
+
+    def fetchall(self):
+        start = perf_counter()
+        try:
+            return self._cursor.fetchall()
+        finally:
+            self._timer.db += perf_counter() - start
+
+
+class TimedConnection:
+    """Pooled connection proxy handing out TimedCursors and timing commit/rollback."""
+    __slots__ = ("_connection", "_timer")
+
+    def __init__(self, connection, timer):
+        self._connection = connection
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._connection.cursor(*args, **kwargs), self._timer)
+
+    def commit(self):
+        start = perf_counter()
+        try:
+            return self._connection.commit()
+        finally:
+            self._timer.db += perf_counter() - start
+
+    def rollback(self):
+        start = perf_counter()
+        try:
+            return self._connection.rollback()
+        finally:
+            self._timer.db += perf_counter() - start
+
+
+def timed_connection(connection):
+    """Wrap a pooled connection for the current request; unchanged outside one."""
+    timer = getattr(_local, "timer", None)
+    if timer is None or connection is None:
+        return connection
+    return TimedConnection(connection, timer)
+
+
+class TimedSessionInterface:
+    """Wraps the app's session interface to time session load and save."""
+
+    def __init__(self, interface):
+        self.interface = interface
+
+    def __getattr__(self, name):
+        return getattr(self.interface, name)
+
+    def open_session(self, app, request):
+        with phase("session"):
+            return self.interface.open_session(app, request)
+
+    def save_session(self, app, session, response):
+        with phase("session"):
+            return self.interface.save_session(app, session, response)
+
+
+def note_request(response):
+    """after_request hook: label the timer with the route and decide on the header."""
+    timer = getattr(_local, "timer", None)
+    if timer is not None:
+        if request.url_rule is not None:
+            timer.route = request.url_rule.rule
+        timer.expose = SERVER_TIMING == "all" or (SERVER_TIMING == "admin" and bool(session.get("is_admin")))
+    return response
+
+
+def init_request_timing(app):
+    """Hook the session interface and route labeling into app; call after Session(app)."""
+    app.session_interface = TimedSessionInterface(app.session_interface)
+    app.after_request(note_request)
+
+
+class RequestTimingMiddleware:
+    """
+    WSGI middleware owning the per-request timer. The breakdown is taken when
+    the response starts, after the view, JSON encoding and session save.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO", "") in SKIP_PATHS:
+            return self.app(environ, start_response)
+
+        timer = _local.timer = RequestTimer()
+
+        def timing_start_response(status, headers, exc_info=None):
+            phases = timer.breakdown(perf_counter() - timer.started)
+            if timer.expose:
+                headers = list(headers)
+                headers.append(("Server-Timing", server_timing(phases)))
+            REQUEST_PHASE_LATENCY.observe_request(timer.route, phases)
+            return start_response(status, headers, exc_info)
+
+        try:
+            return self.app(environ, timing_start_response)
+        finally:
+            _local.timer = None
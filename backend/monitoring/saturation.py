@@ -0,0 +1,352 @@
+"""
+Saturation metrics for autoscaling: threads, in-flight requests, queueing
+and the DB pool.
+
+CPU is a poor scaling signal for this app. A pod saturates when its gthread
+workers run out of threads or their 5-connection pools run dry, often well
+before the CPU is busy. Each worker keeps:
+  - in-flight requests (SaturationMiddleware, outermost in the WSGI stack)
+    and busy thread-seconds, the time integral of in-flight requests
+  - queue time: how long a request waited between the proxy and a worker
+    thread, from the X-Request-Start header the proxy sets ("t=<epoch>" in
+    seconds, milliseconds or microseconds)
+  - pool wait, checkouts and busy connection-seconds (database.db_config)
+
+Metrics are per process, but a scrape reaches one arbitrary worker. So every
+SATURATION_PUBLISH_INTERVAL seconds each worker copies its numbers into a
+slot of a shared file in /dev/shm (SaturationTable), and SaturationCollector
+exports all live slots, labeled worker="<slot>". Any scrape then returns the
+whole pod. The slot index is reused when a worker is recycled, so series do
+not churn with pids; counters restart at 0, which rate() handles.
+
+Pod-level recording rules and example alerts are in
+k8s/monitoring/saturation-rules.yaml.
+"""
+import atexit
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from database.db_config import get_pool_stats
+from .prometheus_metrics import REGISTRY
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_default_shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+SATURATION_SHM_PATH = os.getenv("SATURATION_SHM_PATH", os.path.join(_default_shm_dir, "shopeasy-saturation"))
+SATURATION_SLOTS = int(os.getenv("SATURATION_SLOTS", 64))
+SATURATION_PUBLISH_INTERVAL = float(os.getenv("SATURATION_PUBLISH_INTERVAL", 1))
+# Slots not refreshed for this long belong to dead workers
+SATURATION_STALE_AFTER = max(10.0, 5 * SATURATION_PUBLISH_INTERVAL)
+# Threads per worker, as configured in gunicorn.conf.py
+WORKER_THREADS = int(os.getenv("GUNICORN_THREADS", 2))
+
+
+def queue_time(environ, now=None):
+    """
+    Seconds since the proxy received the request, from X-Request-Start.
+    Returns:
+        float: Queue time (0 when the clocks disagree), or None without the header.
+    """
+    value = environ.get("HTTP_X_REQUEST_START")
+    if not value:
+        return None
+    if value.startswith("t="):
+        value = value[2:]
+    try:
+        started = float(value)
+    except ValueError:
+        return None
+    # nginx sends seconds with a millisecond fraction (t=${msec}); others send ms or us
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(0.0, (now or time.time()) - started)
+
+
+class WorkerLoad:
+    """In-flight requests, busy thread-seconds and queue time of this process."""
+
+    def __init__(self, threads=WORKER_THREADS):
+        self.threads = threads
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.busy_seconds = 0.0
+        self.changed_at = time.monotonic()
+        self.queue_seconds = 0.0
+        self.queued_requests = 0
+
+    def _advance(self, now):
+        self.busy_seconds += self.in_flight * (now - self.changed_at)
+        self.changed_at = now
+
+    def begin(self, queued=None):
+        now = time.monotonic()
+        with self._lock:
+            self._advance(now)
+            self.in_flight += 1
+            if queued is not None:
+                self.queue_seconds += queued
+                self.queued_requests += 1
+
+    def end(self):
+        now = time.monotonic()
+        with self._lock:
+            self._advance(now)
+            self.in_flight -= 1
+
+    def snapshot(self):
+        """Returns (in_flight, threads, busy_seconds, queue_seconds, queued_requests)."""
+        now = time.monotonic()
+        with self._lock:
+            self._advance(now)
+            return self.in_flight, self.threads, self.busy_seconds, self.queue_seconds, self.queued_requests
+
+
+class SaturationTable:
+    """
+    One slot per worker in a memory-mapped file. Each worker only writes its
+    own slot; claiming a slot locks the whole file.
+    """
+    HEADER = struct.Struct("<4sI")  # magic, slots
+    # pid, updated (epoch), in_flight, threads, busy s, queue s, queued, pool in_use,
+    # pool size, pool wait s, checkouts, pool busy s
+    SLOT = struct.Struct("<QdqqddQqqdQd")
+    MAGIC = b"SATR"
+
+    def __init__(self, path=SATURATION_SHM_PATH, slots=SATURATION_SLOTS):
+        self.path = path
+        self.slots = slots
+        self.size = self.HEADER.size + slots * self.SLOT.size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+
+    def _open(self):
+        """Map the table for this process; fcntl locks are per process, so reopen after a fork."""
+        if fcntl is None or not self.path:
+            self._fd = None
+            self._map = mmap.mmap(-1, self.size)
+        else:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            try:
+                header = self.HEADER.pack(self.MAGIC, self.slots)
+                if os.fstat(fd).st_size != self.size or os.pread(fd, self.HEADER.size, 0) != header:
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, self.size)
+                    os.pwrite(fd, header, 0)
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+            self._fd = fd
+            self._map = mmap.mmap(fd, self.size)
+        self._pid = os.getpid()
+
+    def _ensure_open(self):
+        if self._pid != os.getpid():
+            self._open()
+
+    def _position(self, index):
+        return self.HEADER.size + index * self.SLOT.size
+
+    @staticmethod
+    def _alive(pid, updated, now):
+        if not pid or now - updated > SATURATION_STALE_AFTER:
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def claim(self, pid):
+        """
+        Take a slot for pid: its own, an empty one or one left by a dead worker.
+        Returns:
+            int: Slot index, or None when the table is full.
+        """
+        with self._lock:
+            self._ensure_open()
+            if self._fd is not None:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                free = None
+                for index in range(self.slots):
+                    slot_pid, updated = struct.unpack_from("<Qd", self._map, self._position(index))
+                    if slot_pid == pid:
+                        free = index
+                        break
+                    if free is None and not self._alive(slot_pid, updated, now):
+                        free = index
+                if free is not None:
+                    self.SLOT.pack_into(self._map, self._position(free), pid, now, *([0] * 10))
+                return free
+            finally:
+                if self._fd is not None:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    def write(self, index, pid, values):
+        with self._lock:
+            self._ensure_open()
+            self.SLOT.pack_into(self._map, self._position(index), pid, time.time(), *values)
+
+    def release(self, index, pid):
+        with self._lock:
+            self._ensure_open()
+            slot_pid, _ = struct.unpack_from("<Qd", self._map, self._position(index))
+            if slot_pid == pid:
+                self.SLOT.pack_into(self._map, self._position(index), 0, 0.0, *([0] * 10))
+
+    def read(self):
+        """Yield (slot index, values after pid and timestamp) for live workers."""
+        with self._lock:
+            self._ensure_open()
+            rows = [self.SLOT.unpack_from(self._map, self._position(index)) for index in range(self.slots)]
+        now = time.time()
+        for index, (pid, updated, *values) in enumerate(rows):
+            if self._alive(pid, updated, now):
+                yield index, values
+
+
+class SaturationPublisher:
+    """Copies this worker's load and pool counters into its slot on an interval."""
+
+    def __init__(self, table, load, interval=SATURATION_PUBLISH_INTERVAL):
+        self.table = table
+        self.load = load
+        self.interval = interval
+        self.index = None
+        self.pid = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.pid = os.getpid()
+        self.index = self.table.claim(self.pid)
+        if self.index is None:
+            logger.warning(f"⚠️ Saturation table full ({self.table.slots} slots); worker {self.pid} not exported")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="saturation-publisher", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info(f"✅ Saturation publisher started (slot {self.index})")
+
+    def stop(self):
+        self._stop.set()
+        if self.index is not None:
+            self.table.release(self.index, self.pid)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive() and self.pid == os.getpid()
+
+    def publish(self):
+        in_flight, threads, busy, queue_seconds, queued = self.load.snapshot()
+        pool = get_pool_stats()
+        self.table.write(self.index, self.pid, (
+            in_flight, threads, busy, queue_seconds, queued,
+            pool["in_use"], pool["size"], pool["wait_total"], pool["checkouts"], pool["busy_seconds"],
+        ))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.publish()
+            except Exception as e:
+                logger.error(f"🚨 Saturation publishing failed: {e}")
+            self._stop.wait(self.interval)
+
+
+class SaturationCollector:
+    """Exports every live worker's slot, labeled by slot index."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def collect(self):
+        in_flight = GaugeMetricFamily(
+            'worker_inflight_requests', 'Requests being handled by the worker', labels=['worker'])
+        threads = GaugeMetricFamily(
+            'worker_threads', 'Worker request threads by state', labels=['worker', 'state'])
+        busy = CounterMetricFamily(
+            'worker_busy_thread_seconds', 'Thread-seconds spent handling requests', labels=['worker'])
+        queue = CounterMetricFamily(
+            'http_request_queue_seconds', 'Time between the proxy (X-Request-Start) and a worker thread',
+            labels=['worker'])
+        queued = CounterMetricFamily(
+            'http_request_queued_requests', 'Requests that carried X-Request-Start', labels=['worker'])
+        pool = GaugeMetricFamily(
+            'db_pool_connections', 'Pool connections by state', labels=['worker', 'state'])
+        pool_wait = CounterMetricFamily(
+            'db_pool_wait_seconds', 'Time spent waiting for a pool connection', labels=['worker'])
+        checkouts = CounterMetricFamily(
+            'db_pool_checkouts', 'Pool connections handed out', labels=['worker'])
+        pool_busy = CounterMetricFamily(
+            'db_pool_busy_connection_seconds', 'Connection-seconds checked out of the pool', labels=['worker'])
+
+        for index, values in self.table.read():
+            (active, thread_count, busy_seconds, queue_seconds, queued_requests,
+             pool_in_use, pool_size, wait_seconds, checkout_count, pool_busy_seconds) = values
+            worker = str(index)
+            busy_threads = min(active, thread_count)
+            in_flight.add_metric([worker], active)
+            threads.add_metric([worker, 'busy'], busy_threads)
+            threads.add_metric([worker, 'idle'], thread_count - busy_threads)
+            busy.add_metric([worker], busy_seconds)
+            queue.add_metric([worker], queue_seconds)
+            queued.add_metric([worker], queued_requests)
+            pool.add_metric([worker, 'in_use'], pool_in_use)
+            pool.add_metric([worker, 'idle'], max(0, pool_size - pool_in_use))
+            pool_wait.add_metric([worker], wait_seconds)
+            checkouts.add_metric([worker], checkout_count)
+            pool_busy.add_metric([worker], pool_busy_seconds)
+
+        yield from (in_flight, threads, busy, queue, queued, pool, pool_wait, checkouts, pool_busy)
+
+
+class SaturationMiddleware:
+    """Counts in-flight requests and their queue time; wrap it around the whole WSGI stack."""
+
+    def __init__(self, app, load=None):
+        self.app = app
+        self.load = load or worker_load
+
+    def __call__(self, environ, start_response):
+        self.load.begin(queue_time(environ))
+        try:
+            return self.app(environ, start_response)
+        finally:
+            self.load.end()
+
+
+worker_load = WorkerLoad()
+saturation_table = SaturationTable()
+REGISTRY.register(SaturationCollector(saturation_table))
+
+_publisher = None
+
+
+def start_saturation_publisher():
+    """Start this worker's publisher; restarts cleanly in a forked worker."""
+    global _publisher
+    if _publisher is not None and _publisher.is_alive():
+        return _publisher
+    _publisher = SaturationPublisher(saturation_table, worker_load)
+    _publisher.start()
+    return _publisher
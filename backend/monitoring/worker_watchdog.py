@@ -0,0 +1,147 @@
+"""
+Per-worker memory watchdog.
+
+Started in each gunicorn worker from post_worker_init. It samples the
+worker's RSS and Python heap (allocated blocks) on an interval and gracefully
+recycles the worker - by clearing `worker.alive`, so in-flight requests
+finish first - once it crosses a memory ceiling or grows faster than a
+configured rate. Recycle reasons are counted in a small shared file so the
+counts survive the worker that recorded them.
+"""
+import fcntl
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import psutil
+from prometheus_client.core import CounterMetricFamily
+
+from .prometheus_metrics import REGISTRY, WORKER_MEMORY_RSS, WORKER_HEAP_BLOCKS
+
+logger = logging.getLogger(__name__)
+
+WATCHDOG_INTERVAL = float(os.getenv("WORKER_WATCHDOG_INTERVAL", 10))
+WORKER_MEMORY_LIMIT_MB = float(os.getenv("WORKER_MEMORY_LIMIT_MB", 400))
+WORKER_MEMORY_GROWTH_LIMIT_MB_PER_MIN = float(os.getenv("WORKER_MEMORY_GROWTH_LIMIT_MB_PER_MIN", 50))
+# Growth is only acted on above this RSS, so start-up allocation never triggers it
+WORKER_MEMORY_GROWTH_FLOOR_MB = float(os.getenv("WORKER_MEMORY_GROWTH_FLOOR_MB", WORKER_MEMORY_LIMIT_MB / 2))
+GROWTH_WINDOW = 6
+RECYCLE_COUNTS_FILE = os.getenv(
+    "WORKER_RECYCLE_COUNTS_FILE",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else "/tmp", "shopeasy_worker_recycles.json")
+)
+
+MB = 1024 * 1024
+
+
+class MemoryWatchdog:
+    """Samples one worker's memory and flags it for recycling when needed."""
+
+    def __init__(self, worker, limit_mb=WORKER_MEMORY_LIMIT_MB,
+                 growth_limit_mb_per_min=WORKER_MEMORY_GROWTH_LIMIT_MB_PER_MIN,
+                 growth_floor_mb=WORKER_MEMORY_GROWTH_FLOOR_MB, interval=WATCHDOG_INTERVAL):
+        self.worker = worker
+        self.limit_bytes = limit_mb * MB
+        self.growth_limit_bytes_per_sec = growth_limit_mb_per_min * MB / 60
+        self.growth_floor_bytes = growth_floor_mb * MB
+        self.interval = interval
+        self.samples = deque(maxlen=GROWTH_WINDOW)
+        self.reason = None
+        self._process = psutil.Process()
+        self._thread = None
+
+    def check(self, rss_bytes, now):
+        """
+        Record a sample and decide whether the worker should be recycled.
+        Returns:
+            str: 'memory_ceiling', 'memory_growth' or None.
+        """
+        self.samples.append((now, rss_bytes))
+        if rss_bytes >= self.limit_bytes:
+            return "memory_ceiling"
+        if len(self.samples) == self.samples.maxlen and rss_bytes >= self.growth_floor_bytes:
+            first_at, first_rss = self.samples[0]
+            if now > first_at and (rss_bytes - first_rss) / (now - first_at) > self.growth_limit_bytes_per_sec:
+                return "memory_growth"
+        return None
+
+    def sample(self):
+        rss = self._process.memory_info().rss
+        pid = str(os.getpid())
+        WORKER_MEMORY_RSS.labels(pid=pid).set(rss)
+        WORKER_HEAP_BLOCKS.labels(pid=pid).set(sys.getallocatedblocks())
+        reason = self.check(rss, time.monotonic())
+        if reason:
+            self.recycle(reason, rss)
+        return reason
+
+    def recycle(self, reason, rss):
+        if self.reason:
+            return
+        self.reason = reason
+        logger.warning(f"♻️ Recycling worker {os.getpid()} ({reason}, RSS {rss / MB:.1f} MB)")
+        # gunicorn stops accepting on this worker, drains in-flight requests and exits
+        self.worker.alive = False
+
+    def _run(self):
+        while self.worker.alive and not self.reason:
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"🚨 Worker memory sampling failed: {e}")
+            time.sleep(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="memory-watchdog", daemon=True)
+        self._thread.start()
+        return self
+
+
+def record_recycle(reason):
+    """Add one recycle with `reason` to the shared counts file."""
+    try:
+        with open(RECYCLE_COUNTS_FILE, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            content = f.read()
+            counts = json.loads(content) if content else {}
+            counts[reason] = counts.get(reason, 0) + 1
+            f.seek(0)
+            f.truncate()
+            json.dump(counts, f)
+    except (OSError, ValueError) as e:
+        logger.error(f"🚨 Failed to record worker recycle: {e}")
+
+
+def exit_reason(worker, watchdog):
+    """Classify why a worker is exiting."""
+    if watchdog and watchdog.reason:
+        return watchdog.reason
+    if worker.max_requests and worker.nr >= worker.max_requests:
+        return "max_requests"
+    return "shutdown"
+
+
+class RecycleCollector:
+    """Exposes the shared recycle counts as worker_recycles_total{reason}."""
+
+    def collect(self):
+        counts = {}
+        try:
+            with open(RECYCLE_COUNTS_FILE) as f:
+                fcntl.flock(f, fcntl.LOCK_SH)
+                content = f.read()
+                counts = json.loads(content) if content else {}
+        except (OSError, ValueError):
+            pass
+        metric = CounterMetricFamily('worker_recycles', 'Worker recycles by reason', labels=['reason'])
+        for reason, count in sorted(counts.items()):
+            metric.add_metric([reason], count)
+        yield metric
+
+
+REGISTRY.register(RecycleCollector())
@@ -7,3 +7,4 @@ from .auth_routes import auth_bp
 from .product_routes import product_bp
 from .cart_routes import cart_bp
 from .order_routes import order_bp
+from .bootstrap_routes import bootstrap_bp
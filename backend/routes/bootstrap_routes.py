@@ -0,0 +1,103 @@
+from flask import Blueprint, request, jsonify, session
+from database.db_config import get_db_connection, close_db_connection
+from database import queries
+from monitoring.prometheus_metrics import track_auth_metrics
+from routes.cart_routes import cached_cart
+from utils.conditional import make_validator
+from utils.catalog_snapshot import current_catalog
+import logging
+
+logger = logging.getLogger(__name__)
+bootstrap_bp = Blueprint('bootstrap', __name__)
+
+BOOTSTRAP_PARTS = ("auth", "cart_summary", "catalog_version")
+
+def parse_include(raw_include):
+    """
+    Parse the include query parameter.
+    Args:
+        raw_include (str): Comma-separated part names
+    Returns:
+        list: Requested parts, in BOOTSTRAP_PARTS order
+    Raises:
+        ValueError: If a part is unknown
+    """
+    requested = {part.strip() for part in raw_include.split(',') if part.strip()}
+    unknown = requested - set(BOOTSTRAP_PARTS)
+    if unknown:
+        raise ValueError(f"Unknown include: {', '.join(sorted(unknown))}. "
+                         f"Allowed: {', '.join(BOOTSTRAP_PARTS)}")
+    return [part for part in BOOTSTRAP_PARTS if part in requested]
+
+def summarize_cart(entry):
+    return {
+        "cart_version": entry.version,
+        "item_count": len(entry.items),
+        "total_quantity": sum(item["quantity"] for item in entry.items),
+        "total_amount": round(sum(item["total_price"] for item in entry.items), 2),
+    }
+
+@bootstrap_bp.route('/bootstrap', methods=['GET'])
+@track_auth_metrics
+def bootstrap():
+    """
+    Return a page's startup state in a single request.
+    Query: include=auth,cart_summary,catalog_version (default: auth)
+    All parts share one session load and at most one DB connection, which
+    is only checked out when a part is not already answered from memory.
+    Returns:
+        - 200: Requested parts (cart_summary is null when logged out,
+          catalog_version is null when the catalog just changed)
+        - 400: Unknown include
+        - 500: Server error
+    """
+    try:
+        include = parse_include(request.args.get('include', 'auth'))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    user_id = session.get('user_id')
+    connection = None
+
+    def db_cursor():
+        nonlocal connection
+        if connection is None:
+            connection = get_db_connection()
+            if not connection:
+                raise Exception("Database connection failed")
+        return connection.cursor(dictionary=True)
+
+    try:
+        result = {}
+        if "auth" in include:
+            result["auth"] = {"authenticated": bool(user_id)}
+            if user_id:
+                result["auth"]["user"] = {"username": session.get('username'), "user_id": user_id}
+
+        if "cart_summary" in include:
+            result["cart_summary"] = None
+            if user_id:
+                result["cart_summary"] = summarize_cart(cached_cart(db_cursor(), user_id))
+
+        if "catalog_version" in include:
+            snapshot = current_catalog()
+            if snapshot is not None:
+                validator = (snapshot.etag,)
+            else:
+                cursor = db_cursor()
+                cursor.execute(queries.PRODUCT_CATALOG_VERSION)
+                validator = make_validator('product_list', cursor.fetchone())
+            # Same value as the ETag of GET /api/products
+            result["catalog_version"] = f'W/"{validator[0]}"' if validator else None
+
+        if connection:
+            connection.commit()
+        response = jsonify(result)
+        response.headers['Cache-Control'] = 'private, no-store'
+        return response, 200
+    except Exception as e:
+        logger.error(f"Bootstrap failed: {str(e)}")
+        return jsonify({"message": "Failed to load page state", "error": str(e)}), 500
+    finally:
+        if connection:
+            close_db_connection(connection)
@@ -1,67 +1,208 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, g
 from database.db_config import get_db_connection, close_db_connection
+from database import queries
 from monitoring.prometheus_metrics import (
     CART_OPERATIONS,
+    CART_CACHE_EVENTS,
+    CART_CACHE_BYTES,
     track_auth_metrics,
     record_request_metrics,
     track_user_action
 )
+from utils.conditional import conditional, CACHE_PRIVATE
+from utils.idempotency import commit_with_response, idempotent
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import threading
+import time
 
+logger = logging.getLogger(__name__)
 cart_bp = Blueprint('cart', __name__)
 
+# Per-worker cart cache settings. Writes through this worker update the cache
+# directly, and a cached cart is only reused while its version still matches
+# cart_versions, so writes made through other workers are seen at once. The
+# TTL bounds how long product names and prices in a cached cart can lag.
+CART_CACHE_MAX_BYTES = int(os.getenv("CART_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+CART_CACHE_TTL = float(os.getenv("CART_CACHE_TTL", 30))
+
+class CartEntry:
+    """A user's cart as last read or written, with its version."""
+    __slots__ = ("version", "items", "etag", "size", "loaded_at")
+
+    def __init__(self, version, items):
+        self.version = version
+        self.items = items
+        self.etag = hashlib.sha1(repr((version, items)).encode()).hexdigest()[:20]
+        # Rough per-item footprint: dict, ints, float, name string
+        self.size = 256 + sum(400 + len(item["name"]) for item in items)
+        self.loaded_at = time.monotonic()
+
+class CartCache:
+    """LRU of CartEntry keyed by user id, capped by approximate bytes."""
+
+    def __init__(self, max_bytes=CART_CACHE_MAX_BYTES, ttl=CART_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and time.monotonic() - entry.loaded_at > self.ttl:
+                self._remove(user_id)
+                entry = None
+            if entry is None:
+                CART_CACHE_EVENTS.labels(event='miss').inc()
+                return None
+            self.entries.move_to_end(user_id)
+            CART_CACHE_EVENTS.labels(event='hit').inc()
+            return entry
+
+    def put(self, user_id, version, items):
+        """
+        Store a cart state unless a newer version is already cached.
+        Returns:
+            CartEntry: The entry now current for the user.
+        """
+        entry = CartEntry(version, items)
+        with self.lock:
+            current = self.entries.get(user_id)
+            if current is not None and current.version > version:
+                return current
+            if current is not None:
+                self._remove(user_id)
+            self.entries[user_id] = entry
+            self.bytes += entry.size
+            while self.bytes > self.max_bytes and self.entries:
+                evicted_id = next(iter(self.entries))
+                self._remove(evicted_id)
+                CART_CACHE_EVENTS.labels(event='evict').inc()
+            CART_CACHE_BYTES.set(self.bytes)
+        return entry
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self._remove(user_id)
+            CART_CACHE_BYTES.set(self.bytes)
+
+    def _remove(self, user_id):
+        entry = self.entries.pop(user_id, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+cart_cache = CartCache()
+
+def format_cart_items(rows):
+    return [
+        {
+            "product_id": item["product_id"],
+            "name": item["name"],
+            "price": item["price"],
+            "quantity": item["quantity"],
+            "total_price": item["quantity"] * item["price"],
+        }
+        for item in rows
+    ]
+
+def read_cart_state(cursor, user_id):
+    """
+    Read the cart version and items on a dictionary cursor.
+    The version is read first, so a concurrent write can only make the
+    items newer than the version, never older.
+    Returns:
+        tuple: (version, items)
+    """
+    cursor.execute(queries.CART_VERSION_FOR_USER, (user_id,))
+    row = cursor.fetchone()
+    cursor.execute(queries.CART_ITEMS_FOR_USER, (user_id,))
+    return (row["version"] if row else 0), format_cart_items(cursor.fetchall())
+
+def bump_cart_version(cursor, user_id):
+    """
+    Advance the user's cart version. Run it first in every transaction that
+    changes cart_items: the row lock it takes serializes a user's cart writes.
+    """
+    cursor.execute(queries.CART_VERSION_BUMP, (user_id,))
+
+def cached_cart(cursor, user_id):
+    """
+    Return the user's current CartEntry, reading on a dictionary cursor.
+    A cached entry is reused only while its version matches cart_versions (a
+    primary-key lookup); otherwise the items are read again and cached.
+    """
+    entry = cart_cache.get(user_id)
+    if entry is not None:
+        cursor.execute(queries.CART_VERSION_FOR_USER, (user_id,))
+        row = cursor.fetchone()
+        if (row["version"] if row else 0) == entry.version:
+            return entry
+        CART_CACHE_EVENTS.labels(event='stale').inc()
+        cart_cache.invalidate(user_id)
+
+    version, items = read_cart_state(cursor, user_id)
+    return cart_cache.put(user_id, version, items)
+
+def load_cart(user_id):
+    """Return the user's current CartEntry, from the cache while it is up to date."""
+    connection = get_db_connection()
+    if not connection:
+        raise Exception("Database connection failed")
+    try:
+        entry = cached_cart(connection.cursor(dictionary=True), user_id)
+        connection.commit()
+        return entry
+    finally:
+        close_db_connection(connection)
+
+def cart_validator():
+    """ETag for GET /api/cart, taken from the cached cart entry."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+    g.cart_entry = load_cart(user_id)
+    return f"{user_id}-{g.cart_entry.etag}", None
+
 @cart_bp.route('/cart', methods=['GET'])
 @track_auth_metrics
+@conditional('cart', cache_control=CACHE_PRIVATE, validator=cart_validator)
 def get_cart():
     """
     Fetch all items in the cart for a given user.
     Uses session user_id instead of query parameter.
+    The response carries cart_version, which checkout can send back.
     """
     user_id = session.get('user_id')
     if not user_id:
         return jsonify({"message": "User not authenticated"}), 401
 
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"message": "Database connection failed"}), 500
-
     try:
-        cursor = connection.cursor(dictionary=True)
-        query = """
-            SELECT c.product_id, c.quantity, p.name, p.price
-            FROM cart_items c
-            JOIN products p ON c.product_id = p.id
-            WHERE c.user_id = %s
-        """
-        cursor.execute(query, (user_id,))
-        cart_items = cursor.fetchall()
-
-        if not cart_items:
-            return jsonify({"message": "Cart is empty", "cart_items": []}), 200
-
-        response = [
-            {
-                "product_id": item["product_id"],
-                "name": item["name"],
-                "price": float(item["price"]),
-                "quantity": item["quantity"],
-                "total_price": round(item["quantity"] * float(item["price"]), 2),
-            }
-            for item in cart_items
-        ]
-
-        return jsonify({"message": "Cart items retrieved successfully", "cart_items": response}), 200
+        entry = g.get('cart_entry') or load_cart(user_id)
+
+        if not entry.items:
+            return jsonify({"message": "Cart is empty", "cart_items": [], "cart_version": entry.version}), 200
+
+        return jsonify({
+            "message": "Cart items retrieved successfully",
+            "cart_items": entry.items,
+            "cart_version": entry.version
+        }), 200
     except Exception as e:
         return jsonify({"message": "Failed to retrieve cart items", "error": str(e)}), 500
-    finally:
-        close_db_connection(connection)
 
 @cart_bp.route('/cart', methods=['POST'])
+@idempotent
 @track_user_action('cart_add')
 def add_to_cart():
     """
     Add a product to the cart for the logged-in user.
     Expects JSON payload: { product_id, quantity }.
     """
+    connection = None
     try:
         user_id = session.get('user_id')
         if not user_id:
@@ -79,39 +220,39 @@ def add_to_cart():
             return jsonify({"message": "Database connection failed"}), 500
 
         cursor = connection.cursor(dictionary=True)
-        check_query = """
-            SELECT quantity FROM cart_items WHERE user_id = %s AND product_id = %s
-        """
-        cursor.execute(check_query, (user_id, product_id))
+        bump_cart_version(cursor, user_id)
+        cursor.execute(queries.CART_ITEM_QUANTITY, (user_id, product_id))
         existing_item = cursor.fetchone()
 
         if existing_item:
             new_quantity = existing_item["quantity"] + quantity
-            update_query = """
-                UPDATE cart_items SET quantity = %s WHERE user_id = %s AND product_id = %s
-            """
-            cursor.execute(update_query, (new_quantity, user_id, product_id))
+            cursor.execute(queries.CART_ITEM_UPDATE_QUANTITY, (new_quantity, user_id, product_id))
         else:
-            insert_query = """
-                INSERT INTO cart_items (user_id, product_id, quantity) VALUES (%s, %s, %s)
-            """
-            cursor.execute(insert_query, (user_id, product_id, quantity))
+            cursor.execute(queries.CART_ITEM_INSERT, (user_id, product_id, quantity))
 
-        connection.commit()
+        version, items = read_cart_state(cursor, user_id)
+        response = commit_with_response(connection, cursor, (
+            jsonify({"message": "Product added to cart successfully", "cart_version": version}), 201
+        ))
+        cart_cache.put(user_id, version, items)
         CART_OPERATIONS.labels(operation='add').inc()
-        return jsonify({"message": "Product added to cart successfully"}), 201
+        return response
     except Exception as e:
+        if connection:
+            connection.rollback()
         return jsonify({"message": "Failed to add product to cart", "error": str(e)}), 500
     finally:
         close_db_connection(connection)
 
 @cart_bp.route('/cart', methods=['DELETE'])
+@idempotent
 @track_user_action('cart_remove')
 def remove_from_cart():
     """
     Remove a product from the cart for the logged-in user.
     Expects JSON payload: { product_id }.
     """
+    connection = None
     try:
         user_id = session.get('user_id')
         if not user_id:
@@ -127,19 +268,24 @@ def remove_from_cart():
         if not connection:
             return jsonify({"message": "Database connection failed"}), 500
 
-        cursor = connection.cursor()
-        delete_query = """
-            DELETE FROM cart_items WHERE user_id = %s AND product_id = %s
-        """
-        cursor.execute(delete_query, (user_id, product_id))
+        cursor = connection.cursor(dictionary=True)
+        bump_cart_version(cursor, user_id)
+        cursor.execute(queries.CART_ITEM_DELETE, (user_id, product_id))
 
         if cursor.rowcount == 0:
+            connection.rollback()
             return jsonify({"message": "Product not found in cart"}), 404
 
-        connection.commit()
+        version, items = read_cart_state(cursor, user_id)
+        response = commit_with_response(connection, cursor, (
+            jsonify({"message": "Product removed from cart successfully", "cart_version": version}), 200
+        ))
+        cart_cache.put(user_id, version, items)
         CART_OPERATIONS.labels(operation='remove').inc()
-        return jsonify({"message": "Product removed from cart successfully"}), 200
+        return response
     except Exception as e:
+        if connection:
+            connection.rollback()
         return jsonify({"message": "Failed to remove product from cart", "error": str(e)}), 500
     finally:
-        close_db_connection(connection)
\ No newline at end of file
+        close_db_connection(connection)
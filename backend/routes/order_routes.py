@@ -1,12 +1,27 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, Response, request, jsonify, session
 from flask_cors import cross_origin
 from database.db_config import get_db_connection, close_db_connection
+from database import queries
+from models.order import Order, ORDER_STATUSES
+from routes.cart_routes import cart_cache, bump_cart_version, read_cart_state
 from monitoring.prometheus_metrics import ORDER_COUNT, CART_OPERATIONS, track_order, track_user_action
+from utils.conditional import conditional, CACHE_PRIVATE
+from utils.idempotency import commit_with_response, idempotent
+from utils import outbox
+from utils.serializer import order_history_json
 import logging
 
 logger = logging.getLogger(__name__)
 order_bp = Blueprint('orders', __name__)
 
+# Maximum number of orders accepted by a single bulk status transition
+MAX_STATUS_TRANSITION_IDS = 100000
+
+def order_history_version_params():
+    """Validator parameters for the logged-in user's order history (None when logged out)."""
+    user_id = session.get('user_id')
+    return (user_id,) * 6 if user_id else None
+
 @order_bp.route('/orders', methods=['OPTIONS'])
 @cross_origin(supports_credentials=True)
 def handle_options():
@@ -14,6 +29,7 @@ def handle_options():
 
 @order_bp.route('/orders', methods=['POST'])
 @cross_origin(supports_credentials=True)
+@idempotent  # Retries with the same Idempotency-Key get the first response
 @track_order  # Add the metrics decorator
 def create_order():
     connection = None
@@ -29,14 +45,30 @@ def create_order():
         connection = get_db_connection()
         cursor = connection.cursor(dictionary=True)
 
+        # Optional: the cart_version the client rendered. Checked under the
+        # cart version lock so the cart cannot change between check and clear.
+        expected_version = data.get('cart_version')
+        if expected_version is not None:
+            cursor.execute(queries.CART_VERSION_FOR_UPDATE, (user_id,))
+            row = cursor.fetchone()
+            current_version = row['version'] if row else 0
+            if current_version != expected_version:
+                connection.rollback()
+                # The client reloads the cart next; make sure this worker re-reads it
+                cart_cache.invalidate(user_id)
+                return jsonify({
+                    "message": "Cart changed since it was displayed",
+                    "cart_version": current_version
+                }), 409
+
         # Calculate total and store current prices
         total_amount = 0
         order_items = []
         for item in data['items']:
-            cursor.execute("SELECT price FROM products WHERE id = %s", (item['product_id'],))
+            cursor.execute(queries.PRODUCT_PRICE_BY_ID, (item['product_id'],))
             product = cursor.fetchone()
             if product:
-                price = float(product['price'])
+                price = product['price']
                 quantity = item['quantity']
                 total_amount += price * quantity
                 order_items.append({
@@ -60,19 +92,32 @@ def create_order():
             )
 
         # Clear cart after successful order
-        cursor.execute("DELETE FROM cart_items WHERE user_id = %s", (user_id,))
+        bump_cart_version(cursor, user_id)
+        cursor.execute(queries.CART_CLEAR_FOR_USER, (user_id,))
+        cart_version, cart_items = read_cart_state(cursor, user_id)
         CART_OPERATIONS.labels(operation='checkout').inc()  # Track cart checkout
 
-        connection.commit()
-
-        # Increment successful order count
-        ORDER_COUNT.labels(status='success').inc()
+        # Follow-up work (emails, analytics) is delivered by the outbox worker
+        # and commits or rolls back together with the order
+        outbox.enqueue(cursor, "order.created", {
+            "order_id": order_id,
+            "user_id": user_id,
+            "total_amount": total_amount,
+            "items": order_items
+        }, aggregate_id=order_id)
 
-        return jsonify({
+        # Committed together with the stored response under an Idempotency-Key
+        response = commit_with_response(connection, cursor, (jsonify({
             "message": "Order created",
             "order_id": order_id,
             "total_amount": total_amount
-        }), 201
+        }), 201))
+        cart_cache.put(user_id, cart_version, cart_items)
+
+        # Increment successful order count
+        ORDER_COUNT.labels(status='success').inc()
+
+        return response
 
     except Exception as e:
         logger.error(f"Order creation failed: {str(e)}")
@@ -90,6 +135,8 @@ def create_order():
 
 @order_bp.route('/orders', methods=['GET'])
 @cross_origin(supports_credentials=True)
+@conditional('order_history', queries.ORDER_HISTORY_VERSION_FOR_USER,
+             params=order_history_version_params, cache_control=CACHE_PRIVATE)
 def get_user_orders():
     connection = None
     try:
@@ -98,50 +145,61 @@ def get_user_orders():
             return jsonify({"message": "User not authenticated"}), 401
 
         connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor()
 
-        # Get orders with their items
-        cursor.execute("""
-            SELECT o.*, 
-                   oi.product_id,
-                   oi.quantity,
-                   oi.price_at_time,
-                   p.name as product_name
-            FROM orders o
-            LEFT JOIN order_items oi ON o.id = oi.order_id
-            LEFT JOIN products p ON oi.product_id = p.id
-            WHERE o.user_id = %s
-            ORDER BY o.created_at DESC
-        """, (user_id,))
-
-        orders_data = cursor.fetchall()
-
-        # Process and format orders
-        orders = {}
-        for row in orders_data:
-            order_id = row['id']
-            if order_id not in orders:
-                orders[order_id] = {
-                    'id': order_id,
-                    'total_amount': float(row['total_amount']),
-                    'status': row['status'],
-                    'created_at': row['created_at'].isoformat(),
-                    'items': []
-                }
-            
-            if row['product_id']:  # Check if there are items
-                orders[order_id]['items'].append({
-                    'product_id': row['product_id'],
-                    'product_name': row['product_name'],
-                    'quantity': row['quantity'],
-                    'price_at_time': float(row['price_at_time'])
-                })
-
-        return jsonify(list(orders.values())), 200
+        # Get orders with their items, including archived orders, as plain
+        # tuples serialized straight to JSON
+        cursor.execute(queries.ORDER_HISTORY_FOR_USER, (user_id, user_id))
+        return Response(order_history_json(cursor.fetchall()), status=200, mimetype='application/json')
 
     except Exception as e:
         logger.error(f"Failed to fetch orders: {str(e)}")
         return jsonify({"message": str(e)}), 500
     finally:
         if connection:
-            close_db_connection(connection)
\ No newline at end of file
+            close_db_connection(connection)
+
+
+@order_bp.route('/orders/transitions', methods=['POST'])
+@cross_origin(supports_credentials=True)
+def transition_orders():
+    """
+    Move many orders to a new status (admin / fulfilment only).
+    Expects JSON: { "order_ids": [1, 2, 3], "status": "shipped" }
+    Orders whose current status does not allow the transition are rejected.
+    """
+    try:
+        if not session.get('user_id'):
+            return jsonify({"message": "User not authenticated"}), 401
+        if not session.get('is_admin'):
+            return jsonify({"message": "Admin privileges required"}), 403
+
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"message": "Request body must be a JSON object"}), 400
+        order_ids = data.get('order_ids')
+        target_status = data.get('status')
+
+        if target_status not in ORDER_STATUSES:
+            return jsonify({
+                "message": f"'status' must be one of: {', '.join(ORDER_STATUSES)}"
+            }), 400
+        if not isinstance(order_ids, list) or not order_ids:
+            return jsonify({"message": "A non-empty list of 'order_ids' is required"}), 400
+        if len(order_ids) > MAX_STATUS_TRANSITION_IDS:
+            return jsonify({
+                "message": f"At most {MAX_STATUS_TRANSITION_IDS} orders are allowed per request"
+            }), 400
+        if not all(isinstance(order_id, int) and not isinstance(order_id, bool) for order_id in order_ids):
+            return jsonify({"message": "'order_ids' must be integers"}), 400
+
+        result = Order.bulk_transition(order_ids, target_status)
+        return jsonify({
+            "message": "Order status transition processed",
+            "status": target_status,
+            **result
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Order status transition failed: {str(e)}")
+        return jsonify({"message": str(e)}), 500
@@ -1,5 +1,10 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 from models.product import Product
+from database import queries
+from monitoring.fast_path import CORS_METHODS, CORS_REQUEST_HEADERS
+from utils.conditional import conditional, fetch_validator_row, make_validator
+from utils.catalog_snapshot import current_catalog
+from utils.serializer import product_list_json
 import logging
 
 # Configure logging
@@ -8,19 +13,108 @@ logger = logging.getLogger(__name__)
 # Initialize Blueprint
 product_bp = Blueprint('products', __name__)
 
+# Maximum number of updates accepted by a single batch request
+MAX_BATCH_UPDATES = 5000
+
+# Maximum number of IDs accepted by a single multi-get request: the query
+# string has to fit in a URL, a POST body does not
+MAX_MULTI_GET_IDS = 200
+MAX_LOOKUP_IDS = 1000
+
+def parse_product_ids(raw_ids, max_ids=MAX_MULTI_GET_IDS):
+    """
+    Normalize product IDs from a query string or JSON body.
+    Args:
+        raw_ids (str | list): Comma-separated string or list of IDs
+        max_ids (int): Longest list accepted
+    Returns:
+        list: Positive integer IDs in request order
+    Raises:
+        ValueError: If an ID is invalid or the list is empty or too long
+    """
+    if isinstance(raw_ids, str):
+        raw_ids = [part.strip() for part in raw_ids.split(',') if part.strip()]
+    if not isinstance(raw_ids, list) or not raw_ids:
+        raise ValueError("A non-empty list of product IDs is required")
+    if len(raw_ids) > max_ids:
+        raise ValueError(f"At most {max_ids} product IDs are allowed per request")
+
+    product_ids = []
+    for raw_id in raw_ids:
+        if isinstance(raw_id, bool):
+            raise ValueError(f"Invalid product ID: {raw_id}")
+        try:
+            product_id = int(raw_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid product ID: {raw_id}")
+        if product_id <= 0 or (isinstance(raw_id, float) and product_id != raw_id):
+            raise ValueError(f"Invalid product ID: {raw_id}")
+        product_ids.append(product_id)
+    return product_ids
+
+def multi_get_response(raw_ids, max_ids=MAX_MULTI_GET_IDS):
+    """Resolve many product IDs at once, preserving request order."""
+    try:
+        product_ids = parse_product_ids(raw_ids, max_ids)
+    except ValueError as e:
+        logger.warning(f"Invalid multi-get request: {e}")
+        return jsonify({"message": str(e)}), 400
+
+    found = Product.get_products_by_ids(product_ids)
+    missing = [product_id for product_id in dict.fromkeys(product_ids) if product_id not in found]
+    logger.info(f"Multi-get resolved {len(found)} products, {len(missing)} missing")
+    return jsonify({
+        "products": [
+            found[product_id].to_dict() if product_id in found else None
+            for product_id in product_ids
+        ],
+        "missing": missing
+    }), 200
+
+def catalog_validator():
+    """
+    Validators for the full product list: the snapshot's content digest when
+    the catalog is served from the shared snapshot, else the version query.
+    """
+    if 'ids' in request.args:
+        return None
+    snapshot = current_catalog()
+    if snapshot is not None:
+        return snapshot.etag, snapshot.list_last_modified()
+    return make_validator('product_list', fetch_validator_row(queries.PRODUCT_CATALOG_VERSION, ()))
+
+def product_validator(product_id):
+    """Validators for one product, from the snapshot row or the version query."""
+    snapshot = current_catalog()
+    if snapshot is None:
+        row = fetch_validator_row(queries.PRODUCT_VERSION_BY_ID, (product_id,))
+        return make_validator('product', row, (product_id,))
+    index = snapshot.find(product_id)
+    if index is None:
+        return None
+    updated_at = snapshot.updated[index]
+    return snapshot.product_etag(index), (updated_at if updated_at < int(snapshot.built_at) else None)
+
 @product_bp.route('/products', methods=['GET'])
+@conditional('product_list', validator=catalog_validator)
 def get_all_products():
     """
     Fetch all products from the database and return them as JSON.
+    With ?ids=1,2,3 only the given products are returned, in request order,
+    with null entries and a 'missing' list for unknown IDs.
     Returns:
         - 200: List of products
+        - 400: Invalid or too many IDs
         - 500: Server error
     """
     try:
+        if 'ids' in request.args:
+            return multi_get_response(request.args.get('ids', ''))
+
         logger.debug("Attempting to fetch all products")
-        products = Product.get_all_products()
-        logger.info(f"Successfully fetched {len(products)} products")
-        return jsonify([product.to_dict() for product in products]), 200
+        body = product_list_json(Product.get_all_product_rows())
+        logger.info(f"Successfully fetched products ({len(body)} bytes)")
+        return Response(body, status=200, mimetype='application/json')
     except Exception as e:
         logger.error(f"Error fetching products: {str(e)}")
         return jsonify({
@@ -28,7 +122,28 @@ def get_all_products():
             "error": str(e)
         }), 500
 
+@product_bp.route('/products/lookup', methods=['POST'])
+def lookup_products():
+    """
+    Multi-get variant for long ID lists, up to MAX_LOOKUP_IDS.
+    Expects JSON: { "ids": [1, 2, 3] }
+    Returns:
+        - 200: {"products": [...], "missing": [...]} in request order
+        - 400: Invalid or too many IDs
+        - 500: Server error
+    """
+    try:
+        data = request.get_json(silent=True)
+        return multi_get_response(data.get('ids') if isinstance(data, dict) else data, MAX_LOOKUP_IDS)
+    except Exception as e:
+        logger.error(f"Error looking up products: {str(e)}")
+        return jsonify({
+            "message": "Failed to fetch products",
+            "error": str(e)
+        }), 500
+
 @product_bp.route('/products/<int:product_id>', methods=['GET'])
+@conditional('product', validator=product_validator)
 def get_product(product_id):
     """
     Fetch a single product by ID and return it as JSON.
@@ -161,6 +276,49 @@ def update_product(product_id):
             "error": str(e)
         }), 500
 
+@product_bp.route('/products', methods=['PATCH'])
+def bulk_update_products():
+    """
+    Apply partial updates to many products in one request.
+    Expects a JSON array (or {"updates": [...]}) of objects with 'id' and
+    any of: name, price, description, stock
+    Returns:
+        - 200: Per-product results in request order
+        - 400: Bad request (not a list, empty or too many updates)
+        - 500: Server error
+    """
+    try:
+        data = request.get_json()
+        updates = data.get('updates') if isinstance(data, dict) else data
+        if not isinstance(updates, list) or not updates:
+            logger.warning("Bulk update request without a list of updates")
+            return jsonify({"message": "A non-empty list of updates is required"}), 400
+        if len(updates) > MAX_BATCH_UPDATES:
+            logger.warning(f"Bulk update request with {len(updates)} updates rejected")
+            return jsonify({
+                "message": f"At most {MAX_BATCH_UPDATES} updates are allowed per request"
+            }), 400
+
+        logger.debug(f"Bulk updating {len(updates)} products")
+        results = Product.bulk_update_products(updates)
+
+        summary = {}
+        for result in results:
+            summary[result["status"]] = summary.get(result["status"], 0) + 1
+        logger.info(f"Bulk product update finished: {summary}")
+
+        return jsonify({
+            "message": "Bulk update processed",
+            "summary": summary,
+            "results": results
+        }), 200
+    except Exception as e:
+        logger.error(f"Error in bulk product update: {str(e)}")
+        return jsonify({
+            "message": "Failed to update products",
+            "error": str(e)
+        }), 500
+
 @product_bp.route('/products/<int:product_id>', methods=['DELETE'])
 def delete_product(product_id):
     """
@@ -194,6 +352,6 @@ def delete_product(product_id):
 def handle_preflight():
     if request.method == "OPTIONS":
         response = jsonify({"message": "preflight"})
-        response.headers.add('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        response.headers.add('Access-Control-Allow-Methods', ', '.join(CORS_METHODS))
+        response.headers.add('Access-Control-Allow-Headers', ', '.join(CORS_REQUEST_HEADERS))
         return response, 200
\ No newline at end of file
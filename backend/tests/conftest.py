@@ -0,0 +1,69 @@
+"""
+Shared fixtures.
+
+Most tests need no services. Tests using the mysql_db fixture run against the
+database named by TEST_DB_NAME and are skipped when it is not set or not
+reachable. Its settings replace DB_* before any backend module reads them,
+so they never touch the database .env points at:
+
+    TEST_DB_NAME=ecommerce_test TEST_DB_HOST=127.0.0.1 TEST_DB_USER=root \
+    TEST_DB_PASSWORD=... python -m pytest
+"""
+import os
+
+import pytest
+
+TEST_DB_NAME = os.getenv("TEST_DB_NAME")
+
+if TEST_DB_NAME:
+    if TEST_DB_NAME == os.getenv("DB_NAME"):
+        raise pytest.UsageError("TEST_DB_NAME must not be the application database")
+    os.environ["DB_NAME"] = TEST_DB_NAME
+    for var in ("DB_HOST", "DB_USER", "DB_PASSWORD"):
+        if os.getenv(f"TEST_{var}"):
+            os.environ[var] = os.environ[f"TEST_{var}"]
+
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), os.pardir, "database", "01_schema.sql")
+
+
+def schema_statements():
+    """01_schema.sql without its CREATE DATABASE / USE, so it loads into the test database."""
+    with open(SCHEMA_FILE, encoding="utf-8") as f:
+        sql = "\n".join(line for line in f if not line.lstrip().startswith("--"))
+    for statement in sql.split(";"):
+        statement = statement.strip()
+        if statement and not statement.upper().startswith(("CREATE DATABASE", "USE ")):
+            yield statement
+
+
+@pytest.fixture(scope="session")
+def mysql_db():
+    """
+    The test database with the base schema and all migrations applied.
+    Returns:
+        dict: The connection settings (database.db_config.DB_CONFIG).
+    """
+    if not TEST_DB_NAME:
+        pytest.skip("TEST_DB_NAME is not set")
+
+    import mysql.connector
+    from mysql.connector import Error
+    from database.db_config import DB_CONFIG
+    from database.migrate import run_migrations
+
+    try:
+        connection = mysql.connector.connect(**{**DB_CONFIG, "connect_timeout": 3})
+    except Error as e:
+        pytest.skip(f"MySQL test database is not reachable: {e}")
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SHOW TABLES LIKE 'products'")
+        if cursor.fetchone() is None:
+            for statement in schema_statements():
+                cursor.execute(statement)
+            connection.commit()
+    finally:
+        connection.close()
+
+    run_migrations()
+    return DB_CONFIG
@@ -0,0 +1,49 @@
+from utils import archiver
+
+
+class SkippedCursor:
+    """Every scan finds candidates, but all of them are locked by live transactions."""
+
+    def __init__(self):
+        self.executed = []
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        statement = " ".join(sql.split())
+        self.executed.append(statement)
+        if statement.endswith("SKIP LOCKED"):
+            self._rows = []
+        else:
+            start = params[0]
+            self._rows = [(start + 1,), (start + 2,)]
+
+    def fetchall(self):
+        return self._rows
+
+
+class StubConnection:
+    def __init__(self):
+        self.cursor_ = SkippedCursor()
+        self.rollbacks = 0
+
+    def cursor(self):
+        return self.cursor_
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def commit(self):
+        raise AssertionError("nothing to commit")
+
+
+def test_fully_skipped_chunks_count_and_pause(monkeypatch):
+    connection = StubConnection()
+    sleeps = []
+    monkeypatch.setattr(archiver, "get_db_connection", lambda: connection)
+    monkeypatch.setattr(archiver, "close_db_connection", lambda connection: None)
+    monkeypatch.setattr(archiver.time, "sleep", sleeps.append)
+
+    assert archiver.archive_orders(batch_size=2, sleep_seconds=0.25, max_batches=3) == 0
+    assert sleeps == [0.25, 0.25, 0.25]
+    assert connection.rollbacks == 3
+    assert not any(statement.startswith(("INSERT", "DELETE")) for statement in connection.cursor_.executed)
@@ -0,0 +1,94 @@
+import pytest
+from werkzeug.test import EnvironBuilder
+
+from utils.assets import AssetManifest, parse_accept_encoding
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    (tmp_path / "styles.css").write_text("body { color: red; }\n" * 100)
+    (tmp_path / "index.html").write_text('<link rel="stylesheet" href="styles.css">' + "<p>hi</p>" * 100)
+    return AssetManifest(str(tmp_path))
+
+
+def fetch(asset, **headers):
+    captured = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        captured["status"] = int(status.split()[0])
+        captured["headers"] = dict(response_headers)
+
+    body = b"".join(asset(EnvironBuilder(headers=headers).get_environ(), start_response))
+    return captured["status"], captured["headers"], body
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip;q=0, br; q=0.5, *;q=0.1, deflate") == {
+        "gzip": 0.0, "br": 0.5, "*": 0.1, "deflate": 1.0,
+    }
+    assert parse_accept_encoding("gzip;q=bogus") == {"gzip": 0.0}
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("GZIP;q=0.5, identity", "gzip"),
+    ("*", "gzip"),
+    ("*, gzip;q=0", None),
+    ("deflate", None),
+])
+def test_select_honours_q_values(manifest, accept_encoding, expected):
+    asset = manifest.get("/styles.css")
+    assert asset.select(accept_encoding)[0] == expected
+
+
+def test_each_encoding_has_its_own_etag(manifest):
+    asset = manifest.get("/styles.css")
+    _, identity, plain = fetch(asset)
+    _, gzipped, compressed = fetch(asset, **{"Accept-Encoding": "gzip"})
+    assert identity["ETag"] != gzipped["ETag"]
+    assert gzipped["ETag"] == identity["ETag"][:-1] + '-gz"'
+    assert gzipped["Content-Encoding"] == "gzip" and len(compressed) < len(plain)
+    assert identity["Vary"] == gzipped["Vary"] == "Accept-Encoding"
+
+
+def test_not_modified_only_for_the_same_representation(manifest):
+    asset = manifest.get("/styles.css")
+    _, gzipped, _ = fetch(asset, **{"Accept-Encoding": "gzip"})
+    status, headers, _ = fetch(asset, **{"Accept-Encoding": "gzip", "If-None-Match": gzipped["ETag"]})
+    assert status == 304 and headers["ETag"] == gzipped["ETag"]
+    assert fetch(asset, **{"If-None-Match": gzipped["ETag"]})[0] == 200
+    assert fetch(asset, **{"Accept-Encoding": "gzip", "If-None-Match": "W/" + gzipped["ETag"]})[0] == 304
+
+
+def test_html_points_at_fingerprinted_assets(manifest):
+    _, _, body = fetch(manifest.get("/index.html"))
+    fingerprinted = manifest.fingerprints["/styles.css"]
+    assert f'href="{fingerprinted}"'.encode() in body
+    assert manifest.get(fingerprinted).cache_control.endswith("immutable")
+
+
+def test_large_assets_fingerprinted_by_content(tmp_path, monkeypatch):
+    import hashlib
+    import os
+    from utils import assets
+
+    monkeypatch.setattr(assets, "ASSET_MEMORY_LIMIT", 1024)
+    monkeypatch.setattr(assets, "HASH_CHUNK_SIZE", 1000)
+    video = tmp_path / "intro.webm"
+    content = bytes(range(256)) * 20
+    video.write_bytes(content)
+    os.utime(video, (0, 0))
+    manifest = AssetManifest(str(tmp_path))
+
+    fingerprinted = manifest.fingerprints["/intro.webm"]
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    assert fingerprinted == f"/intro.{digest[:10]}.webm"
+    asset = manifest.get(fingerprinted)
+    assert asset.body is None and asset.etag == f'"{digest}"'
+    assert fetch(asset)[2] == content
+
+    # Touching the file without changing it keeps the URL
+    os.utime(video, (86400, 86400))
+    assert AssetManifest(str(tmp_path)).fingerprints["/intro.webm"] == fingerprinted
@@ -0,0 +1,21 @@
+import pytest
+
+from routes.bootstrap_routes import BOOTSTRAP_PARTS, parse_include
+
+
+def test_parts_come_back_in_canonical_order():
+    assert parse_include("catalog_version, auth") == ["auth", "catalog_version"]
+
+
+def test_duplicates_and_blanks_are_dropped():
+    assert parse_include("cart_summary,,cart_summary, ") == ["cart_summary"]
+    assert parse_include("") == []
+
+
+def test_all_parts():
+    assert parse_include(",".join(reversed(BOOTSTRAP_PARTS))) == list(BOOTSTRAP_PARTS)
+
+
+def test_unknown_part():
+    with pytest.raises(ValueError, match="Unknown include: orders"):
+        parse_include("auth,orders")
@@ -0,0 +1,85 @@
+from database import queries
+from routes import cart_routes
+from routes.cart_routes import CartCache, CartEntry
+
+
+def items(name="Pen", count=1):
+    return [{"product_id": n, "name": name, "price": 1.0, "quantity": 1, "total_price": 1.0}
+            for n in range(count)]
+
+
+def entry_size(count=1):
+    return CartEntry(0, items(count=count)).size
+
+
+def test_least_recently_used_is_evicted_first():
+    cache = CartCache(max_bytes=entry_size() * 2)
+    cache.put(1, 1, items())
+    cache.put(2, 1, items())
+    cache.get(1)
+    cache.put(3, 1, items())
+    assert list(cache.entries) == [1, 3]
+    assert cache.bytes == entry_size() * 2
+
+
+def test_eviction_is_by_bytes():
+    cache = CartCache(max_bytes=entry_size(10) + entry_size())
+    cache.put(1, 1, items())
+    cache.put(2, 1, items())
+    cache.put(3, 1, items(count=10))
+    assert list(cache.entries) == [2, 3]
+
+
+def test_replacing_an_entry_keeps_byte_count():
+    cache = CartCache(max_bytes=10 ** 6)
+    cache.put(1, 1, items(count=5))
+    cache.put(1, 2, items(count=1))
+    assert cache.bytes == entry_size(1)
+    cache.invalidate(1)
+    assert cache.bytes == 0 and not cache.entries
+
+
+def test_older_version_does_not_replace_newer():
+    cache = CartCache(max_bytes=10 ** 6)
+    cache.put(1, 5, items(count=2))
+    assert cache.put(1, 4, items(count=1)).version == 5
+    assert len(cache.entries[1].items) == 2
+
+
+class VersionCursor:
+    """Dictionary-cursor stand-in answering the cart version and items queries."""
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.rows = rows
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+    def fetchone(self):
+        return {"version": self.version} if self.version else None
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_cached_cart_reuses_entry_while_version_matches(monkeypatch):
+    cache = CartCache(max_bytes=10 ** 6)
+    monkeypatch.setattr(cart_routes, "cart_cache", cache)
+    cache.put(1, 3, items())
+    cursor = VersionCursor(3, [])
+    assert cart_routes.cached_cart(cursor, 1).version == 3
+    assert cursor.statements == [queries.CART_VERSION_FOR_USER]
+
+
+def test_cached_cart_rereads_a_cart_changed_elsewhere(monkeypatch):
+    cache = CartCache(max_bytes=10 ** 6)
+    monkeypatch.setattr(cart_routes, "cart_cache", cache)
+    cache.put(1, 3, items())
+    rows = [{"product_id": 9, "name": "Ink", "price": 2.0, "quantity": 2}]
+    cursor = VersionCursor(4, rows)
+    entry = cart_routes.cached_cart(cursor, 1)
+    assert queries.CART_ITEMS_FOR_USER in cursor.statements
+    assert (entry.version, entry.items[0]["total_price"]) == (4, 4.0)
+    assert cache.entries[1] is entry
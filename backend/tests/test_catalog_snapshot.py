@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+import pytest
+
+from utils.catalog_snapshot import CatalogSnapshot, SnapshotPublisher, write_snapshot
+
+ROWS = [
+    (3, "Laptop", Decimal("999.99"), 10, "Fast", 1700000000),
+    (7, "Café crème", Decimal("3.50"), None, None, 1700000500),
+    (12, "Cable", Decimal("0.99"), 200, "USB-C, 1m", 1700000100),
+]
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    assert write_snapshot(path, 4, ROWS) == 3
+    return CatalogSnapshot(path)
+
+
+def test_round_trip(snapshot):
+    assert snapshot.generation == 4
+    assert snapshot.count == 3
+    assert snapshot.last_modified == 1700000500
+    assert list(snapshot.rows()) == [(3, "Laptop", Decimal("999.99")),
+                                     (7, "Café crème", Decimal("3.50")),
+                                     (12, "Cable", Decimal("0.99"))]
+    index = snapshot.find(7)
+    assert snapshot.description(index) == ""
+    assert snapshot.stock[index] == 0
+    assert snapshot.description(snapshot.find(12)) == "USB-C, 1m"
+
+
+def test_find_missing(snapshot):
+    assert [snapshot.find(product_id) for product_id in (1, 5, 13)] == [None, None, None]
+
+
+def test_empty_catalog(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    write_snapshot(path, 1, [])
+    snapshot = CatalogSnapshot(path)
+    assert snapshot.count == 0
+    assert snapshot.find(1) is None
+    assert list(snapshot.rows()) == []
+
+
+def test_etag_follows_content(tmp_path, snapshot):
+    path = str(tmp_path / "other.snap")
+    write_snapshot(path, 5, ROWS)
+    assert CatalogSnapshot(path).etag == snapshot.etag
+    changed = [ROWS[0][:2] + (Decimal("899.99"),) + ROWS[0][3:]] + ROWS[1:]
+    write_snapshot(path, 6, changed)
+    other = CatalogSnapshot(path)
+    assert other.etag != snapshot.etag
+    assert other.product_etag(0) != snapshot.product_etag(0)
+    assert other.product_etag(1) == snapshot.product_etag(1)
+
+
+def test_list_last_modified_needs_a_settled_second(snapshot):
+    assert snapshot.list_last_modified() == 1700000500
+    snapshot.last_modified = int(snapshot.built_at)
+    assert snapshot.list_last_modified() is None
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "catalog.snap"
+    path.write_bytes(b"\0" * 256)
+    with pytest.raises(ValueError):
+        CatalogSnapshot(str(path))
+
+
+class VersionReader:
+    """Stand-in SnapshotReader: no refresh requests, a fixed current snapshot."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def control(self):
+        return [self.snapshot.generation, 0]
+
+    def current(self):
+        return self.snapshot
+
+
+class VersionConnection:
+    """Stand-in connection returning the snapshot's own catalog version."""
+
+    def __init__(self, snapshot):
+        self.version = {"row_count": snapshot.count, "last_modified": snapshot.last_modified}
+
+    def cursor(self, dictionary=False):
+        return self
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchone(self):
+        return self.version
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("same_second, rebuilt", [(False, False), (True, True)])
+def test_publisher_rebuilds_until_the_snapshot_settles(snapshot, monkeypatch, same_second, rebuilt):
+    if same_second:
+        snapshot.last_modified = int(snapshot.built_at)
+    publisher = SnapshotPublisher(VersionReader(snapshot))
+    publisher._connection = VersionConnection(snapshot)
+    published = []
+    monkeypatch.setattr(publisher, "publish", lambda: published.append(True))
+    publisher.check()
+    assert bool(published) is rebuilt
@@ -0,0 +1,119 @@
+import uuid
+
+import pytest
+from flask import Flask
+
+from utils.conditional import is_not_modified, make_validator
+
+DB_NOW = 1700000100
+ROW = {"row_count": 3, "archived_count": 1, "item_count": 7, "archived_item_count": 2,
+       "orders_modified": 1700000000, "archive_modified": None, "products_modified": 1699990000,
+       "db_now": DB_NOW}
+
+
+@pytest.fixture
+def request_context():
+    app = Flask(__name__)
+
+    def context(**headers):
+        return app.test_request_context("/api/orders", headers=headers)
+    return context
+
+
+def test_validator_uses_newest_modified_column():
+    etag, last_modified = make_validator("order_history", ROW, (5,))
+    assert last_modified == 1700000000
+    assert len(etag) == 20
+
+
+def test_validator_depends_on_every_column_and_the_scope():
+    etag, _ = make_validator("order_history", ROW, (5,))
+    assert make_validator("order_history", ROW, (6,))[0] != etag
+    assert make_validator("product_list", ROW, (5,))[0] != etag
+    # A product delete only removes order items: no *_modified column moves
+    assert make_validator("order_history", {**ROW, "item_count": 6}, (5,))[0] != etag
+    assert make_validator("order_history", {**ROW, "archived_item_count": 1}, (5,))[0] != etag
+
+
+def test_no_validator_within_the_current_second():
+    assert make_validator("order_history", {**ROW, "orders_modified": DB_NOW}, (5,)) is None
+    assert make_validator("order_history", {**ROW, "orders_modified": DB_NOW + 1}, (5,)) is None
+    assert make_validator("order_history", {**ROW, "orders_modified": DB_NOW - 1}, (5,)) is not None
+
+
+def test_missing_resource_has_no_validator():
+    assert make_validator("product", None, (1,)) is None
+
+
+def test_validator_without_modified_columns():
+    etag, last_modified = make_validator("cart", {"version": 4, "db_now": DB_NOW}, (5,))
+    assert etag and last_modified is None
+
+
+def test_if_none_match(request_context):
+    etag, last_modified = make_validator("order_history", ROW, (5,))
+    with request_context(**{"If-None-Match": f'W/"{etag}"'}):
+        assert is_not_modified(etag, last_modified)
+    with request_context(**{"If-None-Match": "*"}):
+        assert is_not_modified(etag, last_modified)
+    with request_context(**{"If-None-Match": '"other"'}):
+        assert not is_not_modified(etag, last_modified)
+
+
+def test_if_modified_since(request_context):
+    with request_context(**{"If-Modified-Since": "Tue, 14 Nov 2023 22:13:20 GMT"}):
+        assert is_not_modified("etag", 1700000000)
+        assert not is_not_modified("etag", 1700000001)
+        assert not is_not_modified("etag", None)
+
+
+def test_if_none_match_takes_precedence(request_context):
+    etag, last_modified = make_validator("order_history", ROW, (5,))
+    headers = {"If-None-Match": '"stale"', "If-Modified-Since": "Tue, 14 Nov 2023 22:13:20 GMT"}
+    with request_context(**headers):
+        assert not is_not_modified(etag, last_modified)
+
+
+def test_no_preconditions(request_context):
+    with request_context():
+        assert not is_not_modified("etag", 1700000000)
+
+
+@pytest.mark.mysql
+def test_order_history_validator_sees_product_delete(mysql_db):
+    import mysql.connector
+    from database import queries
+
+    connection = mysql.connector.connect(**mysql_db)
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("INSERT INTO users (username, password) VALUES (%s, 'x')",
+                       (f"history_{uuid.uuid4().hex[:12]}",))
+        user_id = cursor.lastrowid
+        product_ids = []
+        for name in ("Deleted product", "Kept product"):
+            cursor.execute("INSERT INTO products (name, price, stock) VALUES (%s, 5.00, 1)", (name,))
+            product_ids.append(cursor.lastrowid)
+        cursor.execute("INSERT INTO orders (user_id, total_amount) VALUES (%s, 10.00)", (user_id,))
+        order_id = cursor.lastrowid
+        for product_id in product_ids:
+            cursor.execute("INSERT INTO order_items (order_id, product_id, quantity, price_at_time) "
+                           "VALUES (%s, %s, 1, 5.00)", (order_id, product_id))
+        connection.commit()
+
+        cursor.execute(queries.ORDER_HISTORY_VERSION_FOR_USER, (user_id,) * 6)
+        before = cursor.fetchone()
+        cursor.execute("DELETE FROM products WHERE id = %s", (product_ids[0],))
+        connection.commit()
+        cursor.execute(queries.ORDER_HISTORY_VERSION_FOR_USER, (user_id,) * 6)
+        after = cursor.fetchone()
+
+        # The older product goes, so no *_modified column moves
+        assert before["products_modified"] == after["products_modified"]
+        assert (before["item_count"], after["item_count"]) == (2, 1)
+        # Pin db_now so only the validator columns differ
+        assert (make_validator("order_history", {**before, "db_now": DB_NOW * 2}, (user_id,))
+                != make_validator("order_history", {**after, "db_now": DB_NOW * 2}, (user_id,)))
+    finally:
+        connection.rollback()
+        connection.close()
@@ -0,0 +1,185 @@
+import pytest
+from flask import Flask, jsonify
+from mysql.connector import Error, errorcode
+
+from database.deadlines import (
+    Deadline,
+    DeadlineConnection,
+    DeadlineExceeded,
+    current_deadline,
+    deadline_connection,
+    set_deadline,
+)
+
+
+class StubCursor:
+    def __init__(self, log, error=None):
+        self.log = log
+        self.error = error
+
+    def execute(self, operation, params=None):
+        self.log.append((operation, params))
+        if self.error is not None and not operation.startswith("SET SESSION"):
+            raise self.error
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    """Records every statement run on any of its cursors."""
+
+    def __init__(self, error=None):
+        self.log = []
+        self.error = error
+
+    def cursor(self, *args, **kwargs):
+        return StubCursor(self.log, self.error)
+
+
+def connect(budget, error=None):
+    raw = StubConnection(error)
+    deadline = Deadline("read", budget)
+    return DeadlineConnection(raw, deadline), raw, deadline
+
+
+@pytest.fixture(autouse=True)
+def no_deadline_left_behind():
+    yield
+    set_deadline(None)
+
+
+def test_select_gets_max_execution_time_hint():
+    connection, raw, _ = connect(2.5)
+    connection.cursor().execute("  select id FROM products WHERE id = %s", (1,))
+    (operation, params), = raw.log
+    assert operation.startswith("SELECT /*+ MAX_EXECUTION_TIME(")
+    assert operation.endswith("*/ id FROM products WHERE id = %s")
+    assert 2000 < int(operation.split("(")[1].split(")")[0]) <= 2500
+    assert params == (1,)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT version FROM cart_versions WHERE user_id = %s FOR UPDATE",
+    "SELECT id FROM orders WHERE id = %s for share",
+    "SELECT id FROM orders WHERE id = %s LOCK IN SHARE MODE",
+    "UPDATE products SET stock = stock - 1 WHERE id = %s",
+])
+def test_locking_statements_lower_lock_wait_instead(sql):
+    connection, raw, _ = connect(2.5)
+    connection.cursor().execute(sql, (1,))
+    assert raw.log == [("SET SESSION innodb_lock_wait_timeout = %s", (3,)), (sql, (1,))]
+
+
+def test_lock_wait_only_set_again_when_it_drops_a_whole_second():
+    connection, raw, deadline = connect(2.5)
+    cursor = connection.cursor()
+    cursor.execute("DELETE FROM cart_items WHERE id = %s", (1,))
+    cursor.execute("DELETE FROM cart_items WHERE id = %s", (2,))
+    assert [params for operation, params in raw.log if operation.startswith("SET")] == [(3,)]
+    deadline.expires_at -= 1.5
+    cursor.execute("DELETE FROM cart_items WHERE id = %s", (3,))
+    assert [params for operation, params in raw.log if operation.startswith("SET")] == [(3,), (1,)]
+
+
+def test_select_refused_after_the_deadline():
+    connection, raw, deadline = connect(-0.1)
+    with pytest.raises(DeadlineExceeded):
+        connection.cursor().execute("SELECT 1")
+    assert raw.log == []
+    assert deadline.failure == "query"
+
+
+def test_writes_still_run_after_the_deadline():
+    connection, raw, deadline = connect(-0.1)
+    connection.cursor().execute("UPDATE idempotency_keys SET status = 'released' WHERE id = %s", (1,))
+    assert raw.log[0] == ("SET SESSION innodb_lock_wait_timeout = %s", (1,))
+    assert len(raw.log) == 2
+    assert deadline.failure is None
+
+
+@pytest.mark.parametrize("sql, errno, stage", [
+    ("SELECT * FROM products", errorcode.ER_QUERY_TIMEOUT, "query"),
+    ("UPDATE products SET stock = 1", errorcode.ER_LOCK_WAIT_TIMEOUT, "lock"),
+])
+def test_mysql_timeouts_mark_the_deadline(sql, errno, stage):
+    connection, _, deadline = connect(2.5, error=Error(errno=errno))
+    with pytest.raises(Error):
+        connection.cursor().execute(sql)
+    assert deadline.failure == stage
+
+
+def test_other_errors_leave_the_deadline_alone():
+    connection, _, deadline = connect(2.5, error=Error(errno=errorcode.ER_DUP_ENTRY))
+    with pytest.raises(Error):
+        connection.cursor().execute("INSERT INTO cart_items VALUES (1)")
+    assert deadline.failure is None
+
+
+def test_connections_only_wrapped_under_a_deadline():
+    raw = StubConnection()
+    assert deadline_connection(raw) is raw
+    set_deadline(Deadline("read", 1))
+    assert isinstance(deadline_connection(raw), DeadlineConnection)
+    assert deadline_connection(None) is None
+
+
+@pytest.fixture
+def app():
+    from utils.request_deadlines import init_request_deadlines
+
+    app = Flask(__name__)
+
+    @app.route("/api/products")
+    def products():
+        return jsonify({"message": "view result"}), 500
+
+    init_request_deadlines(app)
+    return app
+
+
+def respond(app, deadline):
+    with app.test_request_context("/api/products"):
+        set_deadline(deadline)
+        return app.full_dispatch_request()
+
+
+def test_pool_deadline_answers_503(app):
+    from utils.rate_limit import LOAD_SHED_RETRY_AFTER
+
+    deadline = Deadline("browse", 2)
+    deadline.fail("pool")
+    response = respond(app, deadline)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(LOAD_SHED_RETRY_AFTER)
+    assert response.headers["Cache-Control"] == "no-store"
+    assert response.get_json()["stage"] == "pool"
+
+
+@pytest.mark.parametrize("stage", ["query", "lock"])
+def test_query_and_lock_deadlines_answer_504(app, stage):
+    deadline = Deadline("browse", 2)
+    deadline.fail(stage)
+    response = respond(app, deadline)
+    assert response.status_code == 504
+    assert response.get_json() == {"message": "Request timed out", "error": "deadline_exceeded",
+                                   "stage": stage, "deadline_ms": 2000}
+
+
+def test_response_untouched_without_a_failure(app):
+    assert respond(app, Deadline("browse", 2)).get_json() == {"message": "view result"}
+    assert respond(app, None).status_code == 500
+    assert current_deadline() is None
+
+
+def test_client_can_only_shorten_the_budget():
+    from utils.rate_limit import classify
+    from utils.request_deadlines import DEADLINE_MIN_MS, DEADLINES, request_budget
+
+    route_class = classify("GET", "/api/products")
+    budget = DEADLINES[route_class.name]
+    assert request_budget(route_class, {}) == budget
+    assert request_budget(route_class, {"HTTP_X_REQUEST_TIMEOUT_MS": "500"}) == min(budget, 0.5)
+    assert request_budget(route_class, {"HTTP_X_REQUEST_TIMEOUT_MS": "999999"}) == budget
+    assert request_budget(route_class, {"HTTP_X_REQUEST_TIMEOUT_MS": "1"}) == DEADLINE_MIN_MS / 1000
+    assert request_budget(route_class, {"HTTP_X_REQUEST_TIMEOUT_MS": "soon"}) == budget
@@ -0,0 +1,55 @@
+import pytest
+
+from monitoring.fast_path import CORS_REQUEST_HEADERS, FastPathMiddleware
+
+
+def passthrough(environ, start_response):
+    start_response('200 OK', [])
+    return [b'app']
+
+
+def call(middleware, **environ):
+    captured = {}
+
+    def start_response(status, headers):
+        captured["status"] = status
+        captured["headers"] = dict(headers)
+
+    body = b''.join(middleware(environ, start_response))
+    return captured["status"], captured["headers"], body
+
+
+def test_preflight_allows_every_request_header():
+    requested = ", ".join(header.lower() for header in CORS_REQUEST_HEADERS) + ", x-unknown"
+    status, headers, _ = call(FastPathMiddleware(passthrough, {}),
+                              REQUEST_METHOD='OPTIONS', PATH_INFO='/api/orders',
+                              HTTP_ORIGIN='http://shop.example',
+                              HTTP_ACCESS_CONTROL_REQUEST_HEADERS=requested)
+    assert status == '204 No Content'
+    allowed = headers['Access-Control-Allow-Headers'].split(', ')
+    assert allowed == [header.lower() for header in CORS_REQUEST_HEADERS]
+    assert 'x-request-timeout-ms' in allowed
+    assert headers['Access-Control-Allow-Origin'] == 'http://shop.example'
+
+
+def test_requests_without_origin_reach_the_app():
+    status, _, body = call(FastPathMiddleware(passthrough, {}),
+                           REQUEST_METHOD='OPTIONS', PATH_INFO='/api/orders')
+    assert (status, body) == ('200 OK', b'app')
+
+
+@pytest.mark.parametrize("fast_path", ["true", "false"])
+def test_app_preflight_allows_deadline_header(monkeypatch, fast_path):
+    from werkzeug.test import Client
+    from app import create_app
+
+    # Answered by the fast path, or by flask-cors when it is switched off
+    monkeypatch.setenv("FAST_PATH_ENABLED", fast_path)
+    # No pool warm-up, health sampler or snapshot publisher threads for a throwaway app
+    monkeypatch.setenv("DEFER_BACKGROUND_SERVICES", "true")
+    response = Client(create_app()).options(
+        '/api/products', headers={'Origin': 'http://shop.example',
+                                  'Access-Control-Request-Method': 'GET',
+                                  'Access-Control-Request-Headers': 'X-Request-Timeout-Ms'})
+    assert response.status_code in (200, 204)
+    assert 'x-request-timeout-ms' in response.headers['Access-Control-Allow-Headers'].lower()
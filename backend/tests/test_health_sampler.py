@@ -0,0 +1,67 @@
+import pytest
+
+from monitoring import health_sampler
+from monitoring.health_sampler import HEALTH_POOL_EXHAUSTED_WINDOW, HealthSampler, get_health_snapshot
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def sampler(monkeypatch):
+    clock = Clock()
+    pool = {"size": 10, "in_use": 10, "exhausted": 1, "last_exhausted_at": None}
+    sampler = HealthSampler(interval=HEALTH_POOL_EXHAUSTED_WINDOW)
+    sampler.latency_ms = 5.0
+    sampler.clock, sampler.pool = clock, pool
+    monkeypatch.setattr(health_sampler.time, "time", clock.time)
+    monkeypatch.setattr(health_sampler, "get_pool_stats", lambda: dict(pool))
+    monkeypatch.setattr(health_sampler, "is_pool_ready", lambda: True)
+    monkeypatch.setattr(sampler, "probe_db", lambda: sampler.latency_ms)
+    monkeypatch.setattr(sampler, "is_alive", lambda: True)
+    monkeypatch.setattr(health_sampler, "_sampler", sampler)
+    return sampler
+
+
+def advance(sampler, seconds, exhausted=False):
+    sampler.clock.now += seconds
+    if exhausted:
+        sampler.pool["last_exhausted_at"] = sampler.clock.now
+    sampler.sample()
+    return get_health_snapshot()
+
+
+def test_short_exhaustion_is_only_degraded(sampler):
+    is_ready, checks = advance(sampler, 0, exhausted=True)
+    assert is_ready and checks["degraded"] == ["connection pool exhausted"]
+    # Cleared once the pool has not run out for a whole window
+    is_ready, checks = advance(sampler, HEALTH_POOL_EXHAUSTED_WINDOW)
+    assert is_ready and checks["degraded"] == [] and checks["pool_exhausted_seconds"] is None
+
+
+def test_sustained_exhaustion_fails_readiness(sampler):
+    advance(sampler, 0, exhausted=True)
+    is_ready, _ = advance(sampler, HEALTH_POOL_EXHAUSTED_WINDOW / 2, exhausted=True)
+    assert is_ready
+    is_ready, checks = advance(sampler, HEALTH_POOL_EXHAUSTED_WINDOW / 2, exhausted=True)
+    assert not is_ready
+    assert checks["reasons"] == [f"connection pool exhausted for {HEALTH_POOL_EXHAUSTED_WINDOW:.0f}s"]
+
+
+def test_sustained_latency_fails_readiness(sampler):
+    sampler.latency_ms = health_sampler.HEALTH_DB_LATENCY_LIMIT_MS * 2
+    assert advance(sampler, 0)[1]["degraded"] == ["database latency above limit"]
+    is_ready, checks = advance(sampler, HEALTH_POOL_EXHAUSTED_WINDOW)
+    assert not is_ready and checks["reasons"][0].startswith("database latency above limit")
+
+
+def test_non_strict_readiness_only_reports_degraded(sampler, monkeypatch):
+    monkeypatch.setattr(health_sampler, "READINESS_STRICT", False)
+    for _ in range(4):
+        is_ready, checks = advance(sampler, HEALTH_POOL_EXHAUSTED_WINDOW / 2, exhausted=True)
+    assert is_ready and checks["degraded"] == ["connection pool exhausted"]
@@ -0,0 +1,39 @@
+from flask import Flask, g, jsonify
+
+from database import queries
+from utils.idempotency import commit_with_response
+
+
+class RecordingConnection:
+    """Connection and cursor stand-in that records statements and commits in order."""
+
+    def __init__(self):
+        self.log = []
+
+    def execute(self, sql, params=None):
+        self.log.append((sql, params))
+
+    def commit(self):
+        self.log.append("commit")
+
+
+def test_response_is_stored_in_the_views_transaction():
+    connection = RecordingConnection()
+    with Flask(__name__).test_request_context():
+        g.idempotency_scope = (1, "orders.create_order", "key-1")
+        response = commit_with_response(connection, connection, (jsonify({"order_id": 7}), 201))
+        assert g.idempotency_completed
+    assert response.status_code == 201
+    (sql, params), committed = connection.log
+    assert sql == queries.IDEMPOTENCY_COMPLETE
+    assert params == (201, response.get_data(as_text=True), 1, "orders.create_order", "key-1")
+    assert committed == "commit"
+
+
+def test_plain_commit_without_a_key():
+    connection = RecordingConnection()
+    with Flask(__name__).test_request_context():
+        response = commit_with_response(connection, connection, jsonify({"ok": True}))
+        assert not g.idempotency_completed
+    assert response.status_code == 200
+    assert connection.log == ["commit"]
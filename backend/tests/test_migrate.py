@@ -0,0 +1,81 @@
+import importlib.util
+import os
+
+import pytest
+from mysql.connector import Error
+
+from database.migrate import MIGRATIONS_DIR, Migrator
+
+
+class StubConnection:
+    """Stand-in connection that records statements, commits and rollbacks."""
+
+    def __init__(self, fail_on=None, indexes=()):
+        self.fail_on = fail_on
+        self.indexes = set(indexes)
+        self.executed = []
+        self.committed = []
+        self.rolled_back = False
+        self._row = None
+
+    def cursor(self):
+        return self
+
+    def execute(self, statement, params=None):
+        if self.fail_on and self.fail_on in statement:
+            raise Error("simulated failure")
+        if "information_schema.statistics" in statement:
+            self._row = (1,) if params[1] in self.indexes else None
+            return
+        self.executed.append(" ".join(statement.split()))
+
+    def fetchone(self):
+        return self._row
+
+    def commit(self):
+        self.committed.append(list(self.executed))
+
+    def rollback(self):
+        self.rolled_back = True
+        self.executed.clear()
+
+    def close(self):
+        pass
+
+
+def load_0002():
+    path = os.path.join(MIGRATIONS_DIR, "0002_cart_items_user_product_unique.py")
+    spec = importlib.util.spec_from_file_location("migration_0002", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_execute_atomic_commits_once():
+    connection = StubConnection()
+    Migrator(connection).execute_atomic(["UPDATE a SET x = 1", "DELETE FROM b"])
+    assert connection.committed == [["UPDATE a SET x = 1", "DELETE FROM b"]]
+
+
+def test_execute_atomic_rolls_back_everything_on_failure():
+    connection = StubConnection(fail_on="DELETE")
+    with pytest.raises(Error):
+        Migrator(connection).execute_atomic(["UPDATE a SET x = 1", "DELETE FROM b"])
+    assert connection.rolled_back
+    assert connection.committed == []
+
+
+def test_cart_merge_commits_update_and_delete_together():
+    connection = StubConnection(fail_on="ALTER TABLE")
+    with pytest.raises(Error):
+        load_0002().upgrade(Migrator(connection))
+    # The merge committed as one unit before the index build failed
+    assert len(connection.committed) == 1
+    merged = connection.committed[0]
+    assert [statement.split()[0] for statement in merged] == ["UPDATE", "DELETE"]
+
+
+def test_cart_merge_skipped_once_the_index_exists():
+    connection = StubConnection(indexes={"uq_cart_items_user_product"})
+    load_0002().upgrade(Migrator(connection))
+    assert connection.executed == [] and connection.committed == []
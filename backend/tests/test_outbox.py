@@ -0,0 +1,157 @@
+"""
+Transactional outbox against the test database: checkout commits an
+order.created event with the order, and a worker delivers an event through
+one failed attempt and a retry.
+
+The worker only claims TEST_EVENT, so other pending events in the database
+are never dispatched by these tests.
+"""
+import time
+import uuid
+
+import pytest
+
+TEST_EVENT = "test.outbox"
+DELIVERY_TIMEOUT = 30
+
+EVENT_SQL = "SELECT event_type, status, attempts, last_error FROM outbox WHERE id = %s"
+
+
+def fetch_event(connection, event_id):
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(EVENT_SQL, (event_id,))
+        row = cursor.fetchone()
+        connection.commit()
+        return row
+    finally:
+        cursor.close()
+
+
+@pytest.fixture
+def db(mysql_db):
+    import mysql.connector
+
+    connection = mysql.connector.connect(**mysql_db)
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+
+def test_retry_delay_backs_off_up_to_the_cap(monkeypatch):
+    from utils import outbox
+
+    monkeypatch.setattr(outbox, "OUTBOX_RETRY_BASE_SECONDS", 2)
+    monkeypatch.setattr(outbox, "OUTBOX_RETRY_MAX_SECONDS", 10)
+    assert [outbox.retry_delay(attempts) for attempts in (1, 2, 3, 4)] == [2, 4, 8, 10]
+
+
+class RecordingConnection:
+    """Stand-in connection whose cursors record statements and claim nothing."""
+
+    def __init__(self):
+        self.executed = []
+
+    def cursor(self, dictionary=False):
+        return self
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return []
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_worker_claims_only_its_event_types():
+    from database import queries
+    from utils import outbox
+
+    worker = outbox.OutboxWorker(batch_size=10, event_types=["a.b", "c.d"])
+    worker._connection = RecordingConnection()
+    assert worker.claim() == []
+    sql, params = worker._connection.executed[0]
+    assert sql == queries.OUTBOX_CLAIM_TYPES.format(placeholders="%s, %s")
+    assert params == ("a.b", "c.d", 10)
+
+    worker = outbox.OutboxWorker(batch_size=10)
+    worker._connection = RecordingConnection()
+    worker.claim()
+    assert worker._connection.executed[0] == (queries.OUTBOX_CLAIM, (10,))
+
+
+@pytest.mark.mysql
+def test_checkout_commits_order_created_event(db):
+    from werkzeug.test import Client
+    from app import create_app
+
+    cursor = db.cursor()
+    cursor.execute("INSERT INTO products (name, price, stock) VALUES ('Outbox test product', 9.99, 10)")
+    product_id = cursor.lastrowid
+    db.commit()
+
+    client = Client(create_app())
+    response = client.post("/api/auth/signup",
+                           json={"username": f"outbox_{uuid.uuid4().hex[:12]}", "password": "secret"})
+    assert response.status_code == 201
+    response = client.post("/api/orders", json={"items": [{"product_id": product_id, "quantity": 1}]})
+    assert response.status_code == 201, response.get_json()
+    order_id = response.get_json()["order_id"]
+
+    cursor.execute("SELECT id, status FROM outbox WHERE event_type = 'order.created' AND aggregate_id = %s",
+                   (order_id,))
+    rows = cursor.fetchall()
+    assert len(rows) == 1 and rows[0][1] == "pending"
+
+    # Not delivered here; drop it so no other worker picks it up
+    cursor.execute("DELETE FROM outbox WHERE id = %s", (rows[0][0],))
+    db.commit()
+
+
+@pytest.mark.mysql
+def test_worker_retries_failed_delivery(db, monkeypatch):
+    from utils import outbox
+
+    token = uuid.uuid4().hex
+    calls = []
+
+    def flaky_handler(payload):
+        # Leftovers of an interrupted earlier run are delivered but not counted
+        if payload["token"] != token:
+            return
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError("simulated delivery failure")
+
+    monkeypatch.setitem(outbox.HANDLERS, TEST_EVENT, flaky_handler)
+    monkeypatch.setattr(outbox, "OUTBOX_RETRY_BASE_SECONDS", 1)
+
+    cursor = db.cursor()
+    outbox.enqueue(cursor, TEST_EVENT, {"token": token})
+    event_id = cursor.lastrowid
+    db.commit()
+
+    worker = outbox.OutboxWorker(name="outbox-test", event_types=[TEST_EVENT])
+    deadline = time.monotonic() + DELIVERY_TIMEOUT
+    try:
+        while time.monotonic() < deadline:
+            claimed = worker.claim()
+            assert all(event["event_type"] == TEST_EVENT for event in claimed)
+            for event in claimed:
+                worker.dispatch(event)
+            event = fetch_event(db, event_id)
+            if event["status"] != "pending":
+                break
+            time.sleep(0.2)
+    finally:
+        worker._close()
+
+    assert event["status"] == "done", event
+    assert event["attempts"] == 2 and event["last_error"] is None
+    assert len(calls) == 2
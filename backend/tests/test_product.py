@@ -0,0 +1,83 @@
+from models.product import Product
+
+
+class StubCursor:
+    """Records statements; the cart user lookup returns cart_users."""
+
+    def __init__(self, cart_users=(), products=()):
+        self.cart_users = cart_users
+        self.products = products
+        self.executed = []
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        statement = " ".join(sql.split())
+        self.executed.append((statement, params))
+        if statement.startswith("SELECT DISTINCT user_id FROM cart_items"):
+            self._rows = [(user_id,) for user_id in self.cart_users]
+        elif statement.startswith("SELECT id FROM products"):
+            self._rows = [(product_id,) for product_id in self.products]
+        else:
+            self._rows = []
+
+    def fetchall(self):
+        return self._rows
+
+
+class StubConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+def test_bump_cart_versions_of_users_holding_the_products():
+    cursor = StubCursor(cart_users=(9, 4, 9))
+    Product._bump_cart_versions(cursor, [3, 5])
+    (lookup, lookup_params), (bump, bump_params) = cursor.executed
+    assert lookup.endswith("WHERE product_id IN (%s, %s)") and lookup_params == (3, 5)
+    assert bump.startswith("INSERT INTO cart_versions") and bump_params == (4, 9)
+
+
+def test_no_bump_without_carts():
+    cursor = StubCursor()
+    Product._bump_cart_versions(cursor, [3])
+    assert len(cursor.executed) == 1
+    Product._bump_cart_versions(cursor, [])
+    assert len(cursor.executed) == 1
+
+
+def test_chunk_bumps_carts_before_locking_products():
+    cursor = StubCursor(cart_users=(4,), products=(1, 2, 3))
+    chunk = [{"id": 1, "price": 5.0}, {"id": 2, "stock": 3}, {"id": 3, "name": "New"}]
+    assert Product._apply_update_chunk(StubConnection(cursor), chunk) == {1, 2, 3}
+    assert [statement.split(" ")[0] for statement, _ in cursor.executed] == [
+        "SELECT", "INSERT", "SELECT", "UPDATE"]
+    # Stock changes are not shown in carts
+    assert cursor.executed[0][1] == (1, 3)
+
+
+def test_chunk_without_cart_fields_bumps_nothing():
+    cursor = StubCursor(cart_users=(4,), products=(2,))
+    Product._apply_update_chunk(StubConnection(cursor), [{"id": 2, "stock": 3, "description": "x"}])
+    assert [statement.split(" ")[0] for statement, _ in cursor.executed] == ["SELECT", "UPDATE"]
+    assert cursor.executed[0][0].startswith("SELECT id FROM products")
+
+
+def test_bulk_update_rejects_out_of_range_price_and_stock():
+    validate = Product.validate_bulk_update
+    assert validate({"id": 1, "price": 99999999.99}) is None
+    assert validate({"id": 1, "price": 19.9}) is None
+    assert validate({"id": 1, "price": 100000000}) == "Price must be at most 99999999.99"
+    assert validate({"id": 1, "price": 1e20}) == "Price must be at most 99999999.99"
+    assert validate({"id": 1, "price": float("inf")}) == "Price must be at most 99999999.99"
+    assert validate({"id": 1, "price": 1.005}) == "Price must have at most 2 decimal places"
+    assert validate({"id": 1, "stock": 2147483647}) is None
+    assert validate({"id": 1, "stock": 2147483648}) == "Stock must be at most 2147483647"
+
+
+def test_out_of_range_rows_are_invalid_not_failed(monkeypatch):
+    monkeypatch.setattr("models.product.get_db_connection", lambda: None)
+    results = Product.bulk_update_products([{"id": 1, "price": 1e12}, {"id": 2, "stock": 2 ** 40}])
+    assert [result["status"] for result in results] == ["invalid", "invalid"]
@@ -0,0 +1,93 @@
+"""
+Query-plan budgets for the hot statements in database/queries.py.
+
+Seeds a realistic-sized dataset into the test database (TEST_PLAN_SCALE,
+default medium; see benchmarks/datagen.py) and EXPLAINs every entry in
+HOT_QUERIES. A plan fails when it uses a full table scan, a filesort or a
+temporary table the entry does not allow, or when its examined-row estimate
+exceeds the entry's budget.
+"""
+import json
+import os
+
+import pytest
+
+from database.queries import HOT_QUERIES
+
+TEST_PLAN_SCALE = os.getenv("TEST_PLAN_SCALE", "medium")
+
+
+def walk_plan(node, found):
+    """Collect plan features from an EXPLAIN FORMAT=JSON tree."""
+    if isinstance(node, dict):
+        if node.get("using_filesort"):
+            found["filesort"] = True
+        if node.get("using_temporary_table"):
+            found["temporary"] = True
+        if "access_type" in node and "table_name" in node:
+            if node["access_type"] == "ALL":
+                found["full_scan"].append(node["table_name"])
+            found["rows"] += int(node.get("rows_examined_per_scan", 0))
+        for value in node.values():
+            walk_plan(value, found)
+    elif isinstance(node, list):
+        for value in node:
+            walk_plan(value, found)
+    return found
+
+
+def plan_problems(spec, found):
+    """Budget violations of one catalog entry's plan features."""
+    allowed = set(spec["allow"])
+    problems = []
+    if found["full_scan"] and "full_scan" not in allowed:
+        problems.append(f"full table scan on {', '.join(found['full_scan'])}")
+    if found["filesort"] and "filesort" not in allowed:
+        problems.append("filesort")
+    if found["temporary"] and "temporary" not in allowed:
+        problems.append("temporary table")
+    if spec["max_rows"] is not None and found["rows"] > spec["max_rows"]:
+        problems.append(f"examines ~{found['rows']} rows (budget {spec['max_rows']})")
+    return problems
+
+
+@pytest.fixture(scope="module")
+def plan_cursor(mysql_db):
+    from benchmarks.datagen import SCALES, seed_dataset
+    from database.db_config import close_db_connection, get_db_connection
+
+    seed_dataset(**SCALES[TEST_PLAN_SCALE])
+    connection = get_db_connection()
+    if not connection:
+        pytest.fail("Could not get a connection to the test database")
+    try:
+        yield connection.cursor()
+    finally:
+        # EXPLAIN of DML must never change data
+        connection.rollback()
+        close_db_connection(connection)
+
+
+def test_walk_plan_collects_features():
+    plan = {"query_block": {
+        "ordering_operation": {"using_filesort": True, "nested_loop": [
+            {"table": {"table_name": "orders", "access_type": "ref", "rows_examined_per_scan": 12}},
+            {"table": {"table_name": "order_items", "access_type": "ALL", "rows_examined_per_scan": 300}},
+        ]},
+    }}
+    found = walk_plan(plan, {"full_scan": [], "filesort": False, "temporary": False, "rows": 0})
+    assert found == {"full_scan": ["order_items"], "filesort": True, "temporary": False, "rows": 312}
+    assert plan_problems({"allow": ("filesort",), "max_rows": 100}, found) == [
+        "full table scan on order_items",
+        "examines ~312 rows (budget 100)",
+    ]
+
+
+@pytest.mark.mysql
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_plan_within_budget(plan_cursor, name):
+    spec = HOT_QUERIES[name]
+    plan_cursor.execute(f"EXPLAIN FORMAT=JSON {spec['sql']}", spec["params"])
+    plan = json.loads(plan_cursor.fetchone()[0])
+    found = walk_plan(plan, {"full_scan": [], "filesort": False, "temporary": False, "rows": 0})
+    assert plan_problems(spec, found) == []
@@ -0,0 +1,51 @@
+import pytest
+
+from utils.rate_limit import SharedBuckets, classify
+
+
+@pytest.fixture
+def buckets(tmp_path):
+    return SharedBuckets(path=str(tmp_path / "buckets"), groups=4)
+
+
+def test_take_allows_burst_then_waits(buckets):
+    assert [buckets.take("ip:cart:1.2.3.4", 2, 3, 100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert buckets.take("ip:cart:1.2.3.4", 2, 3, 100.0) == pytest.approx(0.5)
+
+
+def test_take_refills_at_rate(buckets):
+    for _ in range(3):
+        buckets.take("key", 2, 3, 100.0)
+    assert buckets.take("key", 2, 3, 100.2) > 0
+    # The rejected take still refilled: 0.4 tokens, then 0.6 more by 100.5
+    assert buckets.take("key", 2, 3, 100.5) == 0.0
+
+
+def test_keys_have_separate_buckets(buckets):
+    assert buckets.take("a", 1, 1, 100.0) == 0.0
+    assert buckets.take("a", 1, 1, 100.0) > 0
+    assert buckets.take("b", 1, 1, 100.0) == 0.0
+
+
+def test_buckets_are_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "buckets")
+    first, second = SharedBuckets(path=path, groups=4), SharedBuckets(path=path, groups=4)
+    assert first.take("key", 1, 1, 100.0) == 0.0
+    assert second.take("key", 1, 1, 100.0) > 0
+
+
+def test_full_group_reuses_the_stalest_slot():
+    buckets = SharedBuckets(path=None, groups=1)
+    for way in range(SharedBuckets.WAYS):
+        buckets.take(f"key-{way}", 1, 1, 100.0 + way)
+    # key-0 was refilled longest ago and gives up its slot; its bucket starts full again
+    buckets.take("newcomer", 1, 1, 200.0)
+    assert buckets.take("key-0", 1, 1, 200.0) == 0.0
+    assert buckets.take("key-7", 1, 1, 107.0) > 0
+
+
+def test_classify_routes():
+    assert classify("POST", "/api/orders").name == "checkout"
+    assert classify("POST", "/api/orders/transitions").name == "admin"
+    assert classify("GET", "/api/products/3").name == "browse"
+    assert classify("GET", "/api/cart").name == "read"
@@ -0,0 +1,59 @@
+from monitoring import request_timing
+from monitoring.request_timing import RequestTimer, server_timing, timed_connection
+
+
+class MemoryCursor:
+    def execute(self, operation, params=None):
+        self.rows = [(1,)]
+
+    def fetchall(self):
+        return self.rows
+
+
+class MemoryConnection:
+    def cursor(self, *args, **kwargs):
+        return MemoryCursor()
+
+    def commit(self):
+        pass
+
+
+def test_breakdown_without_phases():
+    assert RequestTimer().breakdown(0.01) == [("other", 0.01), ("total", 0.01)]
+
+
+def test_breakdown_accounts_db_and_other():
+    timer = RequestTimer()
+    timer.add("session", 0.001)
+    timer.add("json", 0.002)
+    timer.add("session", 0.001)
+    timer.db = 0.004
+    phases = dict(timer.breakdown(0.01))
+    assert list(phases) == ["session", "json", "db", "other", "total"]
+    assert abs(phases["other"] - 0.002) < 1e-12
+    assert phases["session"] == 0.002 and phases["total"] == 0.01
+
+
+def test_other_never_negative():
+    timer = RequestTimer()
+    timer.db = 0.02
+    assert dict(timer.breakdown(0.01))["other"] == 0.0
+
+
+def test_timed_connection_adds_to_db_phase():
+    connection = MemoryConnection()
+    assert timed_connection(connection) is connection  # outside a request
+    timer = request_timing._local.timer = RequestTimer()
+    try:
+        timed = timed_connection(connection)
+        cursor = timed.cursor()
+        cursor.execute("SELECT 1")
+        assert cursor.fetchall() == [(1,)]
+        timed.commit()
+    finally:
+        request_timing._local.timer = None
+    assert timer.db > 0 and timer.phases == {}
+
+
+def test_server_timing_header():
+    assert server_timing([("db", 0.0015), ("total", 0.01)]) == "db;dur=1.50, total;dur=10.00"
@@ -0,0 +1,29 @@
+import pytest
+
+from monitoring.saturation import WorkerLoad, queue_time
+
+NOW = 1700000000.0
+
+
+@pytest.mark.parametrize("header", ["t=1699999999.750", "1699999999.750", "t=1699999999750", "t=1699999999750000"])
+def test_queue_time_units(header):
+    assert queue_time({"HTTP_X_REQUEST_START": header}, NOW) == pytest.approx(0.25)
+
+
+@pytest.mark.parametrize("environ", [{}, {"HTTP_X_REQUEST_START": ""}, {"HTTP_X_REQUEST_START": "t=soon"}])
+def test_queue_time_without_a_usable_header(environ):
+    assert queue_time(environ, NOW) is None
+
+
+def test_queue_time_clock_skew_is_zero():
+    assert queue_time({"HTTP_X_REQUEST_START": f"t={NOW + 5}"}, NOW) == 0.0
+
+
+def test_worker_load_counts_in_flight_and_queue():
+    load = WorkerLoad(threads=4)
+    load.begin(0.5)
+    load.begin()
+    load.end()
+    in_flight, threads, busy, queue_seconds, queued = load.snapshot()
+    assert (in_flight, threads, queue_seconds, queued) == (1, 4, 0.5, 1)
+    assert busy >= 0
@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from utils import json_provider
+from utils.serializer import (
+    PRODUCT_ENCODER,
+    RowEncoder,
+    json_int,
+    json_number,
+    json_string,
+    nullable,
+    order_history_json,
+    product_list_json,
+)
+
+
+def test_row_encoder_sorts_keys_and_nests():
+    encoder = RowEncoder({"b": (1, json_string), "a": (0, json_int), "children": ("children", None)})
+    assert encoder.encode((5, 'say "hi"'), {"children": "[]"}) == '{"a":5,"b":"say \\"hi\\"","children":[]}'
+
+
+def test_nullable():
+    encoder = RowEncoder({"name": (0, nullable(json_string))})
+    assert encoder.encode_list([(None,), ("x",)]) == '[{"name":null},{"name":"x"}]'
+
+
+def test_product_list_matches_provider():
+    rows = [(1, "Café", Decimal("12.50")), (2, "Tab\there", Decimal("3"))]
+    expected = json_provider.dumps([{"product_id": i, "name": n, "price": p} for i, n, p in rows])
+    assert product_list_json(rows) == (expected + "\n").encode()
+    assert json.loads(product_list_json(rows))[0] == {"product_id": 1, "name": "Café", "price": 12.5}
+
+
+def test_numbers_and_unicode():
+    assert json_number(Decimal("999.99")) == "999.99"
+    assert json_number(5) == "5.0"
+    assert PRODUCT_ENCODER.encode((1, "naïve ☕", Decimal("1.10"))) == '{"name":"naïve ☕","price":1.1,"product_id":1}'
+
+
+def test_order_history_groups_items():
+    created = datetime(2024, 5, 1, 12, 30)
+    rows = [
+        (10, Decimal("20.00"), "pending", created, 1, 2, Decimal("5.00"), "Pen"),
+        (10, Decimal("20.00"), "pending", created, 2, 1, Decimal("10.00"), None),
+        (11, Decimal("0.00"), "cancelled", created, None, None, None, None),
+    ]
+    orders = json.loads(order_history_json(rows))
+    assert [order["id"] for order in orders] == [10, 11]
+    assert orders[0]["created_at"] == "2024-05-01T12:30:00"
+    assert orders[0]["items"] == [
+        {"product_id": 1, "quantity": 2, "price_at_time": 5.0, "product_name": "Pen"},
+        {"product_id": 2, "quantity": 1, "price_at_time": 10.0, "product_name": None},
+    ]
+    assert orders[1]["items"] == []
@@ -0,0 +1,97 @@
+import time
+from types import SimpleNamespace
+
+from monitoring.worker_watchdog import GROWTH_WINDOW, MB, MemoryWatchdog
+
+
+def make_watchdog(limit_mb=400, growth_limit_mb_per_min=60, growth_floor_mb=200):
+    worker = SimpleNamespace(alive=True)
+    return MemoryWatchdog(worker, limit_mb=limit_mb, growth_limit_mb_per_min=growth_limit_mb_per_min,
+                          growth_floor_mb=growth_floor_mb, interval=1)
+
+
+def test_ceiling_recycles_immediately():
+    watchdog = make_watchdog()
+    assert watchdog.check(399 * MB, 0) is None
+    assert watchdog.check(400 * MB, 1) == "memory_ceiling"
+
+
+def test_growth_needs_a_full_window():
+    watchdog = make_watchdog()
+    # 10 MB/s, far above 1 MB/s, but only once GROWTH_WINDOW samples are in
+    reasons = [watchdog.check((250 + 10 * second) * MB, second) for second in range(GROWTH_WINDOW)]
+    assert reasons[:-1] == [None] * (GROWTH_WINDOW - 1)
+    assert reasons[-1] == "memory_growth"
+
+
+def test_growth_below_floor_is_ignored():
+    watchdog = make_watchdog(growth_floor_mb=300)
+    reasons = [watchdog.check((50 + 10 * second) * MB, second) for second in range(GROWTH_WINDOW * 2)]
+    assert reasons == [None] * (GROWTH_WINDOW * 2)
+
+
+def test_steady_memory_is_not_recycled():
+    watchdog = make_watchdog()
+    for second in range(GROWTH_WINDOW * 3):
+        assert watchdog.check(300 * MB + (second % 2) * MB // 2, second) is None
+
+
+def test_recycle_marks_worker_once():
+    watchdog = make_watchdog()
+    watchdog.recycle("memory_growth", 300 * MB)
+    watchdog.recycle("memory_ceiling", 500 * MB)
+    assert watchdog.worker.alive is False
+    assert watchdog.reason == "memory_growth"
+
+
+class SimulatedWorker:
+    """Just enough of a gunicorn worker for the watchdog."""
+
+    def __init__(self):
+        self.alive = True
+        self.nr = 0
+
+
+def serve(leak_bytes, max_requests, headroom_mb=150):
+    """Call a Flask route that retains leak_bytes per request under a live watchdog."""
+    import psutil
+    from flask import Flask
+    from werkzeug.test import Client
+
+    app = Flask(__name__)
+    retained = []
+
+    @app.route("/leak")
+    def leak():
+        retained.append(bytearray(leak_bytes))
+        return {"retained": len(retained)}
+
+    baseline_mb = psutil.Process().memory_info().rss / MB
+    worker = SimulatedWorker()
+    watchdog = MemoryWatchdog(worker, limit_mb=baseline_mb + headroom_mb,
+                              growth_limit_mb_per_min=max(leak_bytes / MB, 1) * 60,
+                              growth_floor_mb=baseline_mb + headroom_mb / 2, interval=0.02).start()
+    client = Client(app)
+    try:
+        while worker.alive and worker.nr < max_requests:
+            assert client.get("/leak").status_code == 200
+            worker.nr += 1
+            time.sleep(0.005)
+        return worker, watchdog
+    finally:
+        worker.alive = False
+        watchdog._thread.join(1)
+        retained.clear()
+
+
+def test_leaking_route_gets_worker_recycled():
+    worker, watchdog = serve(leak_bytes=5 * MB, max_requests=200)
+    assert watchdog.reason in ("memory_growth", "memory_ceiling")
+    # Recycled well before the leak could run unbounded
+    assert worker.nr < 200
+
+
+def test_steady_route_keeps_worker():
+    worker, watchdog = serve(leak_bytes=0, max_requests=50)
+    assert watchdog.reason is None
+    assert worker.nr == 50
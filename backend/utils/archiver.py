@@ -0,0 +1,298 @@
+"""
+Online archival of old orders, stale cart items, expired idempotency keys
+and delivered outbox events.
+
+Work is done in small primary-key-ordered chunks, each in its own short
+transaction, with a pause between chunks so the job can run next to live
+traffic. Run it from cron or a Kubernetes CronJob:
+    python -m utils.archiver --order-age-days 180 --cart-idle-days 30
+"""
+import argparse
+import logging
+import os
+import time
+
+from database.db_config import get_db_connection, close_db_connection
+from database import queries
+from models.order import ORDER_STATUS_TRANSITIONS
+
+logger = logging.getLogger(__name__)
+
+# Orders in a final state (no further transitions) can be archived
+ARCHIVABLE_STATUSES = tuple(
+    status for status, targets in ORDER_STATUS_TRANSITIONS.items() if not targets
+)
+
+ORDER_ARCHIVE_AGE_DAYS = int(os.getenv("ORDER_ARCHIVE_AGE_DAYS", 180))
+CART_ITEM_MAX_IDLE_DAYS = int(os.getenv("CART_ITEM_MAX_IDLE_DAYS", 30))
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", 7))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 500))
+ARCHIVE_SLEEP_SECONDS = float(os.getenv("ARCHIVE_SLEEP_SECONDS", 0.1))
+
+
+def _in_clause(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def archive_orders(age_days=ORDER_ARCHIVE_AGE_DAYS, batch_size=ARCHIVE_BATCH_SIZE,
+                   sleep_seconds=ARCHIVE_SLEEP_SECONDS, max_batches=None):
+    """
+    Move finished orders older than age_days into the archive tables.
+    Args:
+        age_days (int): Minimum order age in days.
+        batch_size (int): Orders moved per transaction.
+        sleep_seconds (float): Pause between chunks.
+        max_batches (int): Optional cap on the number of chunks per run.
+    Returns:
+        int: Number of orders archived.
+    """
+    connection = get_db_connection()
+    if not connection:
+        raise Exception("Database connection failed")
+
+    archived = 0
+    batches = 0
+    last_id = 0
+    try:
+        cursor = connection.cursor()
+        while max_batches is None or batches < max_batches:
+            try:
+                # status and created_at are not indexed, so a locking scan would
+                # next-key-lock every row it walks, up to the hot tail of the
+                # table on the last pass and block new checkouts. Pick candidates
+                # with a plain consistent read, then lock only those rows by
+                # primary key, re-checking the conditions under the lock.
+                cursor.execute(
+                    f"""SELECT id FROM orders
+                        WHERE id > %s
+                          AND status IN ({_in_clause(ARCHIVABLE_STATUSES)})
+                          AND created_at < NOW() - INTERVAL %s DAY
+                        ORDER BY id
+                        LIMIT %s""",
+                    (last_id, *ARCHIVABLE_STATUSES, age_days, batch_size)
+                )
+                candidate_ids = [row[0] for row in cursor.fetchall()]
+                if not candidate_ids:
+                    connection.rollback()
+                    break
+
+                cursor.execute(
+                    f"""SELECT id FROM orders
+                        WHERE id IN ({_in_clause(candidate_ids)})
+                          AND status IN ({_in_clause(ARCHIVABLE_STATUSES)})
+                          AND created_at < NOW() - INTERVAL %s DAY
+                        FOR UPDATE SKIP LOCKED""",
+                    (*candidate_ids, *ARCHIVABLE_STATUSES, age_days)
+                )
+                order_ids = sorted(row[0] for row in cursor.fetchall())
+                if order_ids:
+                    ids_clause = _in_clause(order_ids)
+                    cursor.execute(
+                        f"""INSERT IGNORE INTO orders_archive
+                                (id, user_id, total_amount, status, created_at, updated_at)
+                            SELECT id, user_id, total_amount, status, created_at, updated_at
+                            FROM orders WHERE id IN ({ids_clause})""",
+                        tuple(order_ids)
+                    )
+                    cursor.execute(
+                        f"""INSERT IGNORE INTO order_items_archive
+                                (id, order_id, product_id, quantity, price_at_time, created_at, updated_at)
+                            SELECT id, order_id, product_id, quantity, price_at_time, created_at, updated_at
+                            FROM order_items WHERE order_id IN ({ids_clause})""",
+                        tuple(order_ids)
+                    )
+                    cursor.execute(f"DELETE FROM order_items WHERE order_id IN ({ids_clause})", tuple(order_ids))
+                    cursor.execute(f"DELETE FROM orders WHERE id IN ({ids_clause})", tuple(order_ids))
+                    connection.commit()
+                else:
+                    # Every candidate was locked by a live transaction or changed;
+                    # still a chunk, so it counts and is followed by the pause
+                    connection.rollback()
+            except Exception as e:
+                connection.rollback()
+                logger.error(f"Error archiving orders after id {last_id}: {e}")
+                raise
+
+            archived += len(order_ids)
+            batches += 1
+            last_id = candidate_ids[-1]
+            logger.debug(f"Archived {len(order_ids)} orders up to id {last_id}")
+            time.sleep(sleep_seconds)
+
+        logger.info(f"Archived {archived} orders older than {age_days} days")
+        return archived
+    finally:
+        close_db_connection(connection)
+
+
+def purge_stale_cart_items(idle_days=CART_ITEM_MAX_IDLE_DAYS, batch_size=ARCHIVE_BATCH_SIZE,
+                           sleep_seconds=ARCHIVE_SLEEP_SECONDS, max_batches=None):
+    """
+    Delete cart items that have not been touched for idle_days.
+    Args:
+        idle_days (int): Minimum days since the item was last updated.
+        batch_size (int): Items deleted per transaction.
+        sleep_seconds (float): Pause between chunks.
+        max_batches (int): Optional cap on the number of chunks per run.
+    Returns:
+        int: Number of cart items deleted.
+    """
+    connection = get_db_connection()
+    if not connection:
+        raise Exception("Database connection failed")
+
+    deleted = 0
+    batches = 0
+    last_id = 0
+    try:
+        cursor = connection.cursor()
+        while max_batches is None or batches < max_batches:
+            try:
+                cursor.execute(
+                    """SELECT id, user_id FROM cart_items
+                       WHERE id > %s AND updated_at < NOW() - INTERVAL %s DAY
+                       ORDER BY id
+                       LIMIT %s""",
+                    (last_id, idle_days, batch_size)
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    connection.rollback()
+                    break
+                item_ids = [row[0] for row in rows]
+
+                # Bump cart versions first, in the same lock order as the cart routes,
+                # so checkouts holding an older cart_version are rejected
+                user_ids = sorted({row[1] for row in rows})
+                cursor.execute(
+                    queries.CART_VERSIONS_BUMP.format(values=', '.join(['(%s, 1)'] * len(user_ids))),
+                    tuple(user_ids)
+                )
+
+                # Re-check staleness so items touched since the scan survive
+                cursor.execute(
+                    f"""DELETE FROM cart_items
+                        WHERE id IN ({_in_clause(item_ids)})
+                          AND updated_at < NOW() - INTERVAL %s DAY""",
+                    (*item_ids, idle_days)
+                )
+                deleted += cursor.rowcount
+                connection.commit()
+            except Exception as e:
+                connection.rollback()
+                logger.error(f"Error purging cart items after id {last_id}: {e}")
+                raise
+
+            batches += 1
+            last_id = item_ids[-1]
+            time.sleep(sleep_seconds)
+
+        logger.info(f"Deleted {deleted} cart items idle for more than {idle_days} days")
+        return deleted
+    finally:
+        close_db_connection(connection)
+
+
+def purge_expired_idempotency_keys(batch_size=ARCHIVE_BATCH_SIZE, sleep_seconds=ARCHIVE_SLEEP_SECONDS,
+                                   max_batches=None):
+    """
+    Delete Idempotency-Key records past their expiry (see utils/idempotency.py).
+    Returns:
+        int: Number of keys deleted.
+    """
+    connection = get_db_connection()
+    if not connection:
+        raise Exception("Database connection failed")
+
+    deleted = 0
+    batches = 0
+    try:
+        cursor = connection.cursor()
+        while max_batches is None or batches < max_batches:
+            try:
+                cursor.execute(queries.IDEMPOTENCY_PURGE_EXPIRED, (batch_size,))
+                count = cursor.rowcount
+                connection.commit()
+            except Exception as e:
+                connection.rollback()
+                logger.error(f"Error purging expired idempotency keys: {e}")
+                raise
+
+            deleted += count
+            batches += 1
+            if count < batch_size:
+                break
+            time.sleep(sleep_seconds)
+
+        logger.info(f"Deleted {deleted} expired idempotency keys")
+        return deleted
+    finally:
+        close_db_connection(connection)
+
+
+def purge_delivered_outbox_events(retention_days=OUTBOX_RETENTION_DAYS, batch_size=ARCHIVE_BATCH_SIZE,
+                                  sleep_seconds=ARCHIVE_SLEEP_SECONDS, max_batches=None):
+    """
+    Delete outbox events delivered more than retention_days ago (see utils/outbox.py).
+    Failed events are kept for inspection.
+    Returns:
+        int: Number of events deleted.
+    """
+    connection = get_db_connection()
+    if not connection:
+        raise Exception("Database connection failed")
+
+    deleted = 0
+    batches = 0
+    try:
+        cursor = connection.cursor()
+        while max_batches is None or batches < max_batches:
+            try:
+                cursor.execute(queries.OUTBOX_PURGE_DONE, (retention_days, batch_size))
+                count = cursor.rowcount
+                connection.commit()
+            except Exception as e:
+                connection.rollback()
+                logger.error(f"Error purging delivered outbox events: {e}")
+                raise
+
+            deleted += count
+            batches += 1
+            if count < batch_size:
+                break
+            time.sleep(sleep_seconds)
+
+        logger.info(f"Deleted {deleted} outbox events delivered more than {retention_days} days ago")
+        return deleted
+    finally:
+        close_db_connection(connection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old orders and purge stale cart items, idempotency keys and outbox events")
+    parser.add_argument("--order-age-days", type=int, default=ORDER_ARCHIVE_AGE_DAYS)
+    parser.add_argument("--cart-idle-days", type=int, default=CART_ITEM_MAX_IDLE_DAYS)
+    parser.add_argument("--outbox-retention-days", type=int, default=OUTBOX_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--sleep", type=float, default=ARCHIVE_SLEEP_SECONDS,
+                        help="Seconds to pause between chunks")
+    parser.add_argument("--max-batches", type=int, default=None,
+                        help="Stop each phase after this many chunks")
+    parser.add_argument("--skip-orders", action="store_true")
+    parser.add_argument("--skip-cart", action="store_true")
+    parser.add_argument("--skip-idempotency-keys", action="store_true")
+    parser.add_argument("--skip-outbox", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_orders:
+        archive_orders(args.order_age_days, args.batch_size, args.sleep, args.max_batches)
+    if not args.skip_cart:
+        purge_stale_cart_items(args.cart_idle_days, args.batch_size, args.sleep, args.max_batches)
+    if not args.skip_idempotency_keys:
+        purge_expired_idempotency_keys(args.batch_size, args.sleep, args.max_batches)
+    if not args.skip_outbox:
+        purge_delivered_outbox_events(args.outbox_retention_days, args.batch_size, args.sleep, args.max_batches)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Startup-time asset manifest for the frontend.
+
+Built once over FRONTEND_PATH:
+  - small files are held in memory, with gzip (and brotli, when installed)
+    variants precomputed for compressible types
+  - every file gets a content-hash ETag, so conditional requests are answered
+    with 304 from a lookup table; compressed variants get their own strong
+    ETag ("<hash>-gz", "<hash>-br"), since their bytes differ
+  - non-HTML assets such as styles.css also get a fingerprinted URL
+    (/styles.<hash>.css) served with Cache-Control: immutable; HTML pages are
+    rewritten at build time to reference those URLs
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+from email.utils import formatdate
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ASSET_MEMORY_LIMIT = int(os.getenv("ASSET_MEMORY_LIMIT", 512 * 1024))
+COMPRESS_MIN_SIZE = 512
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+FINGERPRINT_EXCLUDE = (".html",)
+CACHE_REVALIDATE = "no-cache"
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+STATIC_CHUNK_SIZE = 64 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+# Precomputed encodings, most preferred first, and their ETag suffixes
+ENCODINGS = {"br": "-br", "gzip": "-gz"}
+
+
+def parse_accept_encoding(header):
+    """Map each coding in an Accept-Encoding header to its q-value."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class Asset:
+    __slots__ = ("path", "file_path", "content_type", "size", "last_modified",
+                 "etag", "cache_control", "body", "variants", "etags")
+
+    def __init__(self, path, file_path, content_type, size, last_modified, etag,
+                 cache_control, body=None, variants=None):
+        self.path = path
+        self.file_path = file_path
+        self.content_type = content_type
+        self.size = size
+        self.last_modified = last_modified
+        self.etag = etag
+        self.cache_control = cache_control
+        self.body = body
+        self.variants = variants or {}
+        # ETag per representation: None is the identity encoding
+        self.etags = {None: etag}
+        for encoding in self.variants:
+            self.etags[encoding] = f'{etag[:-1]}{ENCODINGS[encoding]}"'
+
+    def select(self, accept_encoding):
+        """Pick the precomputed encoding with the highest q-value the client accepts."""
+        if self.variants and accept_encoding:
+            accepted = parse_accept_encoding(accept_encoding)
+            wildcard = accepted.get("*", 0.0)
+            best, best_quality = None, 0.0
+            for encoding in ENCODINGS:
+                if encoding in self.variants:
+                    quality = accepted.get(encoding, wildcard)
+                    if quality > best_quality:
+                        best, best_quality = encoding, quality
+            if best:
+                return best, self.variants[best]
+        return None, self.body
+
+    def not_modified(self, environ, etag):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            if if_none_match.strip() == '*':
+                return True
+            # Weak comparison, as If-None-Match requires
+            tags = (tag.strip() for tag in if_none_match.split(','))
+            return etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+        return environ.get('HTTP_IF_MODIFIED_SINCE') == self.last_modified
+
+    def __call__(self, environ, start_response):
+        """Serve the asset as a WSGI application."""
+        encoding, body = self.select(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        etag = self.etags[encoding]
+        headers = [
+            ('ETag', etag),
+            ('Last-Modified', self.last_modified),
+            ('Cache-Control', self.cache_control),
+        ]
+        if self.variants:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if self.not_modified(environ, etag):
+            start_response('304 Not Modified', headers)
+            return [b'']
+
+        headers.append(('Content-Type', self.content_type))
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        headers.append(('Content-Length', str(len(body) if body is not None else self.size)))
+        start_response('200 OK', headers)
+
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return [b'']
+        if body is not None:
+            return [body]
+        f = open(self.file_path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper:
+            return file_wrapper(f, STATIC_CHUNK_SIZE)
+        return _read_chunks(f)
+
+
+def _read_chunks(f):
+    with f:
+        while True:
+            chunk = f.read(STATIC_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _file_digest(file_path):
+    """Content hash of a file too large to hold in memory, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _content_type(name):
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type == "application/javascript":
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+def _compress(content, content_type):
+    """Return precomputed encodings that are actually smaller than the original."""
+    variants = {}
+    if len(content) < COMPRESS_MIN_SIZE or not content_type.startswith(COMPRESSIBLE_TYPES):
+        return variants
+    gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(gzipped) < len(content):
+        variants["gzip"] = gzipped
+    if brotli is not None:
+        compressed = brotli.compress(content)
+        if len(compressed) < len(content):
+            variants["br"] = compressed
+    return variants
+
+
+class AssetManifest:
+    """Maps request paths to precomputed Assets."""
+
+    def __init__(self, frontend_path):
+        self.frontend_path = frontend_path
+        self.assets = {}
+        self.fingerprints = {}
+        if os.path.isdir(frontend_path):
+            self._build()
+        logger.info(f"✅ Asset manifest built: {len(self.assets)} paths, "
+                    f"{len(self.fingerprints)} fingerprinted, brotli {'on' if brotli else 'off'}")
+
+    def get(self, path):
+        return self.assets.get(path)
+
+    def _add(self, path, file_path, content, size, mtime, cache_control, digest=None):
+        content_type = _content_type(path)
+        in_memory = content is not None and len(content) <= ASSET_MEMORY_LIMIT
+        if digest is None:
+            digest = hashlib.sha256(content).hexdigest()[:16]
+        self.assets[path] = Asset(
+            path, file_path, content_type, size if content is None else len(content),
+            formatdate(mtime, usegmt=True), f'"{digest}"', cache_control,
+            body=content if in_memory else None,
+            variants=_compress(content, content_type) if in_memory else None,
+        )
+        return digest
+
+    def _build(self):
+        files = []
+        for root, _, names in os.walk(self.frontend_path):
+            for name in sorted(names):
+                full_path = os.path.join(root, name)
+                rel_path = "/" + os.path.relpath(full_path, self.frontend_path).replace(os.sep, "/")
+                files.append((rel_path, full_path, os.stat(full_path)))
+
+        # Assets first, so HTML can be rewritten to their fingerprinted URLs
+        pages = []
+        for rel_path, full_path, stat in files:
+            if rel_path.endswith(FINGERPRINT_EXCLUDE):
+                pages.append((rel_path, full_path, stat))
+                continue
+            content = digest = None
+            if stat.st_size <= ASSET_MEMORY_LIMIT:
+                with open(full_path, 'rb') as f:
+                    content = f.read()
+            else:
+                # Streamed from disk, but still hashed: an immutable URL must name the content
+                digest = _file_digest(full_path)
+            digest = self._add(rel_path, full_path, content, stat.st_size, stat.st_mtime, CACHE_REVALIDATE, digest)
+            stem, ext = os.path.splitext(rel_path)
+            fingerprinted = f"{stem}.{digest[:10]}{ext}"
+            self._add(fingerprinted, full_path, content, stat.st_size, stat.st_mtime, CACHE_IMMUTABLE, digest)
+            self.fingerprints[rel_path] = fingerprinted
+
+        for rel_path, full_path, stat in pages:
+            with open(full_path, 'rb') as f:
+                content = self._rewrite(f.read())
+            self._add(rel_path, full_path, content, stat.st_size, stat.st_mtime, CACHE_REVALIDATE)
+
+        if "/index.html" in self.assets:
+            self.assets["/"] = self.assets["/index.html"]
+
+    def _rewrite(self, html):
+        """Point href/src references at fingerprinted asset URLs."""
+        for original, fingerprinted in self.fingerprints.items():
+            for quote in (b'"', b"'"):
+                for prefix in (b"/", b""):
+                    html = html.replace(
+                        quote + prefix + original[1:].encode() + quote,
+                        quote + fingerprinted.encode() + quote,
+                    )
+        return html
@@ -0,0 +1,389 @@
+"""
+Shared-memory catalog snapshot.
+
+The product catalog is published as one read-only binary file in
+CATALOG_SNAPSHOT_DIR (/dev/shm by default), which every worker in the pod
+maps instead of querying MySQL or keeping its own copy:
+  - fixed-width native-order columns sorted by id: id (int32), price in
+    cents (int64), stock (int32), updated_at (int64 epoch)
+  - an offsets table (2 * count + 1 uint64) into a UTF-8 string blob
+    holding each product's name followed by its description
+  - a header with the generation, row count, newest updated_at and a
+    content digest, which doubles as the product list ETag
+Lookups bisect the mapped id column; nothing is copied until a row is read.
+
+One worker per pod wins a flock on catalog.lock and becomes the publisher:
+it rebuilds the snapshot when a product write in this pod asks for it
+(request_catalog_refresh) or when the catalog version query shows a change
+made elsewhere, polled every CATALOG_SNAPSHOT_POLL_INTERVAL. A snapshot
+built in the same second as the newest updated_at is rebuilt on the next
+poll, since a same-second write would not change that version. A new file is
+written next to the old one and swapped in with os.replace, then the
+generation counter in the shared catalog.gen file is bumped. Readers
+compare that counter with the generation they have mapped on every access
+and remap when it moves; the old mapping stays valid until it is dropped.
+Until the first snapshot exists, reads fall back to MySQL.
+"""
+import bisect
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from decimal import Decimal
+
+import mysql.connector
+
+from database.db_config import DB_CONFIG
+from database import queries
+from monitoring.prometheus_metrics import (
+    CATALOG_SNAPSHOT_GENERATION,
+    CATALOG_SNAPSHOT_BUILD_SECONDS,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_default_shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+CATALOG_SNAPSHOT_ENABLED = os.getenv("CATALOG_SNAPSHOT_ENABLED", "True").lower() == "true"
+CATALOG_SNAPSHOT_DIR = os.getenv("CATALOG_SNAPSHOT_DIR", _default_shm_dir)
+CATALOG_SNAPSHOT_POLL_INTERVAL = float(os.getenv("CATALOG_SNAPSHOT_POLL_INTERVAL", 5))
+# How often the publisher checks for refresh requests from product writes
+CATALOG_SNAPSHOT_NUDGE_INTERVAL = 0.2
+
+MAGIC = b"SECS"
+FORMAT_VERSION = 1
+# magic, format version, generation, count, newest updated_at, built_at, blob size, digest
+HEADER = struct.Struct("=4sIQIqdQ20s4x")
+# Control file: published generation, refresh requests
+CONTROL_SLOTS = 2
+
+
+def _layout(count):
+    """Return ({column: (offset, typecode, length)}, blob offset) for a snapshot of count rows."""
+    columns = {}
+    position = HEADER.size
+    for name, typecode, length in (("ids", "i", count), ("prices", "q", count), ("stock", "i", count),
+                                   ("updated", "q", count), ("offsets", "Q", 2 * count + 1)):
+        columns[name] = (position, typecode, length)
+        position += -(-length * array(typecode).itemsize // 8) * 8
+    return columns, position
+
+
+class CatalogSnapshot:
+    """A mapped snapshot file. Columns are memoryviews over the mapping."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.generation, self.count, self.last_modified,
+         self.built_at, blob_size, digest) = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalog snapshot format in {path}")
+        view = memoryview(self._map)
+        columns, blob_offset = _layout(self.count)
+        for name, (offset, typecode, length) in columns.items():
+            size = length * array(typecode).itemsize
+            setattr(self, name, view[offset:offset + size].cast(typecode))
+        self.blob = view[blob_offset:blob_offset + blob_size]
+        self.etag = digest.hex()[:20]
+        self.size = len(self._map)
+
+    def find(self, product_id):
+        """Return the row index of a product, or None."""
+        index = bisect.bisect_left(self.ids, product_id)
+        if index < self.count and self.ids[index] == product_id:
+            return index
+        return None
+
+    def name(self, index):
+        return str(self.blob[self.offsets[2 * index]:self.offsets[2 * index + 1]], "utf-8")
+
+    def description(self, index):
+        return str(self.blob[self.offsets[2 * index + 1]:self.offsets[2 * index + 2]], "utf-8")
+
+    def price(self, index):
+        return Decimal(self.prices[index]).scaleb(-2)
+
+    def row(self, index):
+        """(id, name, price) for a row index, the fields the API serves."""
+        return self.ids[index], self.name(index), self.price(index)
+
+    def rows(self):
+        return (self.row(index) for index in range(self.count))
+
+    def settled(self):
+        """
+        True once the build's second is past the newest change. updated_at has
+        one-second resolution, so until then a write in that same second may be
+        missing from the snapshot without changing (row count, MAX(updated_at)).
+        """
+        return self.last_modified < int(self.built_at)
+
+    def list_last_modified(self):
+        """Last-Modified for the whole list, unless the newest change shares the build's second."""
+        if self.last_modified and self.settled():
+            return self.last_modified
+        return None
+
+    def product_etag(self, index):
+        state = f"{self.ids[index]}:{self.prices[index]}:{self.updated[index]}:{self.name(index)}"
+        return hashlib.sha1(state.encode()).hexdigest()[:20]
+
+
+def write_snapshot(path, generation, rows):
+    """
+    Write a snapshot file and atomically swap it in at path.
+    Args:
+        path (str): Destination path
+        generation (int): Generation recorded in the header
+        rows (iterable): (id, name, price, stock, description, updated_at) ordered by id
+    Returns:
+        int: Number of products written
+    """
+    ids, prices, stock, updated = array("i"), array("q"), array("i"), array("q")
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for product_id, name, price, quantity, description, updated_at in rows:
+        ids.append(product_id)
+        prices.append(int(Decimal(price).scaleb(2)))
+        stock.append(quantity or 0)
+        updated.append(int(updated_at or 0))
+        blob += name.encode()
+        offsets.append(len(blob))
+        blob += (description or "").encode()
+        offsets.append(len(blob))
+
+    columns, blob_offset = _layout(len(ids))
+    digest = hashlib.sha1()
+    for column in (ids, prices, stock, updated, offsets):
+        digest.update(column.tobytes())
+    digest.update(blob)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, generation, len(ids), max(updated, default=0),
+                         time.time(), len(blob), digest.digest())
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(header)
+        for name, column in (("ids", ids), ("prices", prices), ("stock", stock),
+                             ("updated", updated), ("offsets", offsets)):
+            f.seek(columns[name][0])
+            f.write(column.tobytes())
+        f.seek(blob_offset)
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return len(ids)
+
+
+class SnapshotReader:
+    """Per-process view of the current snapshot, remapped when the generation moves."""
+
+    def __init__(self, directory=CATALOG_SNAPSHOT_DIR, enabled=CATALOG_SNAPSHOT_ENABLED):
+        self.enabled = enabled
+        self.path = os.path.join(directory, "catalog.snap")
+        self.control_path = os.path.join(directory, "catalog.gen")
+        self.lock_path = os.path.join(directory, "catalog.lock")
+        self._control = None
+        self._snapshot = None
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def control(self):
+        """The shared [generation, refresh requests] counters."""
+        if self._control is None:
+            size = CONTROL_SLOTS * 8
+            fd = os.open(self.control_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)
+                self._control = memoryview(mmap.mmap(fd, size)).cast("Q")
+            finally:
+                os.close(fd)
+        return self._control
+
+    def current(self):
+        """
+        Return the current CatalogSnapshot.
+        Returns:
+            CatalogSnapshot: None when disabled or nothing has been published
+        """
+        if not self.enabled:
+            return None
+        generation = self.control()[0]
+        if generation != self._generation:
+            with self._lock:
+                if generation != self._generation:
+                    self._load(generation)
+        return self._snapshot
+
+    def _load(self, generation):
+        snapshot = None
+        if generation:
+            try:
+                snapshot = CatalogSnapshot(self.path)
+                logger.info(f"✅ Mapped catalog snapshot generation {snapshot.generation} "
+                            f"({snapshot.count} products, {snapshot.size} bytes)")
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Catalog snapshot unavailable, reading from MySQL: {e}")
+        self._snapshot = snapshot
+        self._generation = generation
+        CATALOG_SNAPSHOT_GENERATION.set(snapshot.generation if snapshot else 0)
+
+    def request_refresh(self):
+        """Ask the pod's publisher to rebuild soon (after a product write commits)."""
+        if self.enabled:
+            control = self.control()
+            control[1] = control[1] + 1
+
+
+class SnapshotPublisher:
+    """Background thread that rebuilds the snapshot while it holds the pod's publisher lock."""
+
+    def __init__(self, reader, poll_interval=CATALOG_SNAPSHOT_POLL_INTERVAL):
+        self.reader = reader
+        self.poll_interval = poll_interval
+        self._lock_fd = None
+        self._connection = None
+        self._handled = None
+        self._polled_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self.pid = None
+
+    def start(self):
+        self.pid = os.getpid()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="catalog-publisher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive() and self.pid == os.getpid()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self._lock_fd is None:
+                    self.try_lead()
+                if self._lock_fd is not None:
+                    self.check()
+            except Exception as e:
+                logger.error(f"🚨 Catalog snapshot publishing failed: {e}")
+                self._close()
+            self._stop.wait(CATALOG_SNAPSHOT_NUDGE_INTERVAL if self._lock_fd is not None else self.poll_interval)
+        self._close()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+
+    def try_lead(self):
+        """Become the pod's publisher if no other process holds the lock."""
+        fd = os.open(self.reader.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+        self._lock_fd = fd
+        logger.info(f"✅ Process {os.getpid()} is publishing the catalog snapshot")
+        return True
+
+    def connection(self):
+        if self._connection is None:
+            self._connection = mysql.connector.connect(**DB_CONFIG)
+        return self._connection
+
+    def _close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except mysql.connector.Error:
+                pass
+            self._connection = None
+
+    def check(self):
+        """
+        Publish when a refresh was requested, when the poll shows the catalog
+        changed, or while the current snapshot is not yet settled.
+        """
+        requested = self.reader.control()[1]
+        now = time.monotonic()
+        if requested == self._handled and now - self._polled_at < self.poll_interval:
+            return
+        refresh_requested = self._handled is not None and requested != self._handled
+        self._handled = requested
+        self._polled_at = now
+
+        snapshot = self.reader.current()
+        if snapshot is not None and not refresh_requested and snapshot.settled():
+            cursor = self.connection().cursor(dictionary=True)
+            try:
+                cursor.execute(queries.PRODUCT_CATALOG_VERSION)
+                version = cursor.fetchone()
+                self.connection().commit()
+            finally:
+                cursor.close()
+            if (version["row_count"], int(version["last_modified"] or 0)) == (snapshot.count, snapshot.last_modified):
+                return
+        self.publish()
+
+    def publish(self):
+        control = self.reader.control()
+        generation = control[0] + 1
+        start = time.perf_counter()
+        cursor = self.connection().cursor()
+        try:
+            cursor.execute(queries.PRODUCT_SNAPSHOT)
+            count = write_snapshot(self.reader.path, generation, cursor)
+            self.connection().commit()
+        finally:
+            cursor.close()
+        control[0] = generation
+        duration = time.perf_counter() - start
+        CATALOG_SNAPSHOT_BUILD_SECONDS.observe(duration)
+        logger.info(f"✅ Published catalog snapshot generation {generation} ({count} products) in {duration:.2f}s")
+
+
+catalog_reader = SnapshotReader()
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def current_catalog():
+    """The mapped catalog snapshot, or None to read from MySQL."""
+    try:
+        return catalog_reader.current()
+    except OSError as e:
+        logger.warning(f"⚠️ Catalog snapshot control file unavailable: {e}")
+        return None
+
+
+def request_catalog_refresh():
+    try:
+        catalog_reader.request_refresh()
+    except OSError as e:
+        logger.warning(f"⚠️ Could not request a catalog snapshot refresh: {e}")
+
+
+def start_catalog_publisher():
+    """Start this process's publisher thread (again after a fork); only one per pod publishes."""
+    global _publisher
+    if not catalog_reader.enabled:
+        return None
+    with _publisher_lock:
+        if _publisher is None or not _publisher.is_alive():
+            _publisher = SnapshotPublisher(catalog_reader).start()
+    return _publisher
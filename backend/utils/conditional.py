@@ -0,0 +1,128 @@
+"""
+Conditional GET for JSON reads.
+
+A view decorated with @conditional runs a cheap validator query from
+database/queries.py first: row counts plus MAX(updated_at)-style columns,
+never the payload itself. The validator row is hashed into a weak ETag and
+its newest *_modified column becomes Last-Modified. When the request's
+If-None-Match (or, without it, If-Modified-Since) still matches, a 304 is
+returned before the view's query or JSON serialization runs. Resources that
+maintain their own version (the cart cache, the catalog snapshot) pass a
+validator callable instead.
+
+TIMESTAMP columns only have one-second resolution, so a resource changed in
+the current second gets no validators; the next read after that second does.
+"""
+import hashlib
+import logging
+from functools import wraps
+
+from flask import make_response, request
+
+from database.db_config import get_db_connection, close_db_connection
+from monitoring.prometheus_metrics import CONDITIONAL_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+CACHE_PUBLIC = "no-cache"
+CACHE_PRIVATE = "private, no-cache"
+
+
+def fetch_validator_row(sql, params):
+    """Run a validator query and return its single row (or None)."""
+    connection = get_db_connection()
+    if not connection:
+        raise Exception("Database connection failed")
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+    finally:
+        close_db_connection(connection)
+
+
+def make_validator(resource, row, scope=()):
+    """
+    Turn a validator row into HTTP validators.
+    Args:
+        resource (str): Resource name, part of the ETag
+        row (dict): Validator query row, including db_now
+        scope (tuple): Query parameters, so per-user ETags never collide
+    Returns:
+        tuple: (etag, last_modified epoch or None), or None when the resource
+        does not exist or changed within the current second
+    """
+    if not row:
+        return None
+    row = dict(row)
+    db_now = int(row.pop("db_now"))
+    modified = [int(value) for key, value in row.items()
+                if key.endswith("_modified") and value is not None]
+    last_modified = max(modified) if modified else None
+    if last_modified is not None and last_modified >= db_now:
+        return None
+    state = repr((resource, tuple(scope), sorted((key, str(value)) for key, value in row.items())))
+    return hashlib.sha1(state.encode()).hexdigest()[:20], last_modified
+
+
+def is_not_modified(etag, last_modified):
+    """Evaluate the request's preconditions; If-None-Match takes precedence."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since.timestamp()
+    return False
+
+
+def conditional(resource, sql=None, params=None, cache_control=CACHE_PUBLIC, validator=None):
+    """
+    Decorate a GET view with validator-based 304 handling.
+    Args:
+        resource (str): Metrics label and ETag namespace
+        sql (str): Validator query
+        params (callable): Called with the view's kwargs; returns the query
+            parameters, or None to skip validation (e.g. not logged in)
+        cache_control (str): Cache-Control sent with 200 and 304 responses
+        validator (callable): Alternative to sql/params for resources that
+            keep their own version; called with the view's kwargs and returns
+            (etag, last_modified) or None
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(*args, **kwargs)
+            if validator is None:
+                query_params = params(**kwargs) if params else ()
+                if query_params is None:
+                    return view(*args, **kwargs)
+
+            try:
+                if validator is not None:
+                    state = validator(**kwargs)
+                else:
+                    state = make_validator(resource, fetch_validator_row(sql, query_params), query_params)
+            except Exception as e:
+                logger.warning(f"⚠️ Validator for {resource} failed, serving full response: {e}")
+                state = None
+            if state is None:
+                CONDITIONAL_REQUESTS.labels(resource=resource, result='uncacheable').inc()
+                return view(*args, **kwargs)
+
+            etag, last_modified = state
+            if is_not_modified(etag, last_modified):
+                CONDITIONAL_REQUESTS.labels(resource=resource, result='not_modified').inc()
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                CONDITIONAL_REQUESTS.labels(resource=resource, result='modified').inc()
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,313 @@
+"""
+Idempotency-Key support for retried writes.
+
+A write sent with an Idempotency-Key header runs at most once per user,
+endpoint and key:
+  - the first request claims the key in the idempotency_keys table
+    (status in_flight), runs the view and stores its status and JSON body
+  - a duplicate gets the stored response back, marked with
+    Idempotent-Replayed: true, without touching the order or cart tables
+  - a duplicate that arrives while the first is still running waits for it
+    (on an in-process event when the first runs in the same worker,
+    otherwise by polling the table) up to IDEMPOTENCY_WAIT_SECONDS
+  - reusing a key with a different request body is rejected with 422
+
+Views store their response with commit_with_response(), which marks the key
+completed on the view's own cursor, so the order or cart write and the stored
+response commit in one transaction. A key still in_flight therefore never
+has a committed write behind it, and a claim not finished within
+IDEMPOTENCY_LEASE_SECONDS (its worker died) can safely be taken over. The
+lease has to outlast the gunicorn worker timeout, after which a stuck
+request's connection is gone and its transaction rolled back.
+
+Completed responses are also kept in a bounded per-worker LRU, so retries
+that land on the same worker are answered without a DB round trip. 5xx
+responses are not stored: the key is released so the client can retry.
+Keys expire after IDEMPOTENCY_TTL_SECONDS.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, g, jsonify, make_response, request, session
+from mysql.connector import errorcode, Error
+
+from database.db_config import get_db_connection, close_db_connection
+from database import queries
+from monitoring.prometheus_metrics import IDEMPOTENCY_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 86400))
+# Longer than the gunicorn worker timeout (120s)
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", 180))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 10))
+IDEMPOTENCY_MEMORY_ENTRIES = int(os.getenv("IDEMPOTENCY_MEMORY_ENTRIES", 10000))
+
+
+class StoredResponse:
+    __slots__ = ("request_hash", "status", "body", "expires_at")
+
+    def __init__(self, request_hash, status, body, expires_at):
+        self.request_hash = request_hash
+        self.status = status
+        self.body = body
+        self.expires_at = expires_at
+
+
+class ResponseStore:
+    """Per-worker LRU of completed responses plus events for in-flight keys."""
+
+    def __init__(self, max_entries=IDEMPOTENCY_MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self.completed = OrderedDict()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def get(self, scope):
+        with self.lock:
+            stored = self.completed.get(scope)
+            if stored is None:
+                return None
+            if stored.expires_at < time.time():
+                del self.completed[scope]
+                return None
+            self.completed.move_to_end(scope)
+            return stored
+
+    def put(self, scope, stored):
+        with self.lock:
+            self.completed[scope] = stored
+            self.completed.move_to_end(scope)
+            while len(self.completed) > self.max_entries:
+                self.completed.popitem(last=False)
+
+    def begin(self, scope):
+        with self.lock:
+            self.in_flight[scope] = threading.Event()
+
+    def finish(self, scope):
+        with self.lock:
+            event = self.in_flight.pop(scope, None)
+        if event is not None:
+            event.set()
+
+    def waiter(self, scope):
+        with self.lock:
+            return self.in_flight.get(scope)
+
+
+response_store = ResponseStore()
+
+
+def request_fingerprint():
+    """Hash of what makes two requests 'the same' for a key: method, path and body."""
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.path}\n".encode())
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def replay(stored, endpoint, result='replayed'):
+    IDEMPOTENCY_REQUESTS.labels(endpoint=endpoint, result=result).inc()
+    response = Response(stored.body, status=stored.status, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _execute(sql, params):
+    """Run one statement on its own short transaction; return (rowcount, row)."""
+    connection = get_db_connection()
+    if not connection:
+        raise Exception("Database connection failed")
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        row = cursor.fetchone() if cursor.with_rows else None
+        connection.commit()
+        return cursor.rowcount, row
+    finally:
+        close_db_connection(connection)
+
+
+def claim(scope, request_hash):
+    """
+    Try to claim a key.
+    Returns:
+        dict: None if this request now owns the key, else the existing row
+    """
+    user_id, endpoint, key = scope
+    try:
+        _execute(queries.IDEMPOTENCY_CLAIM, (user_id, endpoint, key, request_hash, IDEMPOTENCY_TTL_SECONDS))
+        return None
+    except Error as e:
+        if e.errno != errorcode.ER_DUP_ENTRY:
+            raise
+
+    _, row = _execute(queries.IDEMPOTENCY_LOOKUP, (IDEMPOTENCY_LEASE_SECONDS, *scope))
+    if row and (row['expired'] or (row['status'] == 'in_flight' and row['lease_expired'])):
+        taken, _ = _execute(
+            queries.IDEMPOTENCY_TAKEOVER,
+            (request_hash, IDEMPOTENCY_TTL_SECONDS, *scope, IDEMPOTENCY_LEASE_SECONDS)
+        )
+        if taken:
+            logger.warning(f"⚠️ Took over expired or abandoned idempotency key for {endpoint}")
+            return None
+        _, row = _execute(queries.IDEMPOTENCY_LOOKUP, (IDEMPOTENCY_LEASE_SECONDS, *scope))
+    return row
+
+
+def wait_for_completion(scope):
+    """
+    Wait for the request holding the key to finish.
+    Returns:
+        dict: The completed row, the still in-flight row on timeout, or None
+        if the key was released (the holder failed)
+    """
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    event = response_store.waiter(scope)
+    if event is not None:
+        event.wait(IDEMPOTENCY_WAIT_SECONDS)
+
+    delay = 0.05
+    while True:
+        _, row = _execute(queries.IDEMPOTENCY_LOOKUP, (IDEMPOTENCY_LEASE_SECONDS, *scope))
+        remaining = deadline - time.monotonic()
+        if row is None or row['status'] == 'completed' or remaining <= 0:
+            return row
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 1.0)
+
+
+def commit_with_response(connection, cursor, rv):
+    """
+    Commit a view's transaction together with its response.
+    Under an Idempotency-Key the key is marked completed with the response on
+    the view's cursor first, so the write and the stored response commit or
+    roll back together.
+    Args:
+        rv: Anything a view can return
+    Returns:
+        Response: The response to return from the view
+    """
+    response = make_response(rv)
+    scope = g.get('idempotency_scope')
+    if scope is not None:
+        cursor.execute(queries.IDEMPOTENCY_COMPLETE,
+                       (response.status_code, response.get_data(as_text=True), *scope))
+    connection.commit()
+    g.idempotency_completed = scope is not None
+    return response
+
+
+def release(scope):
+    try:
+        _execute(queries.IDEMPOTENCY_RELEASE, scope)
+    except Exception as e:
+        logger.error(f"🚨 Failed to release idempotency key for {scope[1]}: {e}")
+
+
+def mismatch_response(endpoint):
+    IDEMPOTENCY_REQUESTS.labels(endpoint=endpoint, result='mismatch').inc()
+    return jsonify({"message": f"{IDEMPOTENCY_HEADER} was already used for a different request"}), 422
+
+
+def in_progress_response(endpoint):
+    IDEMPOTENCY_REQUESTS.labels(endpoint=endpoint, result='in_progress').inc()
+    response = jsonify({"message": f"A request with this {IDEMPOTENCY_HEADER} is still in progress"})
+    response.headers['Retry-After'] = '1'
+    return response, 409
+
+
+def idempotent(view):
+    """
+    Honour the Idempotency-Key header on a write view.
+    Requests without the header, or from logged-out users, run unchanged.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        user_id = session.get('user_id')
+        if not key or not user_id:
+            return view(*args, **kwargs)
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return jsonify({
+                "message": f"{IDEMPOTENCY_HEADER} must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+            }), 400
+
+        endpoint = request.endpoint
+        scope = (user_id, endpoint, key)
+        request_hash = request_fingerprint()
+
+        stored = response_store.get(scope)
+        if stored is not None:
+            if stored.request_hash != request_hash:
+                return mismatch_response(endpoint)
+            return replay(stored, endpoint)
+
+        waited = False
+        try:
+            row = claim(scope, request_hash)
+            if row is not None and row['status'] == 'in_flight' and row['request_hash'] == request_hash:
+                waited = True
+                row = wait_for_completion(scope)
+                if row is None:
+                    # The holder failed and released the key: run it ourselves
+                    row = claim(scope, request_hash)
+        except Exception as e:
+            logger.error(f"🚨 Idempotency store unavailable for {endpoint}: {e}")
+            response = jsonify({"message": "Service temporarily unavailable", "error": str(e)})
+            response.headers['Retry-After'] = '1'
+            return response, 503
+
+        if row is not None:
+            if row['request_hash'] != request_hash:
+                return mismatch_response(endpoint)
+            if row['status'] != 'completed':
+                return in_progress_response(endpoint)
+            stored = StoredResponse(request_hash, row['response_status'], row['response_body'],
+                                    time.time() + IDEMPOTENCY_TTL_SECONDS)
+            response_store.put(scope, stored)
+            return replay(stored, endpoint, 'waited' if waited else 'replayed')
+
+        # This request owns the key
+        response_store.begin(scope)
+        g.idempotency_scope = scope
+        g.idempotency_completed = False
+        try:
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                release(scope)
+                raise
+
+            if g.idempotency_completed:
+                # Stored with the view's own transaction
+                response_store.put(scope, StoredResponse(
+                    request_hash, response.status_code, response.get_data(as_text=True),
+                    time.time() + IDEMPOTENCY_TTL_SECONDS
+                ))
+            elif response.status_code >= 500:
+                release(scope)
+            else:
+                # The view answered without committing a write (e.g. a 4xx)
+                body = response.get_data(as_text=True)
+                response_store.put(scope, StoredResponse(
+                    request_hash, response.status_code, body, time.time() + IDEMPOTENCY_TTL_SECONDS
+                ))
+                try:
+                    _execute(queries.IDEMPOTENCY_COMPLETE, (response.status_code, body, *scope))
+                except Exception as e:
+                    # Nothing was written under the key, so a takeover after the lease is harmless
+                    logger.error(f"🚨 Failed to store idempotent response for {endpoint}: {e}")
+            IDEMPOTENCY_REQUESTS.labels(endpoint=endpoint, result='executed').inc()
+            return response
+        finally:
+            response_store.finish(scope)
+    return wrapper
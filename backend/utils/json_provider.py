@@ -0,0 +1,77 @@
+"""
+JSON provider for jsonify, request.get_json and direct JSON writers.
+
+Uses orjson when it is installed and the stdlib json module otherwise.
+Both backends produce the same documents:
+  - Decimal (MySQL DECIMAL columns) becomes a JSON number
+  - datetime, date and time become ISO 8601 strings
+  - keys are sorted, separators are compact outside debug mode, and text
+    is UTF-8 without \\u escapes
+So routes can hand rows to jsonify as MySQL returns them, with no
+float()/isoformat() conversion of their own. utils/serializer.py and the
+outbox payloads use the same rules.
+"""
+import datetime
+import decimal
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+from monitoring.request_timing import phase
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def json_default(value):
+    """Encode the non-JSON types found in MySQL rows; defer the rest to Flask's default."""
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+def dumps(obj):
+    """Compact JSON text with the provider's rules, for use outside a request (e.g. the outbox)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=json_default, option=ORJSON_OPTIONS).decode()
+    return json.dumps(obj, default=json_default, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(json_default)
+    ensure_ascii = False
+    sort_keys = True
+
+    def __init__(self, app):
+        super().__init__(app)
+        # Cleared by benchmarks to measure the stdlib fallback
+        self.fast = orjson is not None
+
+    def dumps(self, obj, **kwargs):
+        if not self.fast or kwargs:
+            # Explicit json.dumps options (indent, cls, ...) are only honoured by the stdlib
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        if not self.fast or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        with phase("json"):
+            if not self.fast:
+                return super().response(*args, **kwargs)
+            obj = self._prepare_response_obj(args, kwargs)
+            option = ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE
+            if (self.compact is None and self._app.debug) or self.compact is False:
+                option |= orjson.OPT_INDENT_2
+            return self._app.response_class(
+                orjson.dumps(obj, default=self.default, option=option), mimetype=self.mimetype
+            )
@@ -0,0 +1,297 @@
+"""
+Transactional outbox for post-checkout side effects.
+
+Request handlers call enqueue() on their own cursor, so the event commits
+or rolls back with the order. Worker threads then deliver events to the
+handlers registered with @register_handler:
+  - a batch is claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+    of workers (threads, gunicorn workers, CLI processes) can share the table
+  - claiming pushes available_at forward by OUTBOX_LEASE_SECONDS and commits,
+    so handlers run outside the transaction; a worker that dies mid-batch
+    leaves its events to be claimed again once the lease runs out
+  - failures are retried with exponential backoff and marked failed after
+    OUTBOX_MAX_ATTEMPTS
+Delivery is at-least-once: handlers must tolerate seeing an event twice.
+
+Workers run in-process when OUTBOX_WORKER_ENABLED=true, or standalone:
+    python -m utils.outbox --threads 2
+    python -m utils.outbox --event-type order.created   # only these event types
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import threading
+import time
+
+import mysql.connector
+
+from database.db_config import DB_CONFIG
+from database import queries
+from monitoring.prometheus_metrics import (
+    OUTBOX_DEPTH,
+    OUTBOX_LAG,
+    OUTBOX_EVENTS,
+    OUTBOX_DELIVERY_LATENCY,
+)
+from utils import json_provider
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 1))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", 60))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_RETRY_BASE_SECONDS = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", 2))
+OUTBOX_RETRY_MAX_SECONDS = float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", 600))
+OUTBOX_WORKER_THREADS = int(os.getenv("OUTBOX_WORKER_THREADS", 2))
+OUTBOX_STATS_INTERVAL = float(os.getenv("OUTBOX_STATS_INTERVAL", 10))
+
+HANDLERS = {}
+
+
+def register_handler(event_type):
+    """Register a function(payload: dict) as the handler for an event type."""
+    def decorator(func):
+        HANDLERS[event_type] = func
+        return func
+    return decorator
+
+
+def enqueue(cursor, event_type, payload, aggregate_id=None):
+    """
+    Add an event to the outbox inside the caller's transaction.
+    Args:
+        cursor: Cursor on the connection that will commit the business change
+        event_type (str): Handler name, e.g. "order.created"
+        payload (dict): JSON-serializable event data
+        aggregate_id (int): Optional id of the row the event is about
+    """
+    cursor.execute(queries.OUTBOX_INSERT, (event_type, aggregate_id, json_provider.dumps(payload)))
+
+
+def retry_delay(attempts):
+    return min(OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), OUTBOX_RETRY_MAX_SECONDS)
+
+
+class OutboxWorker:
+    """
+    One dispatch thread with its own DB connection (never a pool slot).
+    event_types limits it to those event types; by default it claims all.
+    """
+
+    def __init__(self, name="outbox-worker", batch_size=OUTBOX_BATCH_SIZE,
+                 poll_interval=OUTBOX_POLL_INTERVAL, sample_stats=False, event_types=None):
+        self.name = name
+        self.event_types = tuple(event_types) if event_types else None
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.sample_stats = sample_stats
+        self._connection = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats_sampled_at = 0.0
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        logger.info(f"✅ {self.name} started (batch {self.batch_size}, poll {self.poll_interval}s)")
+        while not self._stop.is_set():
+            try:
+                if self.sample_stats:
+                    self.maybe_sample_stats()
+                if self.run_once() == 0:
+                    self._stop.wait(self.poll_interval)
+            except mysql.connector.Error as e:
+                logger.error(f"🚨 {self.name} database error: {e}")
+                self._close()
+                self._stop.wait(self.poll_interval)
+        self._close()
+
+    def connection(self):
+        if self._connection is None:
+            self._connection = mysql.connector.connect(**DB_CONFIG)
+        return self._connection
+
+    def _close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except mysql.connector.Error:
+                pass
+            self._connection = None
+
+    def claim(self):
+        """Lease up to batch_size due events and return them."""
+        connection = self.connection()
+        cursor = connection.cursor(dictionary=True)
+        try:
+            if self.event_types:
+                cursor.execute(
+                    queries.OUTBOX_CLAIM_TYPES.format(placeholders=queries.in_placeholders(len(self.event_types))),
+                    (*self.event_types, self.batch_size)
+                )
+            else:
+                cursor.execute(queries.OUTBOX_CLAIM, (self.batch_size,))
+            events = cursor.fetchall()
+            if events:
+                ids = [event["id"] for event in events]
+                cursor.execute(
+                    queries.OUTBOX_LEASE.format(placeholders=queries.in_placeholders(len(ids))),
+                    (OUTBOX_LEASE_SECONDS, *ids)
+                )
+            connection.commit()
+            return events
+        except mysql.connector.Error:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def record(self, sql, params):
+        connection = self.connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(sql, params)
+            connection.commit()
+        finally:
+            cursor.close()
+
+    def dispatch(self, event):
+        """Run the event's handler and record the outcome."""
+        event_type = event["event_type"]
+        attempts = event["attempts"] + 1
+        try:
+            handler = HANDLERS.get(event_type)
+            if handler is None:
+                raise LookupError(f"No handler registered for {event_type}")
+            payload = event["payload"]
+            handler(json.loads(payload) if isinstance(payload, (str, bytes)) else payload)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:2000]
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                self.record(queries.OUTBOX_FAIL, (error, event["id"]))
+                OUTBOX_EVENTS.labels(event_type=event_type, result='failed').inc()
+                logger.error(f"🚨 Outbox event {event['id']} ({event_type}) failed permanently: {error}")
+            else:
+                self.record(queries.OUTBOX_RETRY, (retry_delay(attempts), error, event["id"]))
+                OUTBOX_EVENTS.labels(event_type=event_type, result='retry').inc()
+                logger.warning(f"⚠️ Outbox event {event['id']} ({event_type}) attempt {attempts} failed: {error}")
+            return False
+
+        self.record(queries.OUTBOX_DONE, (event["id"],))
+        OUTBOX_EVENTS.labels(event_type=event_type, result='done').inc()
+        OUTBOX_DELIVERY_LATENCY.labels(event_type=event_type).observe(
+            max(0.0, time.time() - float(event["created_at"]))
+        )
+        return True
+
+    def run_once(self):
+        """Claim and dispatch one batch. Returns the number of events claimed."""
+        events = self.claim()
+        for event in events:
+            self.dispatch(event)
+        return len(events)
+
+    def maybe_sample_stats(self):
+        if time.monotonic() - self._stats_sampled_at < OUTBOX_STATS_INTERVAL:
+            return
+        self._stats_sampled_at = time.monotonic()
+        connection = self.connection()
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(queries.OUTBOX_STATS)
+            stats = cursor.fetchone()
+            connection.commit()
+        finally:
+            cursor.close()
+        OUTBOX_DEPTH.set(stats["depth"])
+        OUTBOX_LAG.set(float(stats["lag_seconds"] or 0))
+
+
+_workers = []
+_workers_lock = threading.Lock()
+_workers_pid = None
+
+
+def start_outbox_workers(threads=OUTBOX_WORKER_THREADS):
+    """Start in-process dispatch threads for this process (again after a fork)."""
+    global _workers, _workers_pid
+    with _workers_lock:
+        if _workers_pid == os.getpid() and all(worker.is_alive() for worker in _workers):
+            return _workers
+        _workers = [
+            OutboxWorker(name=f"outbox-worker-{index}", sample_stats=(index == 0)).start()
+            for index in range(threads)
+        ]
+        _workers_pid = os.getpid()
+    return _workers
+
+
+# Built-in handlers
+@register_handler("order.created")
+def log_order_created(payload):
+    """Placeholder for confirmation emails, analytics and stock sync."""
+    logger.info(f"📧 Order {payload['order_id']} created for user {payload['user_id']} "
+                f"({len(payload.get('items', []))} items, total {payload['total_amount']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dispatch transactional outbox events")
+    parser.add_argument("--threads", type=int, default=OUTBOX_WORKER_THREADS)
+    parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=OUTBOX_POLL_INTERVAL)
+    parser.add_argument("--once", action="store_true", help="Drain due events once and exit")
+    parser.add_argument("--event-type", action="append", dest="event_types",
+                        help="Only deliver this event type (repeatable; default all)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.once:
+        worker = OutboxWorker(batch_size=args.batch_size, event_types=args.event_types)
+        total = 0
+        while True:
+            claimed = worker.run_once()
+            total += claimed
+            if claimed == 0:
+                break
+        worker._close()
+        logger.info(f"Dispatched {total} outbox events")
+        return
+
+    workers = [
+        OutboxWorker(name=f"outbox-worker-{index}", batch_size=args.batch_size,
+                     poll_interval=args.poll_interval, sample_stats=(index == 0),
+                     event_types=args.event_types).start()
+        for index in range(args.threads)
+    ]
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    try:
+        while not stopping.is_set():
+            stopping.wait(1)
+    except KeyboardInterrupt:
+        pass
+    for worker in workers:
+        worker.stop()
+    for worker in workers:
+        worker.join(timeout=OUTBOX_LEASE_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Rate limiting and load shedding in front of Flask.
+
+RateLimitMiddleware runs before Flask routing and the session store, so a
+rejected request never loads a session or touches the connection pool:
+  - every /api request is put in a route class (checkout, cart, auth, ...)
+    with its own per-IP and per-session token buckets; an empty bucket
+    answers 429 with Retry-After
+  - when this worker's recent pool wait (database.db_config.get_pool_wait)
+    passes a class's shedding threshold, the request is answered 503 with
+    Retry-After; low-priority classes (catalog browsing, order history,
+    admin writes) are shed first and checkout never is
+Buckets live in a file-backed mmap (SharedBuckets) locked per slot group
+with fcntl, so the limits hold across all gunicorn workers in a pod. Where
+fcntl is unavailable the buckets fall back to per-process memory.
+
+Sessions are only identified by their cookie here: loading the session to
+find the user would cost the file read the limiter is meant to save.
+"""
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from werkzeug.http import parse_cookie
+
+from database.db_config import get_pool_wait
+from monitoring.prometheus_metrics import RATE_LIMITED_REQUESTS
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+_default_shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+RATE_LIMIT_SHM_PATH = os.getenv("RATE_LIMIT_SHM_PATH", os.path.join(_default_shm_dir, "shopeasy-rate-limit"))
+RATE_LIMIT_GROUPS = int(os.getenv("RATE_LIMIT_GROUPS", 8192))
+# Number of reverse proxies (e.g. the nginx ingress) whose X-Forwarded-For entries are trusted
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", 0))
+
+LOAD_SHED_LOW_WAIT_MS = float(os.getenv("LOAD_SHED_LOW_WAIT_MS", 100))
+LOAD_SHED_NORMAL_WAIT_MS = float(os.getenv("LOAD_SHED_NORMAL_WAIT_MS", 1000))
+LOAD_SHED_RETRY_AFTER = int(os.getenv("LOAD_SHED_RETRY_AFTER", 2))
+
+EXEMPT_PREFIXES = ("/api/health/", "/api/metrics")
+
+# Pool wait (seconds) above which each priority is shed; None is never shed
+SHED_THRESHOLDS = {
+    "low": LOAD_SHED_LOW_WAIT_MS / 1000,
+    "normal": LOAD_SHED_NORMAL_WAIT_MS / 1000,
+    "critical": None,
+}
+
+
+def _bucket_env(name, default):
+    """Read a "rate/burst" limit (tokens per second / bucket size) from the environment."""
+    rate, burst = os.getenv(name, default).split("/")
+    return float(rate), float(burst)
+
+
+class RouteClass:
+    __slots__ = ("name", "priority", "limits")
+
+    def __init__(self, name, priority, ip_limit, user_limit):
+        self.name = name
+        self.priority = priority
+        env_prefix = f"RATE_LIMIT_{name.upper()}"
+        self.limits = {
+            "ip": _bucket_env(f"{env_prefix}_IP", ip_limit),
+            "user": _bucket_env(f"{env_prefix}_USER", user_limit),
+        }
+
+
+ROUTE_CLASSES = {
+    route_class.name: route_class for route_class in (
+        RouteClass("checkout", "critical", "2/20", "0.5/5"),
+        RouteClass("auth", "normal", "1/20", "0.5/10"),
+        RouteClass("cart", "normal", "20/60", "5/20"),
+        RouteClass("read", "normal", "50/150", "20/60"),
+        RouteClass("browse", "low", "50/150", "20/60"),
+        RouteClass("admin", "low", "5/20", "5/20"),
+    )
+}
+
+# (methods, path prefix, route class); first match wins, anything else is "read"
+ROUTE_RULES = [
+    (("POST",), "/api/auth/", "auth"),
+    (("POST",), "/api/orders/transitions", "admin"),
+    (("POST",), "/api/orders", "checkout"),
+    (("POST",), "/api/products/lookup", "browse"),
+    (("POST", "PUT", "PATCH", "DELETE"), "/api/products", "admin"),
+    (("GET", "HEAD"), "/api/products", "browse"),
+    (("GET", "HEAD"), "/api/orders", "browse"),
+    (("POST", "DELETE"), "/api/cart", "cart"),
+]
+
+
+def classify(method, path):
+    for methods, prefix, name in ROUTE_RULES:
+        if method in methods and path.startswith(prefix):
+            return ROUTE_CLASSES[name]
+    return ROUTE_CLASSES["read"]
+
+
+class SharedBuckets:
+    """
+    Fixed-size table of token buckets in a memory-mapped file.
+    Keys hash to a group of WAYS slots; a new key takes an empty slot or the
+    one refilled longest ago (a bucket idle that long is full anyway).
+    """
+    HEADER = struct.Struct("<4sII")  # magic, groups, ways
+    SLOT = struct.Struct("<Qdd")     # key hash, tokens, last refill (epoch seconds)
+    MAGIC = b"SERL"
+    WAYS = 8
+
+    def __init__(self, path=RATE_LIMIT_SHM_PATH, groups=RATE_LIMIT_GROUPS):
+        self.path = path
+        self.groups = groups
+        self.group_bytes = self.SLOT.size * self.WAYS
+        self.size = self.HEADER.size + groups * self.group_bytes
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+
+    def _open(self):
+        """Map the table for this process; fcntl locks are per process, so reopen after a fork."""
+        if fcntl is None or not self.path:
+            self._fd = None
+            self._map = mmap.mmap(-1, self.size)
+        else:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            try:
+                header = self.HEADER.pack(self.MAGIC, self.groups, self.WAYS)
+                if os.fstat(fd).st_size != self.size or os.pread(fd, self.HEADER.size, 0) != header:
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, self.size)
+                    os.pwrite(fd, header, 0)
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+            self._fd = fd
+            self._map = mmap.mmap(fd, self.size)
+        self._pid = os.getpid()
+
+    def take(self, key, rate, burst, now):
+        """
+        Take one token from the key's bucket.
+        Returns:
+            float: 0.0 if allowed, else seconds until a token is available
+        """
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        offset = self.HEADER.size + (key_hash % self.groups) * self.group_bytes
+        with self._lock:
+            if self._pid != os.getpid():
+                self._open()
+            if self._fd is not None:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, self.group_bytes, offset)
+            try:
+                position, tokens = self._find(key_hash, offset, rate, burst, now)
+                if tokens >= 1:
+                    tokens -= 1
+                    wait = 0.0
+                else:
+                    wait = (1 - tokens) / rate
+                self.SLOT.pack_into(self._map, position, key_hash, tokens, now)
+                return wait
+            finally:
+                if self._fd is not None:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, self.group_bytes, offset)
+
+    def _find(self, key_hash, offset, rate, burst, now):
+        """Return (slot position, refilled tokens) for the key, claiming a slot if needed."""
+        victim, victim_stamp = offset, math.inf
+        for way in range(self.WAYS):
+            position = offset + way * self.SLOT.size
+            slot_hash, tokens, stamp = self.SLOT.unpack_from(self._map, position)
+            if slot_hash == key_hash:
+                return position, min(burst, tokens + max(now - stamp, 0) * rate)
+            if stamp < victim_stamp:
+                victim, victim_stamp = position, stamp
+        return victim, burst
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, buckets=None, cookie_name="session"):
+        self.app = app
+        self.buckets = buckets or SharedBuckets()
+        self.cookie_name = cookie_name
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        method = environ.get('REQUEST_METHOD', '')
+        if method == 'OPTIONS' or not path.startswith('/api/') or path.startswith(EXEMPT_PREFIXES):
+            return self.app(environ, start_response)
+
+        route_class = classify(method, path)
+
+        # Shed before spending tokens, so clients are not also throttled once the pool recovers
+        threshold = SHED_THRESHOLDS[route_class.priority]
+        if threshold is not None and get_pool_wait() > threshold:
+            RATE_LIMITED_REQUESTS.labels(route_class=route_class.name, reason='shed').inc()
+            return self.reject(environ, start_response, '503 Service Unavailable',
+                               "Server is busy, please retry later", LOAD_SHED_RETRY_AFTER)
+
+        now = time.time()
+        for kind, identity in self.identities(environ):
+            rate, burst = route_class.limits[kind]
+            wait = self.buckets.take(f"{kind}:{route_class.name}:{identity}", rate, burst, now)
+            if wait:
+                RATE_LIMITED_REQUESTS.labels(route_class=route_class.name, reason=kind).inc()
+                return self.reject(environ, start_response, '429 Too Many Requests',
+                                   "Too many requests, please retry later", math.ceil(wait))
+
+        return self.app(environ, start_response)
+
+    def identities(self, environ):
+        """Yield (bucket kind, identity): the client IP, plus the session cookie when present."""
+        client_ip = environ.get('REMOTE_ADDR', '')
+        if RATE_LIMIT_TRUSTED_PROXIES:
+            forwarded = [ip.strip() for ip in environ.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+            if len(forwarded) >= RATE_LIMIT_TRUSTED_PROXIES:
+                client_ip = forwarded[-RATE_LIMIT_TRUSTED_PROXIES]
+        yield "ip", client_ip
+
+        cookie = environ.get('HTTP_COOKIE')
+        if cookie:
+            session_id = parse_cookie(cookie).get(self.cookie_name)
+            if session_id:
+                yield "user", session_id
+
+    def reject(self, environ, start_response, status, message, retry_after):
+        body = json.dumps({"message": message, "retry_after": retry_after}).encode()
+        headers = [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(body))),
+            ('Retry-After', str(retry_after)),
+            ('Cache-Control', 'no-store'),
+        ]
+        origin = environ.get('HTTP_ORIGIN')
+        if origin:
+            # Let the browser show the error instead of reporting a CORS failure
+            headers += [
+                ('Access-Control-Allow-Origin', origin),
+                ('Access-Control-Allow-Credentials', 'true'),
+                ('Access-Control-Expose-Headers', 'Retry-After'),
+                ('Vary', 'Origin'),
+            ]
+        start_response(status, headers)
+        return [body]
@@ -0,0 +1,116 @@
+"""
+Per-route request deadlines.
+
+DeadlineMiddleware gives every /api request a time budget when it arrives,
+before the session loads, by route class (utils/rate_limit.py):
+
+    checkout 15s, auth 5s, cart 5s, read 3s, browse 5s, admin 30s
+
+Each can be changed with DEADLINE_<CLASS>_MS, e.g. DEADLINE_BROWSE_MS=2000.
+A client can ask for a shorter budget with an X-Request-Timeout-Ms header;
+values above the route's budget are capped to it.
+
+The budget is enforced in the database layer (database/deadlines.py): pool
+waits stop at the deadline, SELECTs get MAX_EXECUTION_TIME and writes a
+lower lock wait timeout. When that cuts a request short, the after_request
+hook replaces whatever the view returned (usually its generic 500) with:
+  - 503 + Retry-After when no pool connection came free in time
+  - 504 when a query or lock wait ran out of budget
+Requests that miss their deadline are counted in
+http_request_deadline_exceeded_total{route_class,stage}, and the worker time
+they used in http_request_abandoned_work_seconds_total{route_class}.
+"""
+import os
+from time import monotonic
+
+from flask import jsonify
+
+from database.deadlines import Deadline, current_deadline, set_deadline
+from monitoring.prometheus_metrics import ABANDONED_WORK_SECONDS, REQUEST_DEADLINE_EXCEEDED
+from utils.rate_limit import EXEMPT_PREFIXES, LOAD_SHED_RETRY_AFTER, ROUTE_CLASSES, classify
+
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+# Shortest budget a client can ask for
+DEADLINE_MIN_MS = int(os.getenv("DEADLINE_MIN_MS", 100))
+
+DEFAULT_DEADLINES_MS = {
+    "checkout": 15000,
+    "auth": 5000,
+    "cart": 5000,
+    "read": 3000,
+    "browse": 5000,
+    "admin": 30000,
+}
+
+# Route class -> budget in seconds
+DEADLINES = {
+    name: int(os.getenv(f"DEADLINE_{name.upper()}_MS", DEFAULT_DEADLINES_MS[name])) / 1000
+    for name in ROUTE_CLASSES
+}
+
+
+def request_budget(route_class, environ):
+    """The route's budget in seconds, shortened by the client's header if it asks for less."""
+    budget = DEADLINES[route_class.name]
+    requested = environ.get("HTTP_X_REQUEST_TIMEOUT_MS")
+    if requested:
+        try:
+            budget = min(budget, max(int(requested), DEADLINE_MIN_MS) / 1000)
+        except ValueError:
+            pass
+    return budget
+
+
+class DeadlineMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        method = environ.get('REQUEST_METHOD', '')
+        if method == 'OPTIONS' or not path.startswith('/api/') or path.startswith(EXEMPT_PREFIXES):
+            return self.app(environ, start_response)
+
+        route_class = classify(method, path)
+        deadline = Deadline(route_class.name, request_budget(route_class, environ))
+        set_deadline(deadline)
+        try:
+            return self.app(environ, start_response)
+        finally:
+            set_deadline(None)
+            elapsed = monotonic() - deadline.started
+            if deadline.failure is not None or elapsed > deadline.budget:
+                REQUEST_DEADLINE_EXCEEDED.labels(
+                    route_class=deadline.route_class, stage=deadline.failure or "late"
+                ).inc()
+                ABANDONED_WORK_SECONDS.labels(route_class=deadline.route_class).inc(elapsed)
+
+
+def deadline_response(response):
+    """after_request hook: answer requests cut short by their deadline with a structured 503/504."""
+    deadline = current_deadline()
+    if deadline is None or deadline.failure is None:
+        return response
+
+    body = {
+        "message": "Request timed out",
+        "error": "deadline_exceeded",
+        "stage": deadline.failure,
+        "deadline_ms": int(deadline.budget * 1000),
+    }
+    if deadline.failure == "pool":
+        body["message"] = "Server is busy, please retry later"
+        body["retry_after"] = LOAD_SHED_RETRY_AFTER
+        replacement = jsonify(body)
+        replacement.status_code = 503
+        replacement.headers["Retry-After"] = str(LOAD_SHED_RETRY_AFTER)
+    else:
+        replacement = jsonify(body)
+        replacement.status_code = 504
+    replacement.headers["Cache-Control"] = "no-store"
+    return replacement
+
+
+def init_request_deadlines(app):
+    """Register the 503/504 response hook; call after CORS(app) so the replacement gets CORS headers."""
+    app.after_request(deadline_response)
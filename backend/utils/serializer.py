@@ -0,0 +1,111 @@
+"""
+Direct JSON serialization of database rows.
+
+jsonify needs a dict per row, and the read paths used to build a model
+instance and then its to_dict() first. For large listings the routes fetch
+plain tuples instead, and a RowEncoder writes the JSON text straight from
+them. It follows the app's JSON provider rules (utils/json_provider.py):
+sorted keys, compact separators, UTF-8 strings, Decimal as a number and
+datetime as ISO 8601.
+"""
+from json.encoder import encode_basestring as json_string
+
+from monitoring.request_timing import timed
+
+
+def json_int(value):
+    return str(int(value))
+
+
+def json_number(value):
+    """int, float or Decimal as a JSON number, formatted like the provider's floats."""
+    return repr(float(value))
+
+
+def json_isoformat(value):
+    return '"' + value.isoformat() + '"'
+
+
+def nullable(encode):
+    def encode_or_null(value):
+        return "null" if value is None else encode(value)
+    return encode_or_null
+
+
+class RowEncoder:
+    """
+    Encodes tuple rows as JSON objects.
+    Args:
+        columns (dict): JSON key -> (row index, value encoder). An encoder of
+            None marks a nested value, passed pre-encoded to encode() under
+            the name given as its index.
+    """
+    __slots__ = ("fields",)
+
+    def __init__(self, columns):
+        self.fields = tuple(
+            (json_string(key) + ":", index, encode)
+            for key, (index, encode) in sorted(columns.items())
+        )
+
+    def encode(self, row, nested=None):
+        return "{" + ",".join(
+            prefix + (nested[index] if encode is None else encode(row[index]))
+            for prefix, index, encode in self.fields
+        ) + "}"
+
+    def encode_list(self, rows):
+        return "[" + ",".join(map(self.encode, rows)) + "]"
+
+
+def json_body(text):
+    """Finish a document the way jsonify does (trailing newline), as UTF-8 bytes."""
+    return (text + "\n").encode()
+
+
+# (id, name, price) rows from PRODUCT_LIST / PRODUCTS_BY_IDS or the catalog snapshot
+PRODUCT_ENCODER = RowEncoder({
+    "product_id": (0, json_int),
+    "name": (1, json_string),
+    "price": (2, json_number),
+})
+
+# Rows from ORDER_HISTORY_FOR_USER:
+# (id, total_amount, status, created_at, product_id, quantity, price_at_time, product_name)
+ORDER_ENCODER = RowEncoder({
+    "id": (0, json_int),
+    "total_amount": (1, json_number),
+    "status": (2, json_string),
+    "created_at": (3, json_isoformat),
+    "items": ("items", None),
+})
+ORDER_ITEM_ENCODER = RowEncoder({
+    "product_id": (4, json_int),
+    "quantity": (5, json_int),
+    "price_at_time": (6, json_number),
+    "product_name": (7, nullable(json_string)),
+})
+
+
+@timed("json")
+def product_list_json(rows):
+    return json_body(PRODUCT_ENCODER.encode_list(rows))
+
+
+@timed("json")
+def order_history_json(rows):
+    """
+    Group order history rows (one per item, or one per order without items)
+    into the order list, in first-seen order.
+    """
+    orders = {}
+    for row in rows:
+        order = orders.get(row[0])
+        if order is None:
+            order = orders[row[0]] = (row, [])
+        if row[4]:
+            order[1].append(ORDER_ITEM_ENCODER.encode(row))
+    return json_body("[" + ",".join(
+        ORDER_ENCODER.encode(head, {"items": "[" + ",".join(items) + "]"})
+        for head, items in orders.values()
+    ) + "]")